@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+bench_classifier.py - Compare the PyTorch and ONNX (int8) classifier backends
+
+Classifies a sample of the extracted corpus with each backend and reports
+model load time, single-document latency (p50/p95), batched throughput and,
+for every backend after the first, how often its label agrees with the
+first backend's and how far its confidences drift.
+
+Usage:
+    python scripts/bench_classifier.py
+
+    # 500 documents, 4 ONNX Runtime threads, save the report
+    python scripts/bench_classifier.py --sample 500 --threads 4 --json bench_classifier.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Dict, List, Optional
+
+# Add parent directory for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classifier_03 import DEFAULT_MODEL, classify_text, classify_texts, load_model
+from corpus import CORPUS_DIRNAME, CorpusReader
+
+
+def load_sample(processed_dir: str, size: int, seed: int = 0) -> List[str]:
+    """Non-empty texts from the corpus (or the per-file outputs), sampled reproducibly."""
+    corpus_dir = os.path.join(processed_dir, CORPUS_DIRNAME)
+    texts = []
+    if CorpusReader.exists(corpus_dir):
+        corpus = CorpusReader(corpus_dir)
+        texts = [document["text"] for document in corpus]
+        corpus.close()
+    else:
+        for category in ["pdf", "docs", "html"]:
+            category_dir = os.path.join(processed_dir, category)
+            if not os.path.isdir(category_dir):
+                continue
+            for name in sorted(os.listdir(category_dir)):
+                if name.endswith(".txt"):
+                    with open(os.path.join(category_dir, name), "r", encoding="utf-8", errors="ignore") as f:
+                        texts.append(f.read())
+
+    texts = [text for text in texts if text.strip()]
+    random.Random(seed).shuffle(texts)
+    return texts[:size]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def bench_backend(backend: str, texts: List[str], latency_docs: int, threads: Optional[int]) -> Dict:
+    start = time.perf_counter()
+    if backend == "onnx" and threads:
+        from classifier_onnx import load_onnx_model
+
+        model, tokenizer, device = load_onnx_model(DEFAULT_MODEL, threads=threads)
+    else:
+        model, tokenizer, device = load_model(backend=backend)
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    for text in texts[:latency_docs]:
+        start = time.perf_counter()
+        classify_text(text, model, tokenizer, device)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    predictions = classify_texts(texts, model, tokenizer, device)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "device": str(device),
+        "load_seconds": round(load_seconds, 2),
+        "latency_ms_p50": round(percentile(latencies, 0.5) * 1000, 1),
+        "latency_ms_p95": round(percentile(latencies, 0.95) * 1000, 1),
+        "docs_per_second": round(len(texts) / batch_seconds, 2) if batch_seconds else None,
+        "predictions": predictions,
+    }
+
+
+def agreement(reference: List, other: List) -> Dict:
+    same = sum(1 for a, b in zip(reference, other) if a[0] == b[0])
+    drift = [abs(a[2][label] - b[2][label]) for a, b in zip(reference, other) for label in a[2]]
+    return {
+        "label_agreement": round(same / len(reference), 4) if reference else None,
+        "changed_labels": len(reference) - same,
+        "mean_score_diff": round(sum(drift) / len(drift), 4) if drift else None,
+        "max_score_diff": round(max(drift), 4) if drift else None,
+    }
+
+
+def run_benchmark(
+    processed_dir: str = "./processed_data",
+    sample: int = 200,
+    latency_docs: int = 20,
+    backends: Optional[List[str]] = None,
+    threads: Optional[int] = None,
+) -> Dict:
+    texts = load_sample(processed_dir, sample)
+    if not texts:
+        raise SystemExit(f"No extracted documents found in {processed_dir}")
+
+    results = [bench_backend(backend, texts, latency_docs, threads) for backend in backends or ["torch", "onnx"]]
+    reference = results[0]
+    for result in results[1:]:
+        result.update(agreement(reference["predictions"], result["predictions"]))
+        if reference["docs_per_second"] and result["docs_per_second"]:
+            result["speedup"] = round(result["docs_per_second"] / reference["docs_per_second"], 2)
+
+    for result in results:
+        del result["predictions"]
+    return {"documents": len(texts), "reference": reference["backend"], "backends": results}
+
+
+def print_report(report: Dict) -> None:
+    print(f"\n{'='*60}")
+    print(f"Classifier benchmark: {report['documents']} documents")
+    print(f"{'='*60}")
+    for result in report["backends"]:
+        print(f"\n{result['backend']} ({result['device']})")
+        print(f"  load:        {result['load_seconds']:.2f} s")
+        print(f"  latency:     p50 {result['latency_ms_p50']:.1f} ms, p95 {result['latency_ms_p95']:.1f} ms")
+        print(f"  throughput:  {result['docs_per_second']} docs/s")
+        if "label_agreement" in result:
+            print(f"  speedup:     {result.get('speedup')}x vs {report['reference']}")
+            print(
+                f"  agreement:   {result['label_agreement']:.2%} "
+                f"({result['changed_labels']} labels changed, mean score diff {result['mean_score_diff']})"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark classifier backends on the extracted corpus")
+    parser.add_argument("--processed", default="./processed_data", help="Processed data directory")
+    parser.add_argument("--sample", type=int, default=200, help="Documents to classify")
+    parser.add_argument("--latency-docs", type=int, default=20, help="Documents timed one at a time")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"], help="Backends; the first is the reference")
+    parser.add_argument("--threads", type=int, default=None, help="ONNX Runtime intra-op threads")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.processed, args.sample, args.latency_docs, args.backends, args.threads)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+bench_scrape.py - Offline crawl benchmark for SitemapSpider
+
+Serves the partial curaj.ac.in mirror in curaj-chatbot/public (optionally
+replicated N times to simulate a larger site) from a local HTTP server,
+crawls it with SitemapSpider while Sarvam is stubbed out, and reports
+pages/sec, bytes/sec, peak memory and time spent per spider callback.
+Nothing leaves the machine, so it is safe to run in CI.
+
+Usage:
+    python scripts/bench_scrape.py
+
+    # Simulate a site 20x the size of the mirror, with 0.5 s fake API latency
+    python scripts/bench_scrape.py --scale 20 --sarvam-latency 0.5
+
+    # Save a baseline, then fail if a later run is >20% slower
+    python scripts/bench_scrape.py --json bench_baseline.json
+    python scripts/bench_scrape.py --compare bench_baseline.json --max-regression 0.2
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+# Add parent directory for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapy.crawler import CrawlerProcess
+
+import scrape_01
+from scrape_01 import SitemapSpider
+
+MIRROR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "curaj-chatbot", "public")
+CRAWLABLE_EXTENSIONS = (".html", ".htm", ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx")
+
+# Metrics compared by --compare, and whether higher is better
+REGRESSION_METRICS = {
+    "pages_per_sec": True,
+    "bytes_per_sec": True,
+    "peak_rss_mb": False,
+}
+
+
+# ==================== SITE PREPARATION ====================
+
+
+def build_site(mirror_dir: str, site_dir: str, scale: int) -> int:
+    """
+    Copy the mirror into site_dir `scale` times (copy-1/, copy-2/, ...) and write an
+    index.html linking every crawlable file, so the spider reaches the whole site.
+    Returns the number of linked files.
+    """
+    links = []
+    for copy in range(1, scale + 1):
+        dest = os.path.join(site_dir, f"copy-{copy}")
+        shutil.copytree(mirror_dir, dest)
+        for root, _, files in os.walk(dest):
+            for name in files:
+                if name.lower().endswith(CRAWLABLE_EXTENSIONS):
+                    rel = os.path.relpath(os.path.join(root, name), site_dir).replace(os.sep, "/")
+                    links.append(rel)
+
+    with open(os.path.join(site_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write("<html><head><title>CURAJ mirror benchmark</title></head><body>\n")
+        for rel in sorted(links):
+            f.write(f'<a href="{quote(rel)}">{rel}</a>\n')
+        f.write("</body></html>\n")
+
+    return len(links)
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(site_dir: str):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=site_dir))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+# ==================== INSTRUMENTED SPIDER ====================
+
+
+def stub_sarvam(latency: float):
+    """Replace the Sarvam call with a fixed-latency stub returning truncated text."""
+
+    def fake_summary(text, logger=None, max_retries=0, backoff=1.0, rate_limiter=None):
+        if rate_limiter:
+            rate_limiter.wait()
+        if latency:
+            time.sleep(latency)
+        return text[:500]
+
+    scrape_01.request_sarvam_summary = fake_summary
+
+
+def timed_generator(name: str, timings: Dict[str, List[float]], gen):
+    """Yield from gen, accumulating only the time spent inside the generator itself."""
+    total = 0.0
+    while True:
+        start = time.perf_counter()
+        try:
+            value = next(gen)
+        except StopIteration:
+            total += time.perf_counter() - start
+            break
+        total += time.perf_counter() - start
+        yield value
+    timings[name].append(total)
+
+
+class BenchSpider(SitemapSpider):
+    """SitemapSpider with per-callback timing."""
+
+    name = "bench_sitemap_spider"
+    callback_timings: Dict[str, List[float]] = defaultdict(list)
+
+    def parse(self, response):
+        return timed_generator("parse", self.callback_timings, super().parse(response))
+
+    def process_changed(self, response, url, download=None):
+        return timed_generator(
+            "process_changed", self.callback_timings, super().process_changed(response, url, download)
+        )
+
+    def extract_links(self, response):
+        start = time.perf_counter()
+        links = super().extract_links(response)
+        self.callback_timings["extract_links"].append(time.perf_counter() - start)
+        return links
+
+
+# ==================== BENCHMARK ====================
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize_timings(timings: Dict[str, List[float]]) -> Dict[str, Dict]:
+    report = {}
+    for name, values in timings.items():
+        values = sorted(values)
+        report[name] = {
+            "calls": len(values),
+            "total_s": round(sum(values), 4),
+            "mean_ms": round(1000 * sum(values) / len(values), 3),
+            "p95_ms": round(1000 * values[min(len(values) - 1, int(0.95 * len(values)))], 3),
+        }
+    return report
+
+
+def run_benchmark(scale: int = 1, sarvam_latency: float = 0.0, timeout: int = 120, workdir: Optional[str] = None) -> Dict:
+    own_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="curaj_bench_")
+    site_dir = os.path.join(workdir, "site")
+    out_dir = os.path.join(workdir, "out")
+    os.makedirs(site_dir)
+    os.makedirs(out_dir)
+
+    print(f"📦 Building site from {MIRROR_DIR} (scale x{scale})...")
+    linked = build_site(MIRROR_DIR, site_dir, scale)
+    server = start_server(site_dir)
+    root_url = f"http://127.0.0.1:{server.server_address[1]}/index.html"
+    print(f"🌐 Serving {linked} linked files at {root_url}")
+
+    stub_sarvam(sarvam_latency)
+    BenchSpider.callback_timings.clear()
+
+    settings = dict(SitemapSpider.custom_settings)
+    settings.update(
+        {
+            "CLOSESPIDER_TIMEOUT": timeout,
+            "DOWNLOAD_DELAY": 0,
+            "LOG_LEVEL": "WARNING",
+            "JOBDIR": os.path.join(out_dir, "job"),
+            "SUMMARY_CACHE_PATH": "",
+            "CRAWL_REPORT_FILE": os.path.join(out_dir, "crawl_report.json"),
+            "CRAWL_METRICS_FILE": "",
+            "TELNETCONSOLE_ENABLED": False,
+        }
+    )
+    BenchSpider.custom_settings = settings
+
+    process = CrawlerProcess()
+    crawler = process.create_crawler(BenchSpider)
+    process.crawl(
+        crawler,
+        start_urls=[root_url],
+        allowed_domains=["127.0.0.1"],
+        pages_file=os.path.join(out_dir, "pages.jl"),
+        sitemap_file=os.path.join(out_dir, "generated_sitemap.xml"),
+        data_dir=os.path.join(out_dir, "data"),
+        state_db=os.path.join(out_dir, "crawl_state.db"),
+    )
+
+    start = time.perf_counter()
+    process.start()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    stats = crawler.stats.get_stats()
+    responses = stats.get("response_received_count", 0)
+    response_bytes = stats.get("downloader/response_bytes", 0)
+
+    report = {
+        "scale": scale,
+        "sarvam_latency_s": sarvam_latency,
+        "linked_files": linked,
+        "elapsed_s": round(elapsed, 3),
+        "finish_reason": stats.get("finish_reason"),
+        "responses": responses,
+        "items": stats.get("item_scraped_count", 0),
+        "response_bytes": response_bytes,
+        "pages_per_sec": round(responses / elapsed, 2) if elapsed else 0.0,
+        "bytes_per_sec": round(response_bytes / elapsed, 1) if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "callbacks": summarize_timings(BenchSpider.callback_timings),
+    }
+
+    if own_workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def print_report(report: Dict) -> None:
+    print("\n" + "=" * 70)
+    print("📊 CRAWL BENCHMARK")
+    print("=" * 70)
+    print(f"Scale:            x{report['scale']} ({report['linked_files']} linked files)")
+    print(f"Sarvam latency:   {report['sarvam_latency_s']}s (stubbed)")
+    print(f"Elapsed:          {report['elapsed_s']}s ({report['finish_reason']})")
+    print(f"Responses/items:  {report['responses']} / {report['items']}")
+    print(f"Pages/sec:        {report['pages_per_sec']}")
+    print(f"Bytes/sec:        {report['bytes_per_sec']:,.0f}")
+    if report["peak_rss_mb"] is not None:
+        print(f"Peak RSS:         {report['peak_rss_mb']:.1f} MB")
+    print("-" * 70)
+    print(f"{'callback':20} {'calls':>8} {'total s':>10} {'mean ms':>10} {'p95 ms':>10}")
+    for name, t in sorted(report["callbacks"].items()):
+        print(f"{name:20} {t['calls']:>8} {t['total_s']:>10.3f} {t['mean_ms']:>10.3f} {t['p95_ms']:>10.3f}")
+    print("=" * 70)
+
+
+def compare_reports(report: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Return a description of every metric that regressed by more than max_regression."""
+    failures = []
+    for metric, higher_is_better in REGRESSION_METRICS.items():
+        new, old = report.get(metric), baseline.get(metric)
+        if not new or not old:
+            continue
+        change = (old - new) / old if higher_is_better else (new - old) / old
+        if change > max_regression:
+            failures.append(f"{metric}: {old} → {new} ({change:.0%} worse)")
+    return failures
+
+
+# ==================== CLI ====================
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SitemapSpider against the local site mirror")
+    parser.add_argument("--scale", type=int, default=1, help="Replicate the mirror N times (default: 1)")
+    parser.add_argument("--sarvam-latency", type=float, default=0.0, help="Fake Sarvam latency in seconds")
+    parser.add_argument("--timeout", type=int, default=120, help="CLOSESPIDER_TIMEOUT for the run")
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed regression fraction")
+    args = parser.parse_args()
+
+    report = run_benchmark(scale=args.scale, sarvam_latency=args.sarvam_latency, timeout=args.timeout)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to: {args.json}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures = compare_reports(report, baseline, args.max_regression)
+        if failures:
+            print("❌ Performance regression:")
+            for failure in failures:
+                print(f"   {failure}")
+            sys.exit(1)
+        print("✅ No regression against baseline")
+
+
+if __name__ == "__main__":
+    main()
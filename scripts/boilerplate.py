@@ -0,0 +1,199 @@
+"""
+boilerplate.py - Corpus-level boilerplate stripping for extracted HTML text
+
+Tag-based cleaning (html_text.py, extract_html) removes <nav>, <header> and
+<footer>, but curaj.ac.in repeats menus, marquee notices and sidebar blocks
+in ordinary <div>s. BoilerplateIndex counts on how many pages each
+normalized line occurs; lines found on more than a configurable fraction of
+the pages are dropped before the text is classified, chunked and embedded.
+
+The index is always computed over full pages: freshly extracted pages are
+staged unstripped in processed_data/html/.raw/, and the corpus keeps the raw
+text of every packed page next to its stripped text, so build_corpus empties
+.raw/ again. A page's processed_data/html/*.txt is written for the corpus
+build when it was re-extracted or its stripped text changes.
+"""
+
+import os
+import re
+import json
+import hashlib
+import unicodedata
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+RAW_DIRNAME = ".raw"
+REPORT_NAME = "boilerplate_report.json"
+
+DEFAULT_DOC_FRACTION = 0.3  # strip lines present on more than this share of pages
+MIN_DOCUMENTS = 10  # below this many pages frequencies mean nothing; strip nothing
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_line(line: str) -> str:
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", line)).strip().lower()
+
+
+def line_key(line: str) -> bytes:
+    return hashlib.blake2b(normalize_line(line).encode("utf-8"), digest_size=8).digest()
+
+
+class BoilerplateIndex:
+    """
+    Document frequency of normalized lines over a set of pages.
+
+    Args:
+        doc_fraction: a line on more than this fraction of pages is boilerplate
+        min_documents: minimum corpus size before anything is considered boilerplate
+    """
+
+    def __init__(self, doc_fraction: float = DEFAULT_DOC_FRACTION, min_documents: int = MIN_DOCUMENTS):
+        self.doc_fraction = doc_fraction
+        self.min_documents = min_documents
+        self.doc_freq = Counter()
+        self.examples: Dict[bytes, str] = {}
+        self.documents = 0
+
+    def add_document(self, lines: Iterable[str]) -> None:
+        keys: Set[bytes] = set()
+        for line in lines:
+            if line.strip() and line.strip() != "#":
+                key = line_key(line)
+                if key not in keys:
+                    keys.add(key)
+                    self.examples.setdefault(key, line.strip())
+        self.doc_freq.update(keys)
+        self.documents += 1
+
+    @property
+    def min_pages(self) -> float:
+        """Pages a line must appear on (strictly more than) to be boilerplate."""
+        return self.doc_fraction * self.documents
+
+    def is_boilerplate(self, line: str) -> bool:
+        if self.documents < self.min_documents:
+            return False
+        return self.doc_freq.get(line_key(line), 0) > self.min_pages
+
+    def strip(self, lines: Iterable[str]) -> List[str]:
+        """Drop boilerplate lines, and "#" markers left with nothing between them."""
+        kept = []
+        for line in lines:
+            if line.strip() == "#":
+                if kept and kept[-1].strip() != "#":
+                    kept.append(line)
+            elif not self.is_boilerplate(line):
+                kept.append(line)
+        return kept
+
+    def report(self, limit: int = 200) -> Dict:
+        common = [
+            (key, count)
+            for key, count in self.doc_freq.most_common()
+            if self.documents >= self.min_documents and count > self.min_pages
+        ]
+        return {
+            "documents": self.documents,
+            "doc_fraction": self.doc_fraction,
+            "boilerplate_lines": len(common),
+            "top": [{"pages": count, "line": self.examples[key]} for key, count in common[:limit]],
+        }
+
+
+def _read_lines(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().split("\n")
+
+
+def strip_corpus_boilerplate(
+    output_dir: str,
+    fresh_outputs: Iterable[str],
+    doc_fraction: float = DEFAULT_DOC_FRACTION,
+    min_documents: int = MIN_DOCUMENTS,
+    live_names: Optional[Set[str]] = None,
+    packed_raw: Optional[Callable[[str], Optional[str]]] = None,
+    packed_text: Optional[Callable[[str], Optional[str]]] = None,
+) -> Dict:
+    """
+    Strip boilerplate from every extracted page in output_dir (e.g. processed_data/html).
+
+    fresh_outputs are the .txt files written by this extraction run; they hold
+    unstripped text and are staged in .raw/ until build_corpus packs it.
+    live_names are the pages whose source still exists (by default the .txt
+    files in output_dir). packed_raw and packed_text return a page's raw and
+    stripped text from the corpus. Staged pages always get a stripped output;
+    other pages only when their stripped text changed. Pages with no raw text
+    anywhere are neither counted nor stripped. Returns the report that
+    is also written to output_dir/boilerplate_report.json.
+    """
+    raw_dir = os.path.join(output_dir, RAW_DIRNAME)
+    os.makedirs(raw_dir, exist_ok=True)
+    fresh = {os.path.basename(path) for path in fresh_outputs}
+    if live_names is None:
+        live_names = {name for name in os.listdir(output_dir) if name.endswith(".txt")}
+
+    # Staged copies of pages whose output was removed (source deleted) are dropped
+    for name in os.listdir(raw_dir):
+        if name not in fresh and name not in live_names:
+            os.remove(os.path.join(raw_dir, name))
+
+    for name in fresh:
+        os.replace(os.path.join(output_dir, name), os.path.join(raw_dir, name))
+
+    def packed(name: str, lookup) -> Optional[str]:
+        return lookup(name) if lookup is not None else None
+
+    # Outputs written before stripping existed, and never packed, serve as their own raw text
+    for name in os.listdir(output_dir):
+        if (
+            name.endswith(".txt")
+            and not os.path.exists(os.path.join(raw_dir, name))
+            and packed(name, packed_text) is None
+        ):
+            os.replace(os.path.join(output_dir, name), os.path.join(raw_dir, name))
+
+    staged = {name for name in os.listdir(raw_dir) if name.endswith(".txt")}
+
+    def raw_lines(name: str) -> Optional[List[str]]:
+        if name in staged:
+            return _read_lines(os.path.join(raw_dir, name))
+        # Pages packed without raw text are left out rather than counted stripped (extract_02 re-extracts them)
+        text = packed(name, packed_raw)
+        return text.split("\n") if text is not None else None
+
+    index = BoilerplateIndex(doc_fraction, min_documents)
+    names = sorted(staged | {name for name in live_names if packed(name, packed_text) is not None})
+    for name in names:
+        lines = raw_lines(name)
+        if lines is not None:
+            index.add_document(lines)
+
+    rewritten = 0
+    for name in names:
+        lines = raw_lines(name)
+        if lines is None:
+            continue
+        text = "\n".join(index.strip(lines))
+        out_path = os.path.join(output_dir, name)
+        if name not in staged:
+            if os.path.exists(out_path):
+                with open(out_path, "r", encoding="utf-8") as f:
+                    current = f.read()
+            else:
+                current = packed(name, packed_text)
+            if current == text:
+                continue
+        tmp_path = out_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, out_path)
+        rewritten += 1
+
+    if not staged:
+        os.rmdir(raw_dir)
+
+    report = {**index.report(), "rewritten": rewritten}
+    with open(os.path.join(output_dir, REPORT_NAME), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
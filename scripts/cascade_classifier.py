@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+cascade_classifier.py - Cheap first stage for miscellaneous watch-folder files
+
+Most files dropped into watch_folders/miscellaneous are obvious: an "Exam
+Date Sheet" PDF full of dates, a faculty profile page. The first stage of
+the cascade scores a file from keyword and date-pattern counts in its text
+and name with a small calibrated logistic regression (linear_head.py) in well
+under a millisecond. watch_06.classify_for_miscellaneous accepts its answer
+when the calibrated confidence reaches CASCADE_CONFIDENCE and escalates
+everything else to the NLI (or embedding) classifier.
+
+CascadeMetrics keeps running counts in watch_folders/cascade_metrics.json:
+escalation rate, stage timings, how often the first stage's guess agreed
+with the second stage on escalated files, and the same agreement on a small
+random audit sample of files the first stage answered alone.
+
+Usage:
+    # Train from the classifier results (needs classified_data.json and processed_data)
+    python scripts/cascade_classifier.py
+"""
+
+import os
+import re
+import json
+import argparse
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from linear_head import POSITIVE_LABEL, LogisticHead
+from corpus import CORPUS_DIRNAME, CorpusReader
+
+CASCADE_MODEL_PATH = os.getenv("CASCADE_MODEL_PATH", "./models/cascade_classifier.json")
+CASCADE_CONFIDENCE = float(os.getenv("CASCADE_CONFIDENCE", "0.9"))  # answer without escalating at or above
+CASCADE_AUDIT_RATE = float(os.getenv("CASCADE_AUDIT_RATE", "0.05"))  # answered files also sent to stage two
+CASCADE_TEXT_CHARS = 5000  # the opening of a notice or profile says what it is
+MIN_TRAINING_DOCS = 50
+
+DYNAMIC_KEYWORDS = [
+    "last date", "deadline", "admission", "notice", "circular", "notification", "exam", "examination",
+    "date sheet", "datesheet", "schedule", "timetable", "time table", "registration", "result", "interview",
+    "walk-in", "recruitment", "vacancy", "tender", "scholarship", "workshop", "seminar", "webinar",
+    "conference", "announcement", "apply", "extended", "convocation", "counselling", "merit list",
+]
+STATIC_KEYWORDS = [
+    "faculty", "profile", "professor", "department", "about", "vision", "mission", "policy", "ordinance",
+    "regulation", "syllabus", "curriculum", "course structure", "programme", "infrastructure", "library",
+    "hostel", "faq", "research interests", "publications", "qualification", "objectives", "history",
+    "contact", "facilities", "committee",
+]
+# Devanagari marks are not \w to the re module, so Hindi keywords are matched as plain substrings
+HINDI_DYNAMIC_KEYWORDS = ["अंतिम तिथि", "सूचना", "परीक्षा", "प्रवेश", "परिणाम", "निविदा", "अधिसूचना", "साक्षात्कार"]
+HINDI_STATIC_KEYWORDS = ["विभाग", "संकाय", "नीति", "पाठ्यक्रम", "पुस्तकालय", "छात्रावास"]
+
+_MONTHS = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*"
+DATE_PATTERNS = [
+    re.compile(r"\b\d{1,2}[./-]\d{1,2}[./-](?:\d{4}|\d{2})\b"),
+    re.compile(rf"\b\d{{1,2}}(?:st|nd|rd|th)?\s+{_MONTHS}[,.]?\s+\d{{4}}\b"),
+    re.compile(rf"\b{_MONTHS}\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}\b"),
+    re.compile(r"\b\d{1,2}[:.]\d{2}\s*(?:am|pm|a\.m\.|p\.m\.)"),
+]
+_YEAR_RE = re.compile(r"\b20[0-9]{2}\b")
+_KEYWORD_RES = [re.compile(rf"\b{re.escape(keyword)}\b") for keyword in DYNAMIC_KEYWORDS + STATIC_KEYWORDS]
+_HINDI_KEYWORDS = HINDI_DYNAMIC_KEYWORDS + HINDI_STATIC_KEYWORDS
+_STORED_NAME_RE = re.compile(r"__[0-9a-f]{12}$")  # content-hash suffix added by document_store
+
+
+def normalize_file_name(file_name: str) -> str:
+    stem = _STORED_NAME_RE.sub("", os.path.splitext(os.path.basename(file_name))[0])
+    return re.sub(r"[_\-.]+", " ", stem).lower()
+
+
+def keyword_features(text: str, file_name: str = "") -> np.ndarray:
+    """Log counts of keywords and date patterns in the text opening, plus keyword hits in the file name."""
+    body = text[:CASCADE_TEXT_CHARS].lower()
+    name = normalize_file_name(file_name)
+    per_kchar = 1000.0 / max(len(body), 1)
+
+    features: List[float] = []
+    for pattern in _KEYWORD_RES:
+        features.append(np.log1p(len(pattern.findall(body))))
+        features.append(1.0 if pattern.search(name) else 0.0)
+    for keyword in _HINDI_KEYWORDS:
+        features.append(np.log1p(body.count(keyword)))
+        features.append(1.0 if keyword in name else 0.0)
+    for pattern in DATE_PATTERNS:
+        count = len(pattern.findall(body))
+        features.append(np.log1p(count))
+        features.append(np.log1p(count * per_kchar))
+    features.append(np.log1p(len(_YEAR_RE.findall(body))))
+    features.append(1.0 if _YEAR_RE.search(name) or any(p.search(name) for p in DATE_PATTERNS) else 0.0)
+    features.append(np.log1p(len(text) / 1000.0))
+    return np.asarray(features, dtype=np.float64)
+
+
+class CascadeClassifier(LogisticHead):
+    """First-stage linear model over keyword_features (see linear_head.py)."""
+
+    def classify(self, text: str, file_name: str = ""):
+        return self.predict(keyword_features(text, file_name))
+
+    def save(self, path: str = CASCADE_MODEL_PATH) -> None:
+        super().save(path)
+
+    @classmethod
+    def load(cls, path: str = CASCADE_MODEL_PATH) -> Optional["CascadeClassifier"]:
+        return super().load(path)
+
+
+class CascadeMetrics:
+    """Running cascade counters, persisted as JSON after every file."""
+
+    COUNTERS = [
+        "documents",
+        "answered",
+        "escalated",
+        "escalated_agreed",
+        "audited",
+        "audit_agreed",
+        "stage1_ms",
+        "stage2_ms",
+    ]
+
+    def __init__(self, path: str):
+        self.path = path
+        self.counts = {name: 0 for name in self.COUNTERS}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    saved = json.load(f).get("counts", {})
+                self.counts.update({name: saved[name] for name in self.COUNTERS if name in saved})
+            except Exception as e:
+                print(f"⚠️  Could not read cascade metrics {path}: {e}")
+
+    def record(
+        self,
+        stage1_label: str,
+        final_label: str,
+        escalated: bool,
+        audited: bool,
+        stage1_ms: float,
+        stage2_ms: float,
+    ) -> None:
+        """final_label is the second stage's label when escalated or audited."""
+        counts = self.counts
+        counts["documents"] += 1
+        counts["stage1_ms"] += stage1_ms
+        counts["stage2_ms"] += stage2_ms
+        if escalated:
+            counts["escalated"] += 1
+            counts["escalated_agreed"] += int(stage1_label == final_label)
+        else:
+            counts["answered"] += 1
+        if audited:
+            counts["audited"] += 1
+            counts["audit_agreed"] += int(stage1_label == final_label)
+        self.save()
+
+    def summary(self) -> Dict:
+        counts = self.counts
+
+        def ratio(num: float, den: float) -> Optional[float]:
+            return round(num / den, 4) if den else None
+
+        return {
+            "escalation_rate": ratio(counts["escalated"], counts["documents"]),
+            "escalated_agreement": ratio(counts["escalated_agreed"], counts["escalated"]),
+            "audit_agreement": ratio(counts["audit_agreed"], counts["audited"]),
+            "stage1_ms_avg": ratio(counts["stage1_ms"], counts["documents"]),
+            "stage2_ms_avg": ratio(counts["stage2_ms"], counts["escalated"] + counts["audited"]),
+        }
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"counts": self.counts, "summary": self.summary()}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def load_training_documents(classified_json: str, processed_dir: str, min_confidence: float) -> List[Dict]:
+    """Classifier results with their text, skipping labels below min_confidence."""
+    with open(classified_json, "r", encoding="utf-8") as f:
+        results = [r for r in json.load(f) if r.get("confidence", 0.0) >= min_confidence]
+
+    corpus_dir = os.path.join(processed_dir, CORPUS_DIRNAME)
+    corpus = CorpusReader(corpus_dir) if CorpusReader.exists(corpus_dir) else None
+    documents = []
+    for result in results:
+        try:
+            if corpus is not None and result.get("id") in corpus:
+                text = corpus.get(result["id"])["text"]
+            else:
+                with open(result["path"], "r", encoding="utf-8") as f:
+                    text = f.read()
+        except (OSError, KeyError):
+            continue
+        documents.append({"text": text, "file": result["file"], "label": int(result["category"] == POSITIVE_LABEL)})
+    if corpus is not None:
+        corpus.close()
+    return documents
+
+
+def train(documents: List[Dict], confidence: float = CASCADE_CONFIDENCE) -> CascadeClassifier:
+    if len(documents) < MIN_TRAINING_DOCS:
+        raise ValueError(f"Only {len(documents)} labelled documents; need {MIN_TRAINING_DOCS}")
+
+    X = np.stack([keyword_features(doc["text"], doc["file"]) for doc in documents])
+    y = np.array([doc["label"] for doc in documents], dtype=np.float64)
+    classifier, probs, held_y = CascadeClassifier.fit_calibrated(X, y, l2=1e-2, epochs=2000)
+
+    answered = np.maximum(probs, 1 - probs) >= confidence
+    agreed = (probs >= 0.5) == (held_y == 1)
+    classifier.metrics.update(
+        {
+            "confidence_threshold": confidence,
+            "holdout_answered_share": round(float(answered.mean()), 4),
+            "holdout_answered_agreement": round(float(agreed[answered].mean()), 4) if answered.any() else None,
+        }
+    )
+    return classifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the cascade's keyword/date first stage")
+    parser.add_argument("--labels", default="./classified_data.json", help="Classifier results to learn from")
+    parser.add_argument("--processed", default="./processed_data", help="Processed data directory")
+    parser.add_argument(
+        "--min-confidence", type=float, default=0.6, help="Ignore NLI labels below this confidence when training"
+    )
+    parser.add_argument("--output", default=CASCADE_MODEL_PATH, help="Where to save the trained model")
+    args = parser.parse_args()
+
+    documents = load_training_documents(args.labels, args.processed, args.min_confidence)
+    print(f"Loaded {len(documents)} labelled documents")
+
+    classifier = train(documents)
+    classifier.save(args.output)
+    print(json.dumps(classifier.metrics, indent=2))
+    print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
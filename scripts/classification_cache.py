@@ -0,0 +1,107 @@
+"""
+classification_cache.py - On-disk cache of zero-shot classification scores
+
+classifier_03 scores every document against every label description. Each
+(document, label) entailment score is cached under a hash of the model (and
+backend), the truncation settings, the label description and the truncated
+document text. Re-running the classifier after an incremental crawl only
+runs the model on new or changed documents, and editing one entry of
+LABEL_DESCRIPTIONS only recomputes the scores for that label.
+
+The cache is a single SQLite file, like summary_cache.py. Lookups are
+read-only: the last-used time of the scores they hit is written in one batch
+with the next put_many(), prune() or close().
+"""
+
+import time
+import sqlite3
+import hashlib
+from typing import Dict, Iterable
+
+
+def make_score_key(model_id: str, max_chars: int, max_length: int, premise: str, hypothesis: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{model_id}\x00{max_chars}\x00{max_length}\x00".encode("utf-8"))
+    digest.update(hashlib.sha256(hypothesis.encode("utf-8")).digest())
+    digest.update(premise.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ClassificationCache:
+    """
+    SQLite-backed cache of entailment scores.
+
+    Args:
+        db_path: SQLite file to use (created if missing)
+        model_id: model name plus backend; scores of different models never mix
+    """
+
+    def __init__(self, db_path: str, model_id: str):
+        self.db_path = db_path
+        self.model_id = model_id
+        self.hits = 0
+        self.misses = 0
+        self._used = set()  # keys read since the last write; their last_used is bumped in one batch
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scores (
+                key TEXT PRIMARY KEY,
+                score REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def key(self, premise: str, hypothesis: str, max_chars: int, max_length: int) -> str:
+        return make_score_key(self.model_id, max_chars, max_length, premise, hypothesis)
+
+    def _lookup(self, keys: list) -> Dict[str, float]:
+        found = {}
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(self.conn.execute(f"SELECT key, score FROM scores WHERE key IN ({placeholders})", chunk))
+        return found
+
+    def contains_all(self, keys: Iterable[str]) -> bool:
+        keys = list(dict.fromkeys(keys))
+        return len(self._lookup(keys)) == len(keys)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, float]:
+        keys = list(dict.fromkeys(keys))
+        found = self._lookup(keys)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        self._used.update(found)
+        return found
+
+    def _touch_used(self, now: float) -> None:
+        """Write the last_used of keys read by get_many; the caller commits."""
+        if self._used:
+            self.conn.executemany("UPDATE scores SET last_used = ? WHERE key = ?", [(now, key) for key in self._used])
+            self._used = set()
+
+    def put_many(self, scores: Dict[str, float]) -> None:
+        now = time.time()
+        self._touch_used(now)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO scores (key, score, last_used) VALUES (?, ?, ?)",
+            [(key, score, now) for key, score in scores.items()],
+        )
+        self.conn.commit()
+
+    def prune(self, max_age_days: float) -> int:
+        """Delete scores not used for max_age_days (e.g. of old label descriptions); returns the count."""
+        now = time.time()
+        self._touch_used(now)
+        cursor = self.conn.execute("DELETE FROM scores WHERE last_used < ?", (now - max_age_days * 86400,))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        self._touch_used(time.time())
+        self.conn.commit()
+        self.conn.close()
@@ -1,11 +1,16 @@
 import os
 import json
 import shutil
-from typing import Dict, List, Tuple, Optional
+import argparse
+from typing import Dict, Iterator, List, Tuple, Optional
 
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
+from near_duplicates import DUPLICATES_NAME, load_duplicates
+from corpus import CORPUS_DIRNAME, CorpusReader
+from classification_cache import ClassificationCache
+
 
 # Label definitions with detailed descriptions
 LABEL_DESCRIPTIONS = {
@@ -14,11 +19,27 @@ LABEL_DESCRIPTIONS = {
 }
 
 
-def load_model(model_name: str = "MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7"):
+DEFAULT_MODEL = "MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7"
+
+# "torch", or "onnx" for the int8-quantized ONNX Runtime model (see classifier_onnx.py)
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "torch")
+
+
+def load_model(model_name: str = DEFAULT_MODEL, backend: Optional[str] = None):
     """
     Load the multilingual zero-shot classification model.
     This model supports multiple Indian languages including Hindi, English, and others.
+    `backend` defaults to CLASSIFIER_BACKEND.
     """
+    backend = backend or CLASSIFIER_BACKEND
+    if backend == "onnx":
+        from classifier_onnx import load_onnx_model
+
+        print(f"Loading model: {model_name} (ONNX Runtime, int8)")
+        return load_onnx_model(model_name)
+    if backend != "torch":
+        raise ValueError(f"Unknown classifier backend: {backend!r} (expected 'torch' or 'onnx')")
+
     print(f"Loading model: {model_name}")
     tokenizer = AutoTokenizer.from_pretrained(model_name)
     model = AutoModelForSequenceClassification.from_pretrained(model_name)
@@ -32,52 +53,139 @@ def load_model(model_name: str = "MoritzLaurer/mDeBERTa-v3-base-xnli-multilingua
     return model, tokenizer, device
 
 
-def classify_text(text: str, model, tokenizer, device, max_length: int = 512) -> Tuple[str, float, Dict[str, float]]:
+# Characters of each document given to the model (the opening usually carries the key info)
+MAX_TEXT_CHARS = 2000
+
+# Padded tokens per forward pass; pairs are sorted by length so batches carry little padding
+TOKENS_PER_BATCH_GPU = 32768
+TOKENS_PER_BATCH_CPU = 8192
+
+# Documents gathered before a batched classification pass in process_directory
+CLASSIFY_CHUNK_DOCS = 256
+
+# Entailment scores of earlier runs (see classification_cache.py)
+CLASSIFICATION_CACHE_PATH = "classification_cache.db"
+# Every run refreshes the scores it uses; scores unused this long (old label
+# descriptions, removed documents, other models) are deleted after the run
+CLASSIFICATION_CACHE_MAX_AGE_DAYS = 30
+
+
+def score_keys(texts: List[str], cache: ClassificationCache, max_length: int = 512) -> List[str]:
+    """Cache keys of every (text, label) pair, in classify_texts' pair order."""
+    return [
+        cache.key(text[:MAX_TEXT_CHARS], LABEL_DESCRIPTIONS[label], MAX_TEXT_CHARS, max_length)
+        for text in texts
+        for label in LABEL_DESCRIPTIONS
+    ]
+
+
+def classify_texts(
+    texts: List[str],
+    model,
+    tokenizer,
+    device,
+    max_length: int = 512,
+    tokens_per_batch: Optional[int] = None,
+    cache: Optional[ClassificationCache] = None,
+) -> List[Tuple[str, float, Dict[str, float]]]:
     """
-    Classify text as 'static' or 'dynamic' using zero-shot classification.
+    Classify many texts as 'static' or 'dynamic' using zero-shot classification.
+
+    Every (premise, hypothesis) pair across all texts is tokenized once, sorted
+    by length and run in dynamically padded batches of at most
+    `tokens_per_batch` padded tokens (by default sized for the device).
+    With a cache, only pairs without a cached score reach the model (which
+    is not touched at all when every score is cached).
 
     Returns:
-        - label: 'static' or 'dynamic'
-        - confidence: confidence score for the predicted label
-        - all_scores: dictionary with scores for both labels
+        One (label, confidence, all_scores) tuple per text, as classify_text
     """
-    # Truncate text if too long (use first part which often contains key info)
-    if len(text) > 2000:
-        text = text[:2000]
+    if not texts:
+        return []
 
-    # Prepare hypothesis for each label
-    premise = text
     labels = list(LABEL_DESCRIPTIONS.keys())
-
-    results = {}
+    premises = [text[:MAX_TEXT_CHARS] for text in texts for _ in labels]
+    hypotheses = [LABEL_DESCRIPTIONS[label] for _ in texts for label in labels]
+
+    entailment = [0.0] * len(premises)
+    todo = list(range(len(premises)))
+    if cache is not None:
+        keys = score_keys(texts, cache, max_length)
+        cached = cache.get_many(keys)
+        todo = [i for i in todo if keys[i] not in cached]
+        for i, key in enumerate(keys):
+            if key in cached:
+                entailment[i] = cached[key]
+
+    if todo:
+        _run_nli(todo, premises, hypotheses, entailment, model, tokenizer, device, max_length, tokens_per_batch)
+        if cache is not None:
+            cache.put_many({keys[i]: entailment[i] for i in todo})
+
+    predictions = []
+    for doc in range(len(texts)):
+        results = {label: entailment[doc * len(labels) + j] for j, label in enumerate(labels)}
+        predicted_label = max(results, key=results.get)
+        predictions.append((predicted_label, results[predicted_label], results))
+    return predictions
+
+
+def _run_nli(
+    pairs: List[int],
+    premises: List[str],
+    hypotheses: List[str],
+    entailment: List[float],
+    model,
+    tokenizer,
+    device,
+    max_length: int,
+    tokens_per_batch: Optional[int],
+) -> None:
+    """Fill entailment[i] for each pair index i in `pairs`, in length-sorted padded batches."""
+    if tokens_per_batch is None:
+        tokens_per_batch = TOKENS_PER_BATCH_GPU if device.type == "cuda" else TOKENS_PER_BATCH_CPU
+
+    # Encode premise and hypothesis (NLI format) without padding; batches are padded below
+    encoded = tokenizer(
+        [premises[i] for i in pairs], [hypotheses[i] for i in pairs], truncation=True, max_length=max_length
+    )
+    features = [{key: encoded[key][n] for key in encoded.keys()} for n in range(len(pairs))]
+
+    # Longest first, so a batch that does not fit in memory fails right away
+    order = sorted(range(len(features)), key=lambda i: len(features[i]["input_ids"]), reverse=True)
+    batches = []
+    batch = []
+    for i in order:
+        longest = len(features[batch[0]]["input_ids"]) if batch else len(features[i]["input_ids"])
+        if batch and (len(batch) + 1) * longest > tokens_per_batch:
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
 
     with torch.no_grad():
-        for label in labels:
-            hypothesis = LABEL_DESCRIPTIONS[label]
-
-            # Encode premise and hypothesis (NLI format)
-            inputs = tokenizer(
-                premise, hypothesis, truncation=True, max_length=max_length, padding=True, return_tensors="pt"
-            )
-
-            # Move to device
+        for batch in batches:
+            inputs = tokenizer.pad([features[n] for n in batch], return_tensors="pt")
             inputs = {k: v.to(device) for k, v in inputs.items()}
-
-            # Get prediction
-            outputs = model(**inputs)
-            logits = outputs.logits
+            logits = model(**inputs).logits
 
             # Get entailment probability (index 2 is entailment in XNLI)
-            probs = torch.softmax(logits, dim=1)
-            entailment_score = probs[0][2].item()  # Entailment class
+            probs = torch.softmax(logits, dim=1)[:, 2].tolist()
+            for n, prob in zip(batch, probs):
+                entailment[pairs[n]] = prob
 
-            results[label] = entailment_score
 
-    # Determine final label
-    predicted_label = max(results, key=results.get)
-    confidence = results[predicted_label]
+def classify_text(text: str, model, tokenizer, device, max_length: int = 512) -> Tuple[str, float, Dict[str, float]]:
+    """
+    Classify text as 'static' or 'dynamic' using zero-shot classification.
 
-    return predicted_label, confidence, results
+    Returns:
+        - label: 'static' or 'dynamic'
+        - confidence: confidence score for the predicted label
+        - all_scores: dictionary with scores for both labels
+    """
+    return classify_texts([text], model, tokenizer, device, max_length)[0]
 
 
 def classify_file(file_path: str, model, tokenizer, device) -> Optional[Dict]:
@@ -90,24 +198,94 @@ def classify_file(file_path: str, model, tokenizer, device) -> Optional[Dict]:
     try:
         with open(file_path, "r", encoding="utf-8") as f:
             text = f.read()
+    except Exception as e:
+        print(f"❌ Error classifying {os.path.basename(file_path)}: {e}")
+        return None
+
+    return classify_document(text, file_path, model, tokenizer, device)
 
-        if not text.strip():
-            print(f"⚠️  Empty file: {os.path.basename(file_path)}")
-            return None
 
-        label, confidence, scores = classify_text(text, model, tokenizer, device)
+def classify_document(text: str, path: str, model, tokenizer, device) -> Optional[Dict]:
+    """
+    Classify the text of one document; `path` identifies it in the results.
+
+    Returns:
+        Dictionary with classification results or None on error.
+    """
+    return classify_documents([(text, path)], model, tokenizer, device)[0]
 
-        return {
-            "file": os.path.basename(file_path),
-            "path": file_path,
+
+def classify_documents(
+    documents: List[Tuple[str, str]], model, tokenizer, device, cache: Optional[ClassificationCache] = None
+) -> List[Optional[Dict]]:
+    """
+    Classify (text, path) documents in batched passes, reusing cached scores.
+
+    Returns:
+        One classification result dictionary per document, None for empty or failed ones.
+    """
+    results: List[Optional[Dict]] = [None] * len(documents)
+    todo = []
+    for i, (text, path) in enumerate(documents):
+        if text.strip():
+            todo.append(i)
+        else:
+            print(f"⚠️  Empty file: {os.path.basename(path)}")
+
+    try:
+        predictions = classify_texts([documents[i][0] for i in todo], model, tokenizer, device, cache=cache)
+    except Exception as e:
+        if len(todo) <= 1:
+            for i in todo:
+                print(f"❌ Error classifying {os.path.basename(documents[i][1])}: {e}")
+            return results
+        # Retry one by one so a single bad document does not sink the batch
+        print(f"⚠️  Batched classification failed ({e}), retrying documents one at a time")
+        for i in todo:
+            results[i] = classify_documents([documents[i]], model, tokenizer, device, cache)[0]
+        return results
+
+    for i, (label, confidence, scores) in zip(todo, predictions):
+        path = documents[i][1]
+        results[i] = {
+            "file": os.path.basename(path),
+            "path": path,
             "category": label,
             "confidence": round(confidence, 4),
             "scores": {k: round(v, 4) for k, v in scores.items()},
         }
+    return results
 
-    except Exception as e:
-        print(f"❌ Error classifying {os.path.basename(file_path)}: {e}")
-        return None
+
+def iter_documents(
+    input_base_dir: str, categories: List[str], corpus: Optional[CorpusReader], skip: Dict[str, str]
+) -> Iterator[Tuple[str, str, str]]:
+    """
+    Yield (category, rel_path, text) for every extracted document not in `skip`,
+    from the packed corpus when there is one and from the per-file outputs otherwise.
+    """
+    for category in categories:
+        if corpus is not None:
+            for entry in corpus.iter_entries():
+                if entry["category"] == category and entry["id"] not in skip:
+                    yield category, entry["id"], corpus.get(entry["id"])["text"]
+            continue
+
+        input_dir = os.path.join(input_base_dir, category)
+        if not os.path.isdir(input_dir):
+            print(f"⚠️  Directory not found: {input_dir}, skipping...")
+            continue
+
+        for filename in os.listdir(input_dir):
+            if not filename.endswith(".txt") or f"{category}/{filename}" in skip:
+                continue
+            try:
+                with open(os.path.join(input_dir, filename), "r", encoding="utf-8") as f:
+                    text = f.read()
+            except Exception as e:
+                print(f"❌ Error reading {filename}: {e}")
+                continue
+            yield category, f"{category}/{filename}", text
 
 
 def process_directory(
@@ -115,6 +293,9 @@ def process_directory(
     output_json: str = "./classified_data.json",
     organize_files: bool = True,
     output_organized_dir: str = "./classified_data",
+    backend: Optional[str] = None,
+    cache_path: Optional[str] = CLASSIFICATION_CACHE_PATH,
+    cache_max_age_days: Optional[float] = CLASSIFICATION_CACHE_MAX_AGE_DAYS,
 ) -> List[Dict]:
     """
     Process all text files in processed_data directory and classify them.
@@ -122,52 +303,107 @@ def process_directory(
     Args:
         input_base_dir: Base directory containing processed text files
         output_json: Path to save classification results JSON
-        organize_files: Whether to copy files to organized folders
+        organize_files: Whether to copy files to organized folders (only without a
+            processed_data/corpus, whose index records the labels instead)
         output_organized_dir: Base directory for organized classified files
+        backend: "torch" or "onnx" (default: CLASSIFIER_BACKEND)
+        cache_path: SQLite file of cached scores (see classification_cache.py); None disables it
+        cache_max_age_days: prune cached scores unused for this many days; None keeps them all
 
     Returns:
         List of classification results
     """
-    # Load model
-    model, tokenizer, device = load_model()
+    # Scores of unchanged documents come from the cache; the model loads on the first miss
+    backend = backend or CLASSIFIER_BACKEND
+    cache = ClassificationCache(cache_path, f"{DEFAULT_MODEL}:{backend}") if cache_path else None
+    loaded = []
+
+    def get_model(texts: List[str]) -> Tuple:
+        if loaded:
+            return loaded[0]
+        if cache is not None and cache.contains_all(score_keys(texts, cache)):
+            return None, None, None
+        loaded.append(load_model(backend=backend))
+        return loaded[0]
 
     categories = ["pdf", "docs", "html"]
     all_results = []
 
+    # Near duplicates found during extraction: only their representative is classified
+    duplicates = load_duplicates(input_base_dir)
+    duplicates_of = {}
+    for duplicate, representative in duplicates.items():
+        duplicates_of.setdefault(representative, []).append(duplicate)
+    if duplicates:
+        print(f"Skipping {len(duplicates)} near-duplicate files (see {DUPLICATES_NAME})")
+
     print(f"\n{'='*60}")
     print(f"Starting classification...")
     print(f"{'='*60}\n")
 
-    for category in categories:
-        input_dir = os.path.join(input_base_dir, category)
-
-        if not os.path.isdir(input_dir):
-            print(f"⚠️  Directory not found: {input_dir}, skipping...")
-            continue
-
-        print(f"\nProcessing {category.upper()} files from: {input_dir}")
-        print("-" * 60)
-
-        files = [f for f in os.listdir(input_dir) if f.endswith(".txt")]
-
-        for filename in files:
-            file_path = os.path.join(input_dir, filename)
-
-            result = classify_file(file_path, model, tokenizer, device)
-
-            if result:
-                all_results.append(result)
-
-                # Print result
-                label_emoji = "📅" if result["category"] == "dynamic" else "📚"
-                print(f"{label_emoji} {filename[:50]:50} → {result['category']:8} (conf: {result['confidence']:.2f})")
-
-                # Organize files if requested
-                if organize_files:
-                    dest_dir = os.path.join(output_organized_dir, result["category"], category)
-                    os.makedirs(dest_dir, exist_ok=True)
-                    dest_path = os.path.join(dest_dir, filename)
-                    shutil.copy2(file_path, dest_path)
+    corpus_dir = os.path.join(input_base_dir, CORPUS_DIRNAME)
+    corpus = CorpusReader(corpus_dir) if CorpusReader.exists(corpus_dir) else None
+    if corpus is not None:
+        print(f"Reading {len(corpus)} documents from corpus: {corpus_dir}")
+
+    current_category = None
+    pending = []
+
+    def flush():
+        """Classify the pending documents in one batched pass and record the results."""
+        nonlocal current_category
+        documents = [(text, os.path.join(input_base_dir, rel_path)) for _, rel_path, text in pending]
+        model, tokenizer, device = get_model([text for text, _ in documents if text.strip()])
+        results = classify_documents(documents, model, tokenizer, device, cache)
+        for (category, rel_path, _), result in zip(pending, results):
+            if category != current_category:
+                current_category = category
+                print(f"\nProcessing {category.upper()} files")
+                print("-" * 60)
+
+            if not result:
+                continue
+            filename = os.path.basename(rel_path)
+            if rel_path in duplicates_of:
+                result["duplicates"] = sorted(duplicates_of[rel_path])
+            result["id"] = rel_path
+            all_results.append(result)
+
+            # Print result
+            label_emoji = "📅" if result["category"] == "dynamic" else "📚"
+            print(f"{label_emoji} {filename[:50]:50} → {result['category']:8} (conf: {result['confidence']:.2f})")
+
+            # Organize files if requested; with a corpus the labels live in its index instead
+            if organize_files and corpus is None:
+                dest_dir = os.path.join(output_organized_dir, result["category"], category)
+                os.makedirs(dest_dir, exist_ok=True)
+                dest_path = os.path.join(dest_dir, filename)
+                shutil.copy2(result["path"], dest_path)
+        pending.clear()
+
+    for document in iter_documents(input_base_dir, categories, corpus, duplicates):
+        pending.append(document)
+        if len(pending) >= CLASSIFY_CHUNK_DOCS:
+            flush()
+    if pending:
+        flush()
+
+    if cache is not None:
+        print(f"Classification cache: {cache.hits} scores reused, {cache.misses} computed")
+        if cache_max_age_days is not None:
+            pruned = cache.prune(cache_max_age_days)
+            if pruned:
+                print(f"Classification cache: pruned {pruned} scores unused for {cache_max_age_days:g} days")
+        cache.close()
+
+    if corpus is not None:
+        corpus.set_labels(
+            {
+                r["id"]: {"category": r["category"], "confidence": r["confidence"], "scores": r["scores"]}
+                for r in all_results
+            }
+        )
+        corpus.close()
 
     # Save results to JSON
     with open(output_json, "w", encoding="utf-8") as f:
@@ -186,7 +422,9 @@ def process_directory(
     print(f"📅 Dynamic documents: {dynamic_count}")
     print(f"\nResults saved to: {output_json}")
 
-    if organize_files:
+    if corpus is not None:
+        print(f"Labels saved to corpus index: {corpus_dir}")
+    elif organize_files:
         print(f"Organized files saved to: {output_organized_dir}/")
 
     print(f"{'='*60}\n")
@@ -194,7 +432,11 @@ def process_directory(
     return all_results
 
 
-def main():
+def main(
+    backend: Optional[str] = None,
+    use_cache: bool = True,
+    cache_max_age_days: Optional[float] = CLASSIFICATION_CACHE_MAX_AGE_DAYS,
+):
     """
     Main function to run classification on all processed text files.
     """
@@ -203,10 +445,26 @@ def main():
         output_json="./classified_data.json",
         organize_files=True,
         output_organized_dir="./classified_data",
+        backend=backend,
+        cache_path=CLASSIFICATION_CACHE_PATH if use_cache else None,
+        cache_max_age_days=cache_max_age_days,
     )
 
     return results
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Classify processed documents as static or dynamic")
+    parser.add_argument(
+        "--backend", choices=["torch", "onnx"], default=None, help="Inference backend (default: CLASSIFIER_BACKEND)"
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Classify every document again, ignoring cached scores")
+    parser.add_argument(
+        "--cache-max-age",
+        type=float,
+        default=CLASSIFICATION_CACHE_MAX_AGE_DAYS,
+        help="Prune cached scores unused for this many days (0 = never prune)",
+    )
+    args = parser.parse_args()
+
+    main(backend=args.backend, use_cache=not args.no_cache, cache_max_age_days=args.cache_max_age or None)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+classifier_onnx.py - ONNX Runtime backend for the zero-shot classifier
+
+Ingest hosts without a GPU run mDeBERTa in full-precision PyTorch, which is
+slow and memory-hungry. This module exports the classifier to ONNX once,
+applies dynamic int8 quantization to its weights, and wraps the resulting
+onnxruntime session so classifier_03.classify_texts can call it exactly like
+the PyTorch model. Select it with load_model(backend="onnx"),
+`classifier_03.py --backend onnx` or CLASSIFIER_BACKEND=onnx.
+
+Needs the optional packages `onnx` (export only) and `onnxruntime`.
+
+Usage:
+    # Export and quantize ahead of time (otherwise done on first use)
+    python scripts/classifier_onnx.py
+
+    # Compare against PyTorch on the corpus
+    python scripts/bench_classifier.py
+"""
+
+import os
+import argparse
+from types import SimpleNamespace
+from typing import Optional
+
+import torch
+from transformers import AutoTokenizer
+
+ONNX_MODEL_DIR = os.getenv("CLASSIFIER_ONNX_DIR", "./models/onnx")
+ONNX_OPSET = 14
+
+
+def onnx_model_dir(model_name: str) -> str:
+    return os.path.join(ONNX_MODEL_DIR, model_name.replace("/", "__"))
+
+
+def onnx_model_path(model_name: str, quantized: bool = True) -> str:
+    return os.path.join(onnx_model_dir(model_name), "model.int8.onnx" if quantized else "model.onnx")
+
+
+def export_onnx(model_name: str, quantize: bool = True) -> str:
+    """
+    Export the Hugging Face model to ONNX (dynamic batch and sequence axes) next
+    to its tokenizer, and optionally write a dynamically int8-quantized copy.
+    Returns the path of the model to load.
+    """
+    from transformers import AutoModelForSequenceClassification
+
+    out_dir = onnx_model_dir(model_name)
+    os.makedirs(out_dir, exist_ok=True)
+    fp32_path = onnx_model_path(model_name, quantized=False)
+
+    print(f"Exporting {model_name} to ONNX: {fp32_path}")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer("Exam dates announced.", "This text contains temporal information.", return_tensors="pt")
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dict(sample),),
+            fp32_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+        )
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+
+    if not quantize:
+        return fp32_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = onnx_model_path(model_name, quantized=True)
+    print(f"Quantizing weights to int8: {int8_path}")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+class OnnxSequenceClassifier:
+    """
+    onnxruntime session with the call signature of a transformers sequence
+    classifier: model(**inputs).logits, taking and returning torch tensors.
+    """
+
+    def __init__(self, model_path: str, threads: Optional[int] = None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {item.name for item in self.session.get_inputs()}
+
+    def __call__(self, **inputs):
+        feed = {name: tensor.cpu().numpy() for name, tensor in inputs.items() if name in self.input_names}
+        logits = self.session.run(["logits"], feed)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+    def eval(self):
+        return self
+
+
+def load_onnx_model(model_name: str, quantized: bool = True, threads: Optional[int] = None):
+    """Return (model, tokenizer, device) for the ONNX backend, exporting the model on first use."""
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        raise ImportError("The ONNX classifier backend needs onnxruntime: pip install onnx onnxruntime")
+
+    model_path = onnx_model_path(model_name, quantized)
+    if not os.path.exists(model_path):
+        model_path = export_onnx(model_name, quantize=quantized)
+
+    tokenizer = AutoTokenizer.from_pretrained(onnx_model_dir(model_name))
+    model = OnnxSequenceClassifier(model_path, threads)
+    print(f"Model loaded with ONNX Runtime: {model_path}")
+    return model, tokenizer, torch.device("cpu")
+
+
+if __name__ == "__main__":
+    from classifier_03 import DEFAULT_MODEL
+
+    parser = argparse.ArgumentParser(description="Export the zero-shot classifier to (int8) ONNX")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Hugging Face model name")
+    parser.add_argument("--no-quantize", action="store_true", help="Keep fp32 weights")
+    args = parser.parse_args()
+
+    print(f"Saved: {export_onnx(args.model, quantize=not args.no_quantize)}")
@@ -0,0 +1,519 @@
+"""
+corpus.py - Sharded corpus of extracted documents
+
+The corpus is the canonical store of extracted text: a few JSONL shards under
+processed_data/corpus/, one document per line, with an offset index.
+Extraction writes new and changed outputs as loose .txt files, build_corpus
+merges them into the corpus and deletes them (unless asked to keep them), so
+each document's text is on disk once. Only the shards holding removed or
+changed documents are rewritten; new documents are appended. HTML pages also
+carry their unstripped text, which boilerplate.py stages in html/.raw/ only
+until it is packed. The classifier and curation iterate the
+corpus instead of listing, stat-ing and opening thousands of small files, and
+the classifier stores its labels in the index rather than copying every
+document into classified_data/.
+
+Shards are read through mmap: iterating the corpus walks each shard once in
+order, and CorpusReader.get() jumps straight to a document's byte range.
+
+Layout:
+    corpus/shard-00000.jsonl   {"id", "text", "page_offsets"[, "raw_text"]} per line
+    corpus/index.json          {"version", "shards", "documents": [{"id", "shard", "offset", "length",
+                                "category", "source", "url", "sha256", "text_hash", "duplicate_of",
+                                "output_size", "output_mtime", "labels"}]}
+Ids are output paths relative to processed_data, e.g. "pdf/notice.txt".
+page_offsets are the character offsets at which each "#"-separated block of
+the text starts (the pages of a PDF that produced text). raw_text is null
+when the unstripped text equals the text, and absent when none was kept.
+"""
+
+import os
+import re
+import json
+import mmap
+import shutil
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from boilerplate import RAW_DIRNAME
+
+CORPUS_DIRNAME = "corpus"
+INDEX_NAME = "index.json"
+INDEX_VERSION = 1
+SHARD_TEMPLATE = "shard-{:05d}.jsonl"
+DEFAULT_SHARD_BYTES = 64 * 1024 * 1024
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def page_offsets(text: str) -> List[int]:
+    """Character offsets of the blocks that "#" marker lines separate."""
+    offsets = []
+    position = 0
+    at_block_start = True
+    for line in text.split("\n"):
+        if line.strip() == "#":
+            at_block_start = True
+        elif at_block_start:
+            offsets.append(position)
+            at_block_start = False
+        position += len(line) + 1
+    return offsets
+
+
+def _record_bytes(doc_id: str, text: str, raw_text: Optional[str] = None) -> bytes:
+    record = {"id": doc_id, "text": text, "page_offsets": page_offsets(text)}
+    if raw_text is not None:
+        record["raw_text"] = None if raw_text == text else raw_text
+    return json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _shard_number(name: str) -> int:
+    return int(re.search(r"\d+", name).group(0))
+
+
+def output_id(processed_dir: str, output_path: str) -> str:
+    """Corpus id of an extraction output path."""
+    return os.path.relpath(output_path, processed_dir).replace(os.sep, "/")
+
+
+def load_index(corpus_dir: str) -> Optional[Dict]:
+    """Return the corpus index, or None if there is no (readable) corpus."""
+    path = os.path.join(corpus_dir, INDEX_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        return index if index.get("version") == INDEX_VERSION else None
+    except Exception as e:
+        print(f"⚠️  Could not read corpus index {path}: {e}")
+        return None
+
+
+def _write_index(corpus_dir: str, index: Dict) -> None:
+    tmp_path = os.path.join(corpus_dir, INDEX_NAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(corpus_dir, INDEX_NAME))
+
+
+class CorpusWriter:
+    """
+    Appends documents to JSONL shards, starting a new shard after `shard_bytes`.
+
+    Args:
+        corpus_dir: directory to create the shards and index in
+        shard_bytes: target shard size
+    """
+
+    def __init__(self, corpus_dir: str, shard_bytes: int = DEFAULT_SHARD_BYTES):
+        self.corpus_dir = corpus_dir
+        self.shard_bytes = shard_bytes
+        self.shards: List[str] = []
+        self.documents: List[Dict] = []
+        self._file = None
+        self._offset = 0
+        os.makedirs(corpus_dir, exist_ok=True)
+
+    def _next_shard(self) -> None:
+        if self._file:
+            self._file.close()
+        name = SHARD_TEMPLATE.format(len(self.shards))
+        self.shards.append(name)
+        self._file = open(os.path.join(self.corpus_dir, name), "wb")
+        self._offset = 0
+
+    def add(self, doc_id: str, text: str, metadata: Dict, raw_text: Optional[str] = None) -> None:
+        """Append a document; metadata goes to the index entry."""
+        data = _record_bytes(doc_id, text, raw_text)
+        if self._file is None or (self._offset and self._offset + len(data) > self.shard_bytes):
+            self._next_shard()
+        self._file.write(data)
+        self.documents.append(
+            {
+                "id": doc_id,
+                "shard": len(self.shards) - 1,
+                "offset": self._offset,
+                "length": len(data),
+                "text_hash": text_hash(text),
+                **metadata,
+            }
+        )
+        self._offset += len(data)
+
+    def close(self) -> None:
+        """Close the last shard and write the index."""
+        if self._file:
+            self._file.close()
+            self._file = None
+        _write_index(self.corpus_dir, {"version": INDEX_VERSION, "shards": self.shards, "documents": self.documents})
+
+
+class CorpusReader:
+    """
+    Memory-mapped access to a corpus written by CorpusWriter.
+
+    Iterating yields each document as its index entry plus "text" and
+    "page_offsets", shard by shard in write order.
+    """
+
+    def __init__(self, corpus_dir: str):
+        self.corpus_dir = corpus_dir
+        index = load_index(corpus_dir)
+        if index is None:
+            raise FileNotFoundError(f"No corpus index in {corpus_dir}")
+        self.index = index
+        self.shards = index["shards"]
+        self.documents = index["documents"]
+        self._by_id = {entry["id"]: entry for entry in self.documents}
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._files = []
+
+    @classmethod
+    def exists(cls, corpus_dir: str) -> bool:
+        return os.path.exists(os.path.join(corpus_dir, INDEX_NAME))
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._by_id
+
+    def _map(self, shard: int) -> mmap.mmap:
+        if shard not in self._maps:
+            f = open(os.path.join(self.corpus_dir, self.shards[shard]), "rb")
+            self._files.append(f)
+            self._maps[shard] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._maps[shard]
+
+    def _record_bytes(self, entry: Dict) -> bytes:
+        return self._map(entry["shard"])[entry["offset"] : entry["offset"] + entry["length"]]
+
+    def _load(self, entry: Dict) -> Dict:
+        record = json.loads(self._record_bytes(entry))
+        return {**entry, "text": record["text"], "page_offsets": record["page_offsets"]}
+
+    def get(self, doc_id: str) -> Dict:
+        """Read one document by id."""
+        return self._load(self._by_id[doc_id])
+
+    def raw_text(self, doc_id: str) -> Optional[str]:
+        """Unstripped text of an HTML page, or None if the corpus kept none for it."""
+        record = json.loads(self._record_bytes(self._by_id[doc_id]))
+        if "raw_text" not in record:
+            return None
+        return record["text"] if record["raw_text"] is None else record["raw_text"]
+
+    def __iter__(self) -> Iterator[Dict]:
+        for entry in sorted(self.documents, key=lambda e: (e["shard"], e["offset"])):
+            yield self._load(entry)
+
+    def iter_entries(self) -> Iterator[Dict]:
+        """Index entries only, without reading any text."""
+        return iter(self.documents)
+
+    def set_labels(self, labels: Dict[str, Dict]) -> None:
+        """Store labels ({id: labels}) in the index; documents not listed lose theirs."""
+        for entry in self.documents:
+            entry["labels"] = labels.get(entry["id"])
+        _write_index(self.corpus_dir, self.index)
+
+    def set_duplicates(self, duplicates: Dict[str, str]) -> None:
+        """Store near-duplicate links ({id: representative id}) in the index."""
+        for entry in self.documents:
+            entry["duplicate_of"] = duplicates.get(entry["id"])
+        _write_index(self.corpus_dir, self.index)
+
+    def close(self) -> None:
+        for mapped in self._maps.values():
+            mapped.close()
+        for f in self._files:
+            f.close()
+        self._maps = {}
+        self._files = []
+
+
+def _document_urls(data_dir: str) -> Dict[str, List[str]]:
+    """{sha256: urls} from the crawler's document store manifest."""
+    path = os.path.join(data_dir, "manifest.json")
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            files = json.load(f).get("files", {})
+        return {sha256: entry.get("urls", []) for sha256, entry in files.items()}
+    except Exception as e:
+        print(f"⚠️  Could not read document manifest {path}: {e}")
+        return {}
+
+
+def _raw_path(output_path: str) -> str:
+    """Staged unstripped copy of an output (see boilerplate.py)."""
+    return os.path.join(os.path.dirname(output_path), RAW_DIRNAME, os.path.basename(output_path))
+
+
+def _read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def build_corpus(
+    processed_dir: str,
+    categories: Iterable[str],
+    sources: Dict[str, Dict],
+    data_dir: str = "data",
+    keep_outputs: bool = False,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+) -> Dict:
+    """
+    Merge the loose processed_dir/{category}/*.txt outputs into processed_dir/corpus/.
+
+    sources is the extraction manifest ({source path: {"sha256", "output", ...}})
+    and supplies each document's source file and hash; source URLs come from the
+    document store manifest in data_dir. Loose outputs with no source in the
+    manifest are skipped and reported. Documents already packed stay while
+    their source is in the manifest; a loose output replaces the packed text of
+    the same id, together with its staged raw text if there is one. Labels of
+    documents whose text is unchanged are carried over. Packed loose outputs are
+    deleted unless keep_outputs; staged raw copies always are. The corpus is left
+    alone when nothing was added, removed or modified.
+    Returns {"documents", "changed", "added", "updated", "removed", "shards_rewritten"}.
+    """
+    corpus_dir = os.path.join(processed_dir, CORPUS_DIRNAME)
+    categories = list(categories)
+
+    loose = {}
+    for category in categories:
+        category_dir = os.path.join(processed_dir, category)
+        if not os.path.isdir(category_dir):
+            continue
+        with os.scandir(category_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".txt"):
+                    st = entry.stat()
+                    loose[f"{category}/{entry.name}"] = (category, entry.path, st.st_size, st.st_mtime)
+
+    by_id = {}
+    for path, entry in sources.items():
+        doc_id = output_id(processed_dir, entry["output"])
+        if doc_id.split("/", 1)[0] in categories:
+            by_id[doc_id] = (path, entry)
+
+    # Left by a failed or interrupted extraction: no source to attribute them to
+    orphans = sorted(doc_id for doc_id in loose if doc_id not in by_id)
+    if orphans:
+        print(f"⚠️  Skipping {len(orphans)} outputs with no source in the extraction manifest, e.g. {orphans[0]}")
+        for doc_id in orphans:
+            del loose[doc_id]
+
+    previous = CorpusReader(corpus_dir) if CorpusReader.exists(corpus_dir) else None
+    previous_entries = {entry["id"]: entry for entry in previous.documents} if previous else {}
+    packed = {doc_id for doc_id in previous_entries if doc_id in by_id and doc_id not in loose}
+    doc_ids = sorted(packed | set(loose))
+
+    changed_loose = [
+        doc_id
+        for doc_id, (_, _, size, mtime) in loose.items()
+        if doc_id not in previous_entries
+        or previous_entries[doc_id]["output_size"] != size
+        or previous_entries[doc_id]["output_mtime"] != mtime
+    ]
+    unchanged = {"documents": len(doc_ids), "changed": False, "added": 0, "updated": 0, "removed": 0}
+    if previous is not None and not changed_loose and set(doc_ids) == set(previous_entries):
+        previous.close()
+        _remove_outputs(loose, keep_outputs)
+        return {**unchanged, "shards_rewritten": 0}
+
+    urls = _document_urls(data_dir)
+
+    def source_fields(doc_id: str) -> Dict:
+        source, source_entry = by_id.get(doc_id, (None, {}))
+        sha256 = source_entry.get("sha256")
+        return {"source": source, "url": (urls.get(sha256) or [None])[0], "sha256": sha256}
+
+    def read_loose(doc_id: str, old: Optional[Dict]) -> tuple:
+        """(text, raw text, index metadata) of a loose output."""
+        category, path, size, mtime = loose[doc_id]
+        text = _read_text(path)
+        raw_path = _raw_path(path)
+        if os.path.exists(raw_path):
+            raw_text = _read_text(raw_path)
+        else:
+            raw_text = previous.raw_text(doc_id) if old is not None else None
+        metadata = {
+            "category": category,
+            **source_fields(doc_id),
+            "duplicate_of": old.get("duplicate_of") if old else None,
+            "output_size": size,
+            "output_mtime": mtime,
+            "labels": old.get("labels") if old and old["text_hash"] == text_hash(text) else None,
+        }
+        return text, raw_text, metadata
+
+    if previous is None:
+        stats = _write_corpus(corpus_dir, doc_ids, read_loose, shard_bytes)
+    else:
+        stats = _update_corpus(corpus_dir, previous, doc_ids, changed_loose, read_loose, source_fields, shard_bytes)
+    _remove_outputs(loose, keep_outputs)
+    return {**unchanged, "changed": True, **stats}
+
+
+def _write_corpus(corpus_dir: str, doc_ids: List[str], read_loose, shard_bytes: int) -> Dict:
+    """First build: pack every document next to the (absent) corpus and swap it in."""
+    tmp_dir = corpus_dir + ".tmp"
+    if os.path.isdir(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    writer = CorpusWriter(tmp_dir, shard_bytes)
+    for doc_id in doc_ids:
+        text, raw_text, metadata = read_loose(doc_id, None)
+        writer.add(doc_id, text, metadata, raw_text)
+    writer.close()
+    if os.path.isdir(corpus_dir):
+        shutil.rmtree(corpus_dir)
+    os.replace(tmp_dir, corpus_dir)
+    return {"added": len(doc_ids), "shards_rewritten": len(writer.shards)}
+
+
+def _update_corpus(
+    corpus_dir: str,
+    previous: CorpusReader,
+    doc_ids: List[str],
+    changed: List[str],
+    read_loose,
+    source_fields,
+    shard_bytes: int,
+) -> Dict:
+    """
+    Apply changes to the live corpus shard by shard. A shard holding a removed
+    or changed document is copied to a new file with those records dropped or
+    replaced; new documents are appended to the last shard, or to new shards
+    past shard_bytes. The index is swapped in before replaced shards are
+    deleted, so readers never see a half-written corpus. Other shards are
+    neither read nor written.
+    """
+    # Shard files missing from the index were left by an interrupted update
+    for name in os.listdir(corpus_dir):
+        if name.endswith(".jsonl") and name not in previous.shards:
+            os.remove(os.path.join(corpus_dir, name))
+
+    live = set(doc_ids)
+    old_entries = {entry["id"]: entry for entry in previous.documents}
+    removed = [doc_id for doc_id in old_entries if doc_id not in live]
+    updated = {doc_id for doc_id in changed if doc_id in old_entries}
+    added = sorted(doc_id for doc_id in changed if doc_id not in old_entries)
+    affected = sorted({old_entries[doc_id]["shard"] for doc_id in removed + sorted(updated)})
+
+    # Entries carry their shard by name until the final shard list is known
+    entries = {
+        doc_id: {**entry, **source_fields(doc_id), "shard": previous.shards[entry["shard"]]}
+        for doc_id, entry in old_entries.items()
+        if doc_id in live
+    }
+    shard_names = list(previous.shards)
+    next_number = max((_shard_number(name) for name in shard_names), default=-1) + 1
+
+    def new_entry(doc_id: str, shard: str, offset: int, data: bytes, text: str, metadata: Dict) -> Dict:
+        entry = {"id": doc_id, "shard": shard, "offset": offset, "length": len(data)}
+        return {**entry, "text_hash": text_hash(text), **metadata}
+
+    for position in affected:
+        old_name = shard_names[position]
+        members = sorted(
+            (entry for entry in previous.documents if entry["shard"] == position and entry["id"] in live),
+            key=lambda entry: entry["offset"],
+        )
+        if not members:
+            shard_names[position] = None
+            continue
+        name = SHARD_TEMPLATE.format(next_number)
+        next_number += 1
+        with open(os.path.join(corpus_dir, name), "wb") as f:
+            offset = 0
+            for old in members:
+                doc_id = old["id"]
+                if doc_id in updated:
+                    text, raw_text, metadata = read_loose(doc_id, old)
+                    data = _record_bytes(doc_id, text, raw_text)
+                    entries[doc_id] = new_entry(doc_id, name, offset, data, text, metadata)
+                else:
+                    data = previous._record_bytes(old)
+                    entries[doc_id].update(shard=name, offset=offset)
+                f.write(data)
+                offset += len(data)
+            f.flush()
+            os.fsync(f.fileno())
+        shard_names[position] = name
+
+    if added:
+        shard_names, next_number = _append_documents(
+            corpus_dir, shard_names, next_number, entries, added, read_loose, new_entry, shard_bytes
+        )
+
+    replaced = [name for name in previous.shards if name not in shard_names]
+    shard_names = [name for name in shard_names if name is not None]
+    positions = {name: i for i, name in enumerate(shard_names)}
+    documents = [{**entries[doc_id], "shard": positions[entries[doc_id]["shard"]]} for doc_id in doc_ids]
+    _write_index(corpus_dir, {"version": INDEX_VERSION, "shards": shard_names, "documents": documents})
+
+    previous.close()
+    for name in replaced:
+        os.remove(os.path.join(corpus_dir, name))
+    return {"added": len(added), "updated": len(updated), "removed": len(removed), "shards_rewritten": len(affected)}
+
+
+def _append_documents(corpus_dir, shard_names, next_number, entries, added, read_loose, new_entry, shard_bytes):
+    """Append new documents after the last shard's indexed records, starting new shards as they fill."""
+    name = next((name for name in reversed(shard_names) if name is not None), None)
+    f = None
+    offset = 0
+    if name is not None:
+        offset = max((e["offset"] + e["length"] for e in entries.values() if e["shard"] == name), default=0)
+        f = open(os.path.join(corpus_dir, name), "r+b")
+        # Bytes past the indexed records are from an interrupted append
+        f.truncate(offset)
+        f.seek(offset)
+    try:
+        for doc_id in added:
+            text, raw_text, metadata = read_loose(doc_id, None)
+            data = _record_bytes(doc_id, text, raw_text)
+            if f is None or (offset and offset + len(data) > shard_bytes):
+                if f is not None:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    f.close()
+                name = SHARD_TEMPLATE.format(next_number)
+                next_number += 1
+                shard_names.append(name)
+                f = open(os.path.join(corpus_dir, name), "wb")
+                offset = 0
+            f.write(data)
+            entries[doc_id] = new_entry(doc_id, name, offset, data, text, metadata)
+            offset += len(data)
+        f.flush()
+        os.fsync(f.fileno())
+    finally:
+        if f is not None:
+            f.close()
+    return shard_names, next_number
+
+
+def _remove_outputs(loose: Dict[str, tuple], keep_outputs: bool) -> None:
+    """Delete the staged raw copies of packed outputs, and the outputs themselves unless keep_outputs."""
+    raw_dirs = set()
+    for _, path, _, _ in loose.values():
+        raw_path = _raw_path(path)
+        paths = [raw_path] if keep_outputs else [raw_path, path]
+        raw_dirs.add(os.path.dirname(raw_path))
+        for remove_path in paths:
+            try:
+                os.remove(remove_path)
+            except OSError:
+                pass
+    for raw_dir in raw_dirs:
+        try:
+            os.rmdir(raw_dir)  # only once empty
+        except OSError:
+            pass
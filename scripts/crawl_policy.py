@@ -0,0 +1,225 @@
+"""
+crawl_policy.py - Request prioritisation, path budgets and trap detection
+
+SitemapSpider asks CrawlPolicy two things about every discovered link:
+whether it should be scheduled at all (per-path budgets, crawler traps)
+and with which priority (URL keywords, file category, freshness, depth).
+Scrapy's scheduler then fetches high-value pages - notices, admissions,
+PDFs - before calendars, galleries and faceted listings.
+"""
+
+import os
+import re
+import json
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qsl
+
+from crawl_state import ScalableBloomFilter
+
+
+
+def url_words(*words: str) -> "re.Pattern":
+    """
+    Match any of words as a whole word of a URL: bounded by /, -, _, ., ?, &, =,
+    digits or the ends, so "event" does not fire inside "prevent" nor "fee" in "feedback".
+    """
+    return re.compile(r"(?<![a-z])(?:" + "|".join(words) + r")(?![a-z])")
+
+
+# Keyword patterns matched against the lower-cased URL path + query
+HIGH_VALUE_PATTERNS = [
+    (url_words(r"notices?", r"notice-?boards?", r"announcements?", r"circulars?", r"news"), 30),
+    (url_words(r"admissions?", r"prospectus", r"fees?", r"scholarships?", r"hostels?"), 30),
+    (
+        url_words(r"exams?", r"examinations?", r"results?", r"date-?sheets?", r"time-?tables?", r"syllabus", r"syllabi"),
+        25,
+    ),
+    (url_words(r"tenders?", r"recruitments?", r"vacanc(?:y|ies)", r"careers?"), 20),
+    (url_words(r"departments?", r"schools?", r"facult(?:y|ies)", r"programmes?", r"courses?"), 10),
+]
+LOW_VALUE_PATTERNS = [
+    (url_words(r"calendars?", r"events?"), -20),
+    (url_words(r"galler(?:y|ies)", r"photos?", r"videos?", r"albums?"), -25),
+    (url_words(r"print", r"share", r"login", r"users?", r"styleswitcher", r"screen-reader"), -30),
+    (re.compile(r"(^|[?&])(page|sort|order|field_[a-z_]+)="), -15),
+]
+
+CATEGORY_PRIORITY = {"pdf": 40, "docs": 30, "html": 10}
+
+# Per first-path-segment request budgets; anything not listed gets DEFAULT_PATH_BUDGET
+PATH_BUDGETS = {
+    "/calendar": 50,
+    "/events": 200,
+    "/gallery": 50,
+    "/photo-gallery": 50,
+    "/user": 10,
+    "/sites": 5000,  # uploaded PDFs and documents live under /sites/default/files
+}
+DEFAULT_PATH_BUDGET = 1000
+
+MAX_PATH_DEPTH = 10
+MAX_SEGMENT_REPEATS = 3
+MAX_QUERY_PARAMS = 5
+MAX_QUERY_VARIANTS = 50  # distinct query strings allowed per path
+
+# Budget and trap bookkeeping saved to JOBDIR, so a resumed crawl keeps its counts
+POLICY_STATE_FILE = "policy_state.json"
+POLICY_SCHEDULED_FILE = "policy_scheduled.bloom"
+
+_YEAR_RE = re.compile(r"(?<!\d)(19|20)\d{2}(?!\d)")
+# Calendar views are recognised by a whole path segment or a query key, never a substring:
+# /calendar/2031/01, /events/2040, ?month=2031-01, ?date=1999-12-01 are calendars, while
+# /update/2012/notice.pdf, /files/2014-07/candidates_list.pdf, /validate?id=1 and
+# /yearly-report-2009 are not.
+_CALENDAR_RE = re.compile(r"(^|/)(calendar|events?)(/|$)|(^|[?&])(calendar|events?|month|year|date)=")
+# Uploaded files are archival documents; their URL dates are real, not calendar pagination
+FILE_PATH_PREFIXES = ("/sites/default/files/",)
+FILE_EXTENSIONS = (".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".txt")
+
+
+def path_prefix(path: str) -> str:
+    segments = [seg for seg in path.split("/") if seg]
+    return "/" + segments[0].lower() if segments else "/"
+
+
+def has_repeating_segments(segments: list) -> bool:
+    """True for paths like /a/b/a/b or /en/en, or any segment repeated MAX_SEGMENT_REPEATS times."""
+    if any(count >= MAX_SEGMENT_REPEATS for count in Counter(segments).values()):
+        return True
+    for length in range(1, len(segments) // 2 + 1):
+        for i in range(len(segments) - 2 * length + 1):
+            if segments[i : i + length] == segments[i + length : i + 2 * length]:
+                return True
+    return False
+
+
+class CrawlPolicy:
+    """
+    Decides which discovered URLs are scheduled and with what priority.
+
+    Args:
+        path_budgets: max scheduled requests per path prefix (e.g. {"/calendar": 50})
+        default_budget: budget for prefixes not listed in path_budgets
+        max_query_variants: distinct query strings allowed per path before it is treated as a trap
+    """
+
+    def __init__(
+        self,
+        path_budgets: Optional[Dict[str, int]] = None,
+        default_budget: int = DEFAULT_PATH_BUDGET,
+        max_query_variants: int = MAX_QUERY_VARIANTS,
+    ):
+        self.path_budgets = PATH_BUDGETS if path_budgets is None else path_budgets
+        self.default_budget = default_budget
+        self.max_query_variants = max_query_variants
+        self.scheduled = ScalableBloomFilter()
+        self.prefix_counts = Counter()
+        self.query_variants = defaultdict(int)
+        self.current_year = datetime.now(timezone.utc).year
+
+    def save(self, jobdir: str) -> None:
+        """Persist the scheduled-URL filter, path budget counts and query variant counts."""
+        os.makedirs(jobdir, exist_ok=True)
+        self.scheduled.save(os.path.join(jobdir, POLICY_SCHEDULED_FILE))
+        path = os.path.join(jobdir, POLICY_STATE_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"prefix_counts": self.prefix_counts, "query_variants": self.query_variants}, f)
+        os.replace(tmp_path, path)
+
+    def restore(self, jobdir: str) -> bool:
+        """Load what save() left in jobdir; returns False (state unchanged) when there is nothing to resume."""
+        path = os.path.join(jobdir, POLICY_STATE_FILE)
+        if not os.path.exists(path):
+            return False
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        self.scheduled = ScalableBloomFilter.load(os.path.join(jobdir, POLICY_SCHEDULED_FILE))
+        self.prefix_counts = Counter(state.get("prefix_counts", {}))
+        self.query_variants = defaultdict(int, state.get("query_variants", {}))
+        return True
+
+    @staticmethod
+    def discard(jobdir: str) -> None:
+        """Remove saved state once a crawl finishes, so the next crawl starts with fresh budgets."""
+        for name in (POLICY_STATE_FILE, POLICY_SCHEDULED_FILE):
+            path = os.path.join(jobdir, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def trap_reason(self, url: str) -> Optional[str]:
+        """Return why a URL looks like a crawler trap, or None."""
+        parsed = urlparse(url)
+        segments = [seg for seg in parsed.path.split("/") if seg]
+
+        if len(segments) > MAX_PATH_DEPTH:
+            return "path_depth"
+        if has_repeating_segments(segments):
+            return "repeating_segments"
+
+        params = parse_qsl(parsed.query, keep_blank_values=True)
+        if len(params) > MAX_QUERY_PARAMS:
+            return "query_params"
+
+        # Calendars link to every month forever; stay within a few years of today
+        path = parsed.path.lower()
+        is_file = path.startswith(FILE_PATH_PREFIXES) or path.endswith(FILE_EXTENSIONS)
+        target = parsed.path + "?" + parsed.query
+        if not is_file and _CALENDAR_RE.search(target.lower()):
+            for match in _YEAR_RE.finditer(target):
+                year = int(match.group(0))
+                if year > self.current_year + 1 or year < self.current_year - 10:
+                    return "calendar_year"
+
+        return None
+
+    def admit(self, url: str) -> Optional[str]:
+        """
+        Register a URL for scheduling.
+        Returns None when it should be scheduled, otherwise the reason it was dropped.
+        """
+        if not self.scheduled.add(url):
+            return "duplicate"
+
+        reason = self.trap_reason(url)
+        if reason:
+            return reason
+
+        parsed = urlparse(url)
+        if parsed.query:
+            self.query_variants[parsed.path] += 1
+            if self.query_variants[parsed.path] > self.max_query_variants:
+                return "query_variants"
+
+        prefix = path_prefix(parsed.path)
+        budget = self.path_budgets.get(prefix, self.default_budget)
+        if self.prefix_counts[prefix] >= budget:
+            return "path_budget"
+        self.prefix_counts[prefix] += 1
+        return None
+
+    def priority(self, url: str, category: Optional[str], depth: int = 0, last_fetched: Optional[str] = None) -> int:
+        """Score a URL; higher runs earlier in Scrapy's priority queue."""
+        parsed = urlparse(url)
+        target = (parsed.path + "?" + parsed.query).lower()
+
+        score = CATEGORY_PRIORITY.get(category, 0)
+        for pattern, weight in HIGH_VALUE_PATTERNS + LOW_VALUE_PATTERNS:
+            if pattern.search(target):
+                score += weight
+
+        # Freshness: never-seen URLs first, then the ones fetched longest ago
+        if last_fetched is None:
+            score += 10
+        else:
+            try:
+                age_days = (datetime.now(timezone.utc) - datetime.fromisoformat(last_fetched)).days
+                score += min(age_days, 10)
+            except ValueError:
+                pass
+
+        score -= 5 * depth
+        # Coarse buckets keep the number of per-priority disk queues in JOBDIR small
+        return int(round(score / 5.0) * 5)
@@ -0,0 +1,237 @@
+"""
+crawl_state.py - Persistent crawl state for incremental re-crawls
+
+Stores per-URL validators (ETag, Last-Modified), a body hash and the
+outgoing links of every page seen by SitemapSpider, keyed by the
+normalized URL. The next crawl uses it to send conditional requests and
+to skip pages whose content did not change.
+
+Also provides the compact, persistable visited-URL filter used to resume
+an interrupted crawl where it stopped.
+"""
+
+import os
+import json
+import math
+import sqlite3
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+
+
+@dataclass
+class PageState:
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    body_hash: Optional[str] = None
+    links: List[str] = field(default_factory=list)
+    fetched_at: Optional[str] = None
+
+    def conditional_headers(self) -> dict:
+        """Build If-None-Match / If-Modified-Since headers from the stored validators."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def hash_body(body: bytes) -> str:
+    """Return the SHA-256 hex digest of a response body."""
+    return hashlib.sha256(body).hexdigest()
+
+
+class CrawlStateStore:
+    """
+    SQLite-backed map of normalized URL -> PageState.
+
+    Writes are committed every `commit_every` updates and on close(), so a
+    crash loses at most that many entries (they are simply re-fetched).
+    """
+
+    def __init__(self, db_path: str = "crawl_state.db", commit_every: int = 100):
+        self.db_path = db_path
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                links TEXT,
+                fetched_at TEXT
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get(self, url: str) -> Optional[PageState]:
+        row = self.conn.execute(
+            "SELECT url, etag, last_modified, body_hash, links, fetched_at FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return PageState(
+            url=row[0],
+            etag=row[1],
+            last_modified=row[2],
+            body_hash=row[3],
+            links=json.loads(row[4]) if row[4] else [],
+            fetched_at=row[5],
+        )
+
+    def update(self, state: PageState) -> None:
+        fetched_at = state.fetched_at or datetime.now(timezone.utc).isoformat()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages (url, etag, last_modified, body_hash, links, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (state.url, state.etag, state.last_modified, state.body_hash, json.dumps(state.links), fetched_at),
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+
+    def conditional_headers(self, url: str) -> dict:
+        """Build conditional request headers for a URL (empty if it was never fetched)."""
+        state = self.get(url)
+        return state.conditional_headers() if state else {}
+
+    def commit(self) -> None:
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def close(self) -> None:
+        self.commit()
+        self.conn.close()
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+    Sized for `capacity` items at the given false-positive rate.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def params(self) -> dict:
+        return {"capacity": self.capacity, "error_rate": self.error_rate, "count": self.count}
+
+    @classmethod
+    def from_saved(cls, params: dict, bits: np.ndarray) -> "BloomFilter":
+        """Rebuild a filter from params() and its bit array."""
+        bloom = cls(params["capacity"], params["error_rate"])
+        if bits.dtype != np.uint8 or bits.size != len(bloom.bits):
+            raise ValueError(f"bit array of {bits.size} bytes, expected {len(bloom.bits)}")
+        bloom.bits = bytearray(bits.tobytes())
+        bloom.count = params["count"]
+        return bloom
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def add(self, key: str) -> bool:
+        """Add a key; returns True if it was (probably) not present before."""
+        added = False
+        for pos in self._positions(key):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows without exceeding its false-positive rate.
+
+    When the current filter is full a new one with twice the capacity and half
+    the error rate is chained on, so the overall rate stays below `error_rate`
+    and memory grows by a few bytes per URL instead of a full string.
+    """
+
+    def __init__(self, initial_capacity: int = 100000, error_rate: float = 0.001):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.filters = [BloomFilter(initial_capacity, error_rate / 2)]
+
+    def __contains__(self, key: str) -> bool:
+        return any(key in f for f in self.filters)
+
+    def __len__(self) -> int:
+        return sum(f.count for f in self.filters)
+
+    def add(self, key: str) -> bool:
+        """Add a key; returns True if it was (probably) not present before."""
+        if key in self:
+            return False
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * 2, current.error_rate / 2)
+            self.filters.append(current)
+        current.add(key)
+        return True
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(f.bits) for f in self.filters)
+
+    def save(self, path: str) -> None:
+        """
+        Persist the filter atomically as an .npz archive: one uint8 bit array per
+        chained filter plus a JSON string of their parameters (no pickle).
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        params = {
+            "initial_capacity": self.initial_capacity,
+            "error_rate": self.error_rate,
+            "filters": [f.params() for f in self.filters],
+        }
+        arrays = {f"bits_{i}": np.frombuffer(f.bits, dtype=np.uint8) for i, f in enumerate(self.filters)}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, params=np.array(json.dumps(params)), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, initial_capacity: int = 100000, error_rate: float = 0.001) -> "ScalableBloomFilter":
+        """
+        Load a saved filter, or start an empty one if there is none.
+        Raises ValueError for an unreadable file; the caller decides whether to start over.
+        """
+        if not os.path.exists(path):
+            return cls(initial_capacity, error_rate)
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                params = json.loads(str(saved["params"]))
+                bloom = cls(params["initial_capacity"], params["error_rate"])
+                bloom.filters = [
+                    BloomFilter.from_saved(p, saved[f"bits_{i}"]) for i, p in enumerate(params["filters"])
+                ]
+        except Exception as e:
+            raise ValueError(f"Could not load Bloom filter {path}: {e}") from e
+        if not bloom.filters:
+            raise ValueError(f"Could not load Bloom filter {path}: no filters saved")
+        return bloom
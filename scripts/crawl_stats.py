@@ -0,0 +1,245 @@
+"""
+crawl_stats.py - Crawl metrics extension for SitemapSpider
+
+Records download latency, response sizes, status codes, Sarvam call
+latency/failures and file-save timings as histograms broken down by file
+category. While the crawl runs the metrics are exposed in Prometheus
+text format (HTTP endpoint and/or a textfile-collector file); when it
+closes a machine-readable JSON run report is written.
+
+Settings:
+    CRAWL_REPORT_FILE: JSON run report path, empty to disable (default crawl_report.json)
+    CRAWL_METRICS_FILE: Prometheus text file refreshed while running, empty to disable
+    CRAWL_METRICS_INTERVAL: seconds between metrics file refreshes (default 10)
+    CRAWL_METRICS_PORT: serve /metrics on this localhost port, 0 to disable (default 0)
+"""
+
+import os
+import json
+import time
+import bisect
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+from scrapy import signals
+
+# Custom signals sent by the spider and its pipelines
+sarvam_call = object()  # kwargs: latency (s), ok (bool)
+file_saved = object()  # kwargs: category, latency (s), size (bytes)
+
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+SIZE_BUCKETS = [1024, 10 * 1024, 100 * 1024, 1024**2, 10 * 1024**2, 50 * 1024**2]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + ["+Inf"], self.counts):
+            total += count
+            result.append((str(bound), total))
+        return result
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class CrawlMetrics:
+    """Scrapy extension collecting per-category crawl histograms."""
+
+    HISTOGRAMS = {
+        "download_latency_seconds": LATENCY_BUCKETS,
+        "response_size_bytes": SIZE_BUCKETS,
+        "sarvam_latency_seconds": LATENCY_BUCKETS,
+        "file_save_seconds": LATENCY_BUCKETS,
+    }
+
+    def __init__(self, crawler, report_file: str, metrics_file: str, interval: float, port: int):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.report_file = report_file
+        self.metrics_file = metrics_file
+        self.interval = interval
+        self.port = port
+        self.lock = threading.Lock()
+        # metric -> category -> Histogram
+        self.histograms = {name: {} for name in self.HISTOGRAMS}
+        self.status_codes = Counter()
+        self.sarvam_failures = 0
+        self.started_at = None
+        self.started = None
+        self.server = None
+        self.task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        ext = cls(
+            crawler,
+            report_file=settings.get("CRAWL_REPORT_FILE", "crawl_report.json"),
+            metrics_file=settings.get("CRAWL_METRICS_FILE", ""),
+            interval=settings.getfloat("CRAWL_METRICS_INTERVAL", 10.0),
+            port=settings.getint("CRAWL_METRICS_PORT", 0),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.sarvam_call, signal=sarvam_call)
+        crawler.signals.connect(ext.file_saved, signal=file_saved)
+        return ext
+
+    # ---------------- Recording ----------------
+
+    def observe(self, metric: str, category: str, value: float) -> None:
+        with self.lock:
+            per_category = self.histograms[metric]
+            if category not in per_category:
+                per_category[category] = Histogram(self.HISTOGRAMS[metric])
+            per_category[category].observe(value)
+
+    def response_received(self, response, request, spider):
+        category = request.meta.get("file_category") or "page"
+        with self.lock:
+            self.status_codes[response.status] += 1
+        latency = request.meta.get("download_latency")
+        if latency is not None:
+            self.observe("download_latency_seconds", category, latency)
+        self.observe("response_size_bytes", category, len(response.body))
+
+    def sarvam_call(self, latency: float, ok: bool):
+        self.observe("sarvam_latency_seconds", "page", latency)
+        if not ok:
+            with self.lock:
+                self.sarvam_failures += 1
+
+    def file_saved(self, category: str, latency: float, size: int = 0):
+        self.observe("file_save_seconds", category, latency)
+
+    # ---------------- Lifecycle ----------------
+
+    def spider_opened(self, spider):
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.monotonic()
+
+        if self.metrics_file:
+            from twisted.internet import task
+
+            self.task = task.LoopingCall(self.write_metrics_file)
+            self.task.start(self.interval, now=False)
+
+        if self.port:
+            self.server = start_metrics_server(self, self.port)
+            spider.logger.info(f"Crawl metrics at http://127.0.0.1:{self.port}/metrics")
+
+    def spider_closed(self, spider, reason):
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        if self.metrics_file:
+            self.write_metrics_file()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+
+        if self.report_file:
+            report = self.build_report(reason)
+            tmp_path = self.report_file + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self.report_file)
+            spider.logger.info(f"[✅] Crawl report saved as {self.report_file}")
+
+    # ---------------- Output ----------------
+
+    def build_report(self, reason: str) -> Dict:
+        with self.lock:
+            histograms = {
+                metric: {category: h.to_dict() for category, h in sorted(per_category.items())}
+                for metric, per_category in self.histograms.items()
+            }
+            status_codes = {str(code): count for code, count in sorted(self.status_codes.items())}
+            sarvam_failures = self.sarvam_failures
+
+        return {
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "elapsed_s": round(time.monotonic() - self.started, 3) if self.started else None,
+            "finish_reason": reason,
+            "status_codes": status_codes,
+            "sarvam_failures": sarvam_failures,
+            "histograms": histograms,
+            "scrapy_stats": self.stats.get_stats(),
+        }
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self.lock:
+            for metric, per_category in self.histograms.items():
+                name = f"curaj_crawl_{metric}"
+                lines.append(f"# TYPE {name} histogram")
+                for category, h in sorted(per_category.items()):
+                    for bound, count in h.cumulative():
+                        lines.append(f'{name}_bucket{{category="{category}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{category="{category}"}} {h.sum}')
+                    lines.append(f'{name}_count{{category="{category}"}} {h.count}')
+
+            lines.append("# TYPE curaj_crawl_responses_total counter")
+            for code, count in sorted(self.status_codes.items()):
+                lines.append(f'curaj_crawl_responses_total{{status="{code}"}} {count}')
+
+            lines.append("# TYPE curaj_crawl_sarvam_failures_total counter")
+            lines.append(f"curaj_crawl_sarvam_failures_total {self.sarvam_failures}")
+
+        items = self.stats.get_value("item_scraped_count", 0)
+        lines.append("# TYPE curaj_crawl_items_total counter")
+        lines.append(f"curaj_crawl_items_total {items}")
+        return "\n".join(lines) + "\n"
+
+    def write_metrics_file(self) -> None:
+        tmp_path = self.metrics_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, self.metrics_file)
+
+
+def start_metrics_server(metrics: CrawlMetrics, port: int) -> ThreadingHTTPServer:
+    """Serve metrics.render_prometheus() at http://127.0.0.1:<port>/metrics in a daemon thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -3,10 +3,13 @@
 llama_local.py - Create Weaviate Collections for Agent
 
 Creates three local Weaviate collections:
-1. 'static' - From classified_data/static/ (permanent info)
-2. 'dynamic' - From classified_data/dynamic/ (time-sensitive info)
+1. 'static' - Documents labelled static (permanent info)
+2. 'dynamic' - Documents labelled dynamic (time-sensitive info)
 3. 'sitemap' - From pages.jl (page summaries)
 
+Labelled documents are read from the processed_data/corpus shards when the
+classifier recorded labels there, otherwise from classified_data/{static,dynamic}/.
+
 Uses Ollama BGE-M3 embeddings to match agent.py configuration.
 """
 
@@ -14,7 +17,7 @@ import os
 import json
 import time
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Tuple
 
 import weaviate
 from dotenv import load_dotenv
@@ -27,6 +30,8 @@ from llama_index.embeddings.ollama import OllamaEmbedding
 # Weaviate v4 typed helpers
 from weaviate.classes.config import Configure, Property, DataType
 
+from corpus import CorpusReader
+
 load_dotenv()
 
 # ---------------- Config ----------------
@@ -36,6 +41,7 @@ BATCH_SIZE = 50
 
 # Data directories
 CLASSIFIED_DATA_DIR = "./classified_data"
+CORPUS_DIR = "./processed_data/corpus"
 SITEMAP_FILE = "./pages.jl"
 
 # Ollama settings (must match agent.py)
@@ -49,8 +55,51 @@ print(f"[INFO] Using Ollama BGE-M3 embeddings from: {OLLAMA_URL}")
 
 
 # ---------------- Helper Functions ----------------
+def load_corpus_documents(category: str) -> List[Document]:
+    """Load documents labelled `category` from the processed_data corpus"""
+    documents = []
+    corpus = CorpusReader(CORPUS_DIR)
+    try:
+        for entry in corpus.iter_entries():
+            labels = entry.get("labels")
+            if not labels or labels["category"] != category:
+                continue
+            text = corpus.get(entry["id"])["text"]
+            if not text.strip():
+                continue
+
+            # NOTE: Metadata structure prepared for future customization
+            doc = Document(
+                text=text,
+                metadata={
+                    "file_name": os.path.basename(entry["id"]),
+                    "category": category,
+                    "source_type": entry["category"],
+                    "url": entry.get("url") or "",
+                },
+            )
+            documents.append(doc)
+    finally:
+        corpus.close()
+
+    return documents
+
+
+def corpus_has_labels() -> bool:
+    """True when the classifier recorded its labels in the corpus index"""
+    if not CorpusReader.exists(CORPUS_DIR):
+        return False
+    corpus = CorpusReader(CORPUS_DIR)
+    labelled = any(entry.get("labels") for entry in corpus.iter_entries())
+    corpus.close()
+    return labelled
+
+
 def load_classified_documents(category: str) -> List[Document]:
-    """Load documents from classified_data/{category}/{pdf,docs,html}/"""
+    """Load documents from the corpus, or from classified_data/{category}/{pdf,docs,html}/"""
+    if corpus_has_labels():
+        return load_corpus_documents(category)
+
     documents = []
     category_path = Path(CLASSIFIED_DATA_DIR) / category
 
@@ -193,50 +242,42 @@ def chunk_documents(documents: List[Document]) -> List[Document]:
     return chunked_docs
 
 
-def embed_and_insert(client, collection_name: str, documents: List[Document]):
-    """Generate embeddings and insert documents into Weaviate collection"""
-    if not documents:
-        print(f"[WARN] No documents to insert for '{collection_name}'")
-        return
-
-    print(f"[INFO] Processing {len(documents)} documents for '{collection_name}'...")
-
-    # Chunk documents
+def embed_chunks(documents: List[Document]) -> Iterator[Tuple[Document, List[float]]]:
+    """Chunk documents and embed every chunk, yielding (chunk, embedding) pairs as they are computed"""
     chunked_docs = chunk_documents(documents)
     print(f"[INFO] Chunked into {len(chunked_docs)} nodes")
 
+    for idx, doc in enumerate(chunked_docs):
+        try:
+            yield doc, Settings.embed_model.get_text_embedding(doc.get_content())
+
+            if (idx + 1) % 10 == 0:
+                print(f"  Processed {idx + 1}/{len(chunked_docs)}...")
+
+        except Exception as e:
+            print(f"[ERROR] Failed to process document {idx}: {e}")
+
+
+def insert_embedded(client, collection_name: str, embedded: Iterable[Tuple[Document, List[float]]]):
+    """Insert already embedded chunks into Weaviate collection"""
     # Get collection
     coll = client.collections.get(collection_name)
 
-    # Process in batches
-    print(f"[INFO] Computing embeddings and inserting...")
-
     with coll.batch.dynamic() as batch:
-        for idx, doc in enumerate(chunked_docs):
-            try:
-                # Get embedding
-                text = doc.get_content()
-                embedding = Settings.embed_model.get_text_embedding(text)
-
-                # Prepare properties
-                properties = {
-                    TEXT_KEY: text,
-                    "file_name": doc.metadata.get("file_name", "unknown"),
-                    "category": doc.metadata.get("category", "unknown"),
-                    "source_type": doc.metadata.get("source_type", "unknown"),
-                    "url": doc.metadata.get("url", ""),
-                    "title": doc.metadata.get("title", ""),
-                    "fetched_at": doc.metadata.get("fetched_at", ""),
-                }
-
-                # Add object with vector
-                batch.add_object(properties=properties, vector=embedding)
-
-                if (idx + 1) % 10 == 0:
-                    print(f"  Processed {idx + 1}/{len(chunked_docs)}...")
-
-            except Exception as e:
-                print(f"[ERROR] Failed to process document {idx}: {e}")
+        for doc, embedding in embedded:
+            # Prepare properties
+            properties = {
+                TEXT_KEY: doc.get_content(),
+                "file_name": doc.metadata.get("file_name", "unknown"),
+                "category": doc.metadata.get("category", "unknown"),
+                "source_type": doc.metadata.get("source_type", "unknown"),
+                "url": doc.metadata.get("url", ""),
+                "title": doc.metadata.get("title", ""),
+                "fetched_at": doc.metadata.get("fetched_at", ""),
+            }
+
+            # Add object with vector
+            batch.add_object(properties=properties, vector=embedding)
 
     # Verify insertion
     time.sleep(0.5)
@@ -247,6 +288,17 @@ def embed_and_insert(client, collection_name: str, documents: List[Document]):
         print(f"[WARN] Could not verify count: {e}")
 
 
+def embed_and_insert(client, collection_name: str, documents: List[Document]):
+    """Generate embeddings and insert documents into Weaviate collection"""
+    if not documents:
+        print(f"[WARN] No documents to insert for '{collection_name}'")
+        return
+
+    print(f"[INFO] Processing {len(documents)} documents for '{collection_name}'...")
+    print(f"[INFO] Computing embeddings and inserting...")
+    insert_embedded(client, collection_name, embed_chunks(documents))
+
+
 # ---------------- Main ----------------
 def main():
     """Main function to create and populate Weaviate collections"""
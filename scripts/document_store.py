@@ -0,0 +1,189 @@
+"""
+document_store.py - Content-addressed storage for crawled documents
+
+Documents are streamed to a temporary file while they download, hashed on
+the fly, and then moved to data/{category}/ under a name that embeds the
+content hash. A JSON manifest maps every URL to its hash and every hash to
+the stored file, so the same document linked from several pages is kept
+once and later stages can tell which files they have already seen.
+
+When a URL's content changes, the URL moves to the new hash. A revision no
+URL points to any more is deleted, together with its HTML text sidecar, so
+extract_02 prunes its output and old text never reaches the classifier or
+Weaviate.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from html_text import sidecar_path
+
+
+class DocumentTooLarge(Exception):
+    """Raised when a streamed document exceeds the configured size cap."""
+
+
+class DocumentDownload:
+    """A document being streamed to disk: temp file plus running SHA-256 and size."""
+
+    def __init__(self, tmp_dir: str, max_bytes: Optional[int] = None):
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+        self._fh = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self.max_bytes = max_bytes
+
+    def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            self.discard()
+            raise DocumentTooLarge(f"document exceeds {self.max_bytes} bytes")
+        self._fh.write(data)
+        self._hash.update(data)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def finish(self) -> None:
+        if not self._fh.closed:
+            self._fh.close()
+
+    def discard(self) -> None:
+        self.finish()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class DocumentStore:
+    """
+    Content-addressed document store rooted at base_dir with a JSON manifest.
+
+    Manifest layout:
+        {"urls": {url: sha256}, "files": {sha256: {"path", "category", "size", "urls", "stored_at"}}}
+    """
+
+    def __init__(self, base_dir: str = "data", manifest_name: str = "manifest.json", max_bytes: Optional[int] = None):
+        self.base_dir = base_dir
+        self.max_bytes = max_bytes
+        self.manifest_path = os.path.join(base_dir, manifest_name)
+        self.tmp_dir = os.path.join(base_dir, ".incoming")
+        self.urls: Dict[str, str] = {}
+        self.files: Dict[str, Dict] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            self.urls = manifest.get("urls", {})
+            self.files = manifest.get("files", {})
+        except Exception as e:
+            print(f"⚠️  Could not read document manifest {self.manifest_path}: {e}")
+
+    def open_download(self) -> DocumentDownload:
+        return DocumentDownload(self.tmp_dir, self.max_bytes)
+
+    def lookup(self, sha256: str) -> Optional[str]:
+        """Return the stored path for a content hash, if the file is still on disk."""
+        entry = self.files.get(sha256)
+        if entry and os.path.exists(entry["path"]):
+            return entry["path"]
+        return None
+
+    def commit(self, download: DocumentDownload, url: str, category: str, file_name: str) -> Tuple[str, bool]:
+        """
+        Move a finished download into place.
+        Returns (path, is_new); is_new is False when identical content was already stored.
+        """
+        download.finish()
+        sha256 = download.hexdigest()
+        existing = self.lookup(sha256)
+        if existing:
+            download.discard()
+            self._record(url, sha256, existing, category, download.size)
+            return existing, False
+
+        path = self._target_path(category, file_name, sha256)
+        os.replace(download.tmp_path, path)
+        self._record(url, sha256, path, category, download.size)
+        return path, True
+
+    def store_bytes(self, body: bytes, url: str, category: str, file_name: str) -> Tuple[str, bool]:
+        """Store an in-memory body (e.g. an HTML page that was needed for parsing anyway)."""
+        download = self.open_download()
+        download.write(body)
+        return self.commit(download, url, category, file_name)
+
+    def _target_path(self, category: str, file_name: str, sha256: str) -> str:
+        category_dir = os.path.join(self.base_dir, category)
+        os.makedirs(category_dir, exist_ok=True)
+        stem, ext = os.path.splitext(file_name)
+        return os.path.join(category_dir, f"{stem}__{sha256[:12]}{ext}")
+
+    def _release(self, url: str, sha256: str) -> None:
+        """Detach url from an older revision; delete that revision once no URL serves it."""
+        entry = self.files.get(sha256)
+        if entry is None:
+            return
+        if url in entry["urls"]:
+            entry["urls"].remove(url)
+        if entry["urls"]:
+            return
+        # The HTML text sidecar written by the spider goes with its page
+        for path in (entry["path"], sidecar_path(entry["path"])):
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"⚠️  Could not remove superseded document {path}: {e}")
+                    return
+        del self.files[sha256]
+
+    def _record(self, url: str, sha256: str, path: str, category: str, size: int) -> None:
+        previous = self.urls.get(url)
+        if previous is not None and previous != sha256:
+            self._release(url, previous)
+        entry = self.files.setdefault(
+            sha256,
+            {
+                "path": path,
+                "category": category,
+                "size": size,
+                "urls": [],
+                "stored_at": datetime.now(timezone.utc).isoformat(),
+            },
+        )
+        entry["path"] = path
+        if url not in entry["urls"]:
+            entry["urls"].append(url)
+        self.urls[url] = sha256
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        if not self._dirty:
+            return
+        os.makedirs(self.base_dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"urls": self.urls, "files": self.files}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = False
+
+    def close(self) -> None:
+        self.save()
+        # Leftovers are partial downloads that failed or were cancelled
+        if os.path.isdir(self.tmp_dir):
+            for name in os.listdir(self.tmp_dir):
+                try:
+                    os.remove(os.path.join(self.tmp_dir, name))
+                except OSError:
+                    pass
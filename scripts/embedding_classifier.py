@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+embedding_classifier.py - Static/dynamic classifier on bge-m3 embeddings
+
+Every document the watch service ingests is chunked and embedded with bge-m3
+for Weaviate anyway. This classifier reuses those chunk vectors: their
+normalized mean goes through a logistic-regression head trained on the
+labels in classified_data.json, so a miscellaneous file costs no mDeBERTa
+load and no NLI forward pass.
+
+Training reads the chunk vectors curation_04 already stored in the static
+and dynamic Weaviate collections (nothing is re-embedded), fits the head on
+80% of the labelled documents and fits a temperature on the other 20%, so
+the reported confidence is calibrated and the 60% hybrid threshold in
+watch_06.classify_for_miscellaneous keeps its meaning.
+
+Usage:
+    # After curation_04 has populated Weaviate
+    python scripts/embedding_classifier.py
+
+    # Then run the watch service with it
+    WATCH_CLASSIFIER=embedding python scripts/watch_06.py
+"""
+
+import os
+import json
+import argparse
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from linear_head import NEGATIVE_LABEL, POSITIVE_LABEL, LogisticHead
+
+EMBEDDING_CLASSIFIER_PATH = os.getenv("EMBEDDING_CLASSIFIER_PATH", "./models/embedding_classifier.json")
+MIN_TRAINING_DOCS = 20
+
+
+def document_vector(vectors: Iterable[List[float]]) -> Optional[np.ndarray]:
+    """Mean of the L2-normalized chunk embeddings, normalized again; None without chunks."""
+    matrix = np.asarray(list(vectors), dtype=np.float32)
+    if matrix.size == 0:
+        return None
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    mean = matrix.mean(axis=0)
+    return mean / max(float(np.linalg.norm(mean)), 1e-12)
+
+
+class EmbeddingClassifier(LogisticHead):
+    """Calibrated logistic-regression head over document embeddings (see linear_head.py)."""
+
+    def save(self, path: str = EMBEDDING_CLASSIFIER_PATH) -> None:
+        super().save(path)
+
+    @classmethod
+    def load(cls, path: str = EMBEDDING_CLASSIFIER_PATH) -> Optional["EmbeddingClassifier"]:
+        return super().load(path)
+
+
+def load_labels(classified_json: str, min_confidence: float) -> Dict[str, int]:
+    """{file name: 1 for dynamic, 0 for static} from classified_data.json; conflicting names are dropped."""
+    with open(classified_json, "r", encoding="utf-8") as f:
+        results = json.load(f)
+
+    labels: Dict[str, int] = {}
+    conflicting = set()
+    for result in results:
+        if result.get("confidence", 0.0) < min_confidence:
+            continue
+        name = result["file"]
+        label = 1 if result["category"] == POSITIVE_LABEL else 0
+        if labels.get(name, label) != label:
+            conflicting.add(name)
+        labels[name] = label
+    for name in conflicting:
+        del labels[name]
+    return labels
+
+
+def load_weaviate_vectors(
+    client, collections: Iterable[str] = (NEGATIVE_LABEL, POSITIVE_LABEL)
+) -> Dict[str, np.ndarray]:
+    """Document vectors from the chunk vectors stored in Weaviate, grouped by file name."""
+    chunks: Dict[str, List] = {}
+    for collection_name in collections:
+        if not client.collections.exists(collection_name):
+            continue
+        coll = client.collections.get(collection_name)
+        for obj in coll.iterator(include_vector=True, return_properties=["file_name"]):
+            vector = obj.vector.get("default") if isinstance(obj.vector, dict) else obj.vector
+            if vector:
+                chunks.setdefault(obj.properties.get("file_name"), []).append(vector)
+    return {name: document_vector(vectors) for name, vectors in chunks.items() if name}
+
+
+def train(vectors: Dict[str, np.ndarray], labels: Dict[str, int]) -> EmbeddingClassifier:
+    names = sorted(name for name in labels if vectors.get(name) is not None)
+    if len(names) < MIN_TRAINING_DOCS:
+        raise ValueError(f"Only {len(names)} labelled documents have embeddings; need {MIN_TRAINING_DOCS}")
+
+    X = np.stack([vectors[name] for name in names]).astype(np.float64)
+    y = np.array([labels[name] for name in names], dtype=np.float64)
+    classifier, probs, _ = EmbeddingClassifier.fit_calibrated(X, y)
+    classifier.metrics["holdout_confident_share"] = round(float((np.maximum(probs, 1 - probs) >= 0.6).mean()), 4)
+    return classifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the bge-m3 embedding classifier from Weaviate vectors")
+    parser.add_argument("--labels", default="./classified_data.json", help="Classifier results to learn from")
+    parser.add_argument(
+        "--min-confidence", type=float, default=0.6, help="Ignore NLI labels below this confidence when training"
+    )
+    parser.add_argument("--output", default=EMBEDDING_CLASSIFIER_PATH, help="Where to save the trained head")
+    args = parser.parse_args()
+
+    import weaviate
+
+    labels = load_labels(args.labels, args.min_confidence)
+    print(f"Loaded {len(labels)} labelled documents from {args.labels}")
+
+    api_key = os.getenv("WEAVIATE_API_KEY")
+    auth_config = weaviate.auth.AuthApiKey(api_key=api_key) if api_key else None
+    client = weaviate.connect_to_local(host="localhost", port=8080, auth_credentials=auth_config)
+    try:
+        vectors = load_weaviate_vectors(client)
+    finally:
+        client.close()
+    print(f"Loaded embeddings of {len(vectors)} documents from Weaviate")
+
+    classifier = train(vectors, labels)
+    classifier.save(args.output)
+    print(json.dumps(classifier.metrics, indent=2))
+    print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 import os
+import json
+import math
+import time
 import shutil
+import argparse
 import subprocess
-from typing import Optional
+import multiprocessing
+import multiprocessing.connection
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import fitz  # PyMuPDF
 from bs4 import BeautifulSoup
@@ -9,6 +16,60 @@ from docx import Document
 from openpyxl import load_workbook
 from pptx import Presentation
 
+from html_text import CLEAN_TEXT_SUFFIX, CLEAN_TEXT_VERSION, read_sidecar
+from extraction_cache import MANIFEST_NAME, ExtractionCache
+from boilerplate import DEFAULT_DOC_FRACTION, strip_corpus_boilerplate
+from near_duplicates import DEFAULT_THRESHOLD, DUPLICATES_NAME, find_near_duplicates, load_duplicates
+from corpus import CORPUS_DIRNAME, CorpusReader, build_corpus, output_id
+from ocr_service import OCR_SERVICE_PORT, connect_ocr_service
+
+# Bump when the extracted text changes so cached extractions are redone (see extraction_cache.py)
+EXTRACTOR_VERSION = "3"
+OCR_LANGUAGES = ["hi", "en"]
+
+# OCR resolution (see OcrPlanner)
+OCR_DPI = 200  # base resolution, right for A4 scans
+OCR_MIN_DPI = 100
+OCR_RETRY_DPI = 300  # resolution ceiling for low-confidence retries
+OCR_MAX_PIXELS = 4_000_000  # about an A4 page at OCR_DPI; larger formats are rendered at lower DPI
+OCR_PROBE_DPI = 24
+OCR_BLANK_INK_RATIO = 0.001  # below this the page is treated as blank (one typed line is ~0.003)
+OCR_SPARSE_INK_RATIO = 0.03  # below this the type is large/sparse and OCR_DPI is scaled down
+OCR_SPARSE_DPI_SCALE = 0.75
+OCR_RETRY_CONFIDENCE = 0.4
+
+# OCR limits; pages over them are deferred
+OCR_PAGE_BUDGET_S = 60.0
+OCR_MAX_PAGE_MP = 48  # pixmap size cap in megapixels (= MB for 8-bit grayscale)
+OCR_DEFAULT_SEC_PER_MP = 1.5  # CPU EasyOCR; refined from observed batches
+OCR_BATCH_PAGES = 4  # scanned pages handed to the OCR reader per call
+DEFERRED_SUFFIX = ".deferred.json"
+
+
+# One EasyOCR reader per process, created the first time a scanned page needs it;
+# a running ocr_service.py is used instead so the models are not loaded again
+_ocr_reader = None
+_ocr_gpu = True
+_ocr_limits = True
+_ocr_service = True
+
+
+def get_ocr_reader():
+    """Return this process's EasyOCR reader (or OCR service client), initializing it on first use."""
+    global _ocr_reader
+    if _ocr_reader is None:
+        if _ocr_service:
+            _ocr_reader = connect_ocr_service()
+            if _ocr_reader is not None:
+                print(f"Process {os.getpid()} using the OCR service on port {OCR_SERVICE_PORT}")
+                return _ocr_reader
+
+        import easyocr
+
+        print(f"Initializing EasyOCR in process {os.getpid()} (this may take a moment)...")
+        _ocr_reader = easyocr.Reader(OCR_LANGUAGES, gpu=_ocr_gpu)
+    return _ocr_reader
+
 
 def is_digital(pdf_path: str) -> bool:
     try:
@@ -48,7 +109,122 @@ def ghostscript_repair(pdf_path: str, repaired_dir: str) -> str:
     return out_path
 
 
-def ocr_extract(pdf_path: str, ocr_dir: str, reader, dpi: int = 200) -> str:
+def render_page(page, dpi: int = OCR_DPI):
+    """Render a page to an 8-bit grayscale pixmap; EasyOCR converts to grayscale anyway."""
+    return page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+
+
+def pixmap_to_array(pix):
+    """
+    View a pixmap's samples as a uint8 NumPy array without copying or PNG encoding.
+    The array borrows the pixmap's memory, so keep `pix` alive while it is used.
+    """
+    import numpy as np
+
+    samples = getattr(pix, "samples_mv", None) or pix.samples  # memoryview on newer PyMuPDF
+    if pix.n == 1:
+        return np.ndarray((pix.height, pix.width), dtype=np.uint8, buffer=samples, strides=(pix.stride, 1))
+    return np.ndarray(
+        (pix.height, pix.width, pix.n), dtype=np.uint8, buffer=samples, strides=(pix.stride, pix.n, 1)
+    )
+
+
+def ocr_images(reader, images: list) -> List[Tuple[str, float]]:
+    """
+    OCR page images, one recognizer call for the whole batch when the reader
+    supports it (EasyOCR's readtext_batched needs equally sized images).
+    Returns (text, confidence) per image; confidence is the length-weighted
+    mean over the detected lines, 0.0 when nothing was found.
+    """
+    if len(images) > 1 and hasattr(reader, "readtext_batched") and len({im.shape for im in images}) == 1:
+        results = reader.readtext_batched(images, detail=1, paragraph=False)
+    else:
+        results = [reader.readtext(image, detail=1, paragraph=False) for image in images]
+
+    pages = []
+    for lines in results:
+        text = " ".join(line_text for _, line_text, _ in lines)
+        chars = sum(len(line_text) for _, line_text, _ in lines)
+        confidence = sum(len(line_text) * conf for _, line_text, conf in lines) / chars if chars else 0.0
+        pages.append((text, confidence))
+    return pages
+
+
+def _timed_ocr(reader, images: list) -> Tuple[List[Tuple[str, float]], float]:
+    start = time.perf_counter()
+    results = ocr_images(reader, images)
+    return results, time.perf_counter() - start
+
+
+def probe_ink_ratio(page) -> float:
+    """Fraction of dark pixels on a low-resolution render; a cheap text-density estimate."""
+    pix = page.get_pixmap(dpi=OCR_PROBE_DPI, colorspace=fitz.csGRAY, alpha=False)
+    image = pixmap_to_array(pix)
+    # Anti-aliased glyphs are mid-gray at this resolution, so count anything clearly darker than paper
+    return float((image < 192).mean()) if image.size else 0.0
+
+
+def page_megapixels(page, dpi: float) -> float:
+    return (page.rect.width / 72 * dpi) * (page.rect.height / 72 * dpi) / 1e6
+
+
+class OcrPlanner:
+    """
+    Chooses the OCR resolution of each scanned page and enforces the OCR limits.
+
+    The base resolution is OCR_DPI, lowered for sparse pages (large type) and
+    for large formats so no page renders to much more than OCR_MAX_PIXELS;
+    blank pages are not OCRed at all. With `limits` on, a page whose
+    predicted OCR time exceeds OCR_PAGE_BUDGET_S is rendered at a lower
+    resolution that fits, and deferred if even OCR_MIN_DPI would not fit the
+    time budget or the OCR_MAX_PAGE_MP pixmap cap. Seconds per megapixel are
+    learned from the batches seen so far, so predictions follow the host.
+    """
+
+    def __init__(self, limits: bool = True):
+        self.limits = limits
+        self.sec_per_mp = OCR_DEFAULT_SEC_PER_MP
+
+    def observe(self, elapsed: float, megapixels: float) -> None:
+        if megapixels > 0:
+            self.sec_per_mp = 0.7 * self.sec_per_mp + 0.3 * (elapsed / megapixels)
+
+    def _fits(self, page, dpi: float) -> bool:
+        megapixels = page_megapixels(page, dpi)
+        return megapixels <= OCR_MAX_PAGE_MP and megapixels * self.sec_per_mp <= OCR_PAGE_BUDGET_S
+
+    def plan(self, page) -> Tuple[Optional[int], Optional[str]]:
+        """Return (dpi, None) for a page to OCR, or (None, reason) with reason "blank" or "over_budget"."""
+        ink = probe_ink_ratio(page)
+        if ink < OCR_BLANK_INK_RATIO:
+            return None, "blank"
+
+        dpi = OCR_DPI * (OCR_SPARSE_DPI_SCALE if ink < OCR_SPARSE_INK_RATIO else 1.0)
+        area = (page.rect.width / 72) * (page.rect.height / 72)
+        if area > 0:
+            dpi = min(dpi, math.sqrt(OCR_MAX_PIXELS / area))
+        dpi = max(OCR_MIN_DPI, dpi)
+
+        if self.limits and not self._fits(page, dpi):
+            # Largest resolution that still fits the time budget and memory cap
+            megapixels = page_megapixels(page, dpi)
+            scale = math.sqrt(min(OCR_MAX_PAGE_MP / megapixels, OCR_PAGE_BUDGET_S / (megapixels * self.sec_per_mp)))
+            dpi = dpi * scale
+            if dpi < OCR_MIN_DPI:
+                return None, "over_budget"
+        return int(dpi), None
+
+    def retry_dpi(self, page, dpi: int, confidence: float) -> Optional[int]:
+        """Higher resolution to retry a low-confidence page at, or None."""
+        if confidence >= OCR_RETRY_CONFIDENCE or dpi >= OCR_RETRY_DPI:
+            return None
+        retry = int(min(OCR_RETRY_DPI, dpi * 1.5))
+        if self.limits and not self._fits(page, retry):
+            return None
+        return retry
+
+
+def ocr_extract(pdf_path: str, ocr_dir: str, reader, dpi: int = OCR_DPI) -> str:
     os.makedirs(ocr_dir, exist_ok=True)
     base = os.path.splitext(os.path.basename(pdf_path))[0]
     txt_path = os.path.join(ocr_dir, f"{base}_ocr.txt")
@@ -56,16 +232,22 @@ def ocr_extract(pdf_path: str, ocr_dir: str, reader, dpi: int = 200) -> str:
     with fitz.open(pdf_path) as doc, open(txt_path, "w", encoding="utf-8") as txt_file:
         for page_num in range(doc.page_count):
             page = doc.load_page(page_num)
-            pix = page.get_pixmap(dpi=dpi)
-            # Following the existing pattern in your repo: feed bytes to EasyOCR
-            ocr_result = reader.readtext(pix.tobytes(), detail=0, paragraph=True)
+            pix = render_page(page, dpi)
+            [(text, _)] = ocr_images(reader, [pixmap_to_array(pix)])
             txt_file.write(f"Page {page_num + 1}:\n")
-            txt_file.write(" ".join(ocr_result))
+            txt_file.write(text)
             txt_file.write("\n" + "-" * 80 + "\n")
 
     return txt_path
 
 
+def iter_txt(file_path: str, encoding: str = "utf-8") -> Iterator[str]:
+    """Yield the lines of a plain text file."""
+    with open(file_path, "r", encoding=encoding) as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
 def extract_txt(file_path: str) -> str:
     """Extract text from plain text file."""
     try:
@@ -77,61 +259,75 @@ def extract_txt(file_path: str) -> str:
             return f.read()
 
 
-def extract_docx(file_path: str) -> str:
-    """Extract text from Word document."""
+def iter_docx(file_path: str) -> Iterator[str]:
+    """Yield the paragraphs, then the table rows, of a Word document."""
     doc = Document(file_path)
-    text_parts = []
 
     # Extract paragraphs
     for para in doc.paragraphs:
         if para.text.strip():
-            text_parts.append(para.text)
+            yield para.text
 
     # Extract tables
     for table in doc.tables:
         for row in table.rows:
             row_text = " | ".join(cell.text.strip() for cell in row.cells)
             if row_text.strip():
-                text_parts.append(row_text)
+                yield row_text
 
-    return "\n".join(text_parts)
 
+def extract_docx(file_path: str) -> str:
+    """Extract text from Word document."""
+    return "\n".join(iter_docx(file_path))
 
-def extract_xlsx(file_path: str) -> str:
-    """Extract text from Excel spreadsheet."""
+
+def iter_xlsx(file_path: str) -> Iterator[str]:
+    """Yield a header per sheet and one line per non-empty row, streaming rows from disk."""
     wb = load_workbook(file_path, read_only=True, data_only=True)
-    text_parts = []
+    try:
+        for sheet_name in wb.sheetnames:
+            sheet = wb[sheet_name]
+            yield f"\n=== Sheet: {sheet_name} ===\n"
 
-    for sheet_name in wb.sheetnames:
-        sheet = wb[sheet_name]
-        text_parts.append(f"\n=== Sheet: {sheet_name} ===\n")
+            for row in sheet.iter_rows(values_only=True):
+                row_text = " | ".join(str(cell) if cell is not None else "" for cell in row)
+                if row_text.strip():
+                    yield row_text
+    finally:
+        wb.close()
 
-        for row in sheet.iter_rows(values_only=True):
-            row_text = " | ".join(str(cell) if cell is not None else "" for cell in row)
-            if row_text.strip():
-                text_parts.append(row_text)
 
-    wb.close()
-    return "\n".join(text_parts)
+def extract_xlsx(file_path: str) -> str:
+    """Extract text from Excel spreadsheet."""
+    return "\n".join(iter_xlsx(file_path))
 
 
-def extract_pptx(file_path: str) -> str:
-    """Extract text from PowerPoint presentation."""
+def iter_pptx(file_path: str) -> Iterator[str]:
+    """Yield a header per slide followed by the text of its shapes."""
     prs = Presentation(file_path)
-    text_parts = []
 
     for slide_num, slide in enumerate(prs.slides, 1):
-        text_parts.append(f"\n=== Slide {slide_num} ===\n")
+        yield f"\n=== Slide {slide_num} ===\n"
 
         for shape in slide.shapes:
             if hasattr(shape, "text") and shape.text.strip():
-                text_parts.append(shape.text)
+                yield shape.text
 
-    return "\n".join(text_parts)
+
+def extract_pptx(file_path: str) -> str:
+    """Extract text from PowerPoint presentation."""
+    return "\n".join(iter_pptx(file_path))
 
 
 def extract_html(file_path: str) -> str:
-    """Extract text from HTML file."""
+    """
+    Extract text from HTML file.
+    Uses the cleaned text the scraper stored next to the file when available.
+    """
+    page = read_sidecar(file_path)
+    if page is not None:
+        return page["text"]
+
     with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
         soup = BeautifulSoup(f, "lxml")
 
@@ -150,65 +346,158 @@ def extract_html(file_path: str) -> str:
     return text
 
 
+# A page needs OCR when its text layer has fewer non-whitespace characters than this
+MIN_PAGE_TEXT_CHARS = 10
+
+
+def has_usable_text(text: str) -> bool:
+    return len("".join(text.split())) >= MIN_PAGE_TEXT_CHARS
+
+
+def extract_pdf_pages(
+    file_path: str,
+    reader=None,
+    reader_factory=None,
+    batch_pages: int = OCR_BATCH_PAGES,
+    ocr_limits: Optional[bool] = None,
+    deferred: Optional[List[int]] = None,
+) -> List[Tuple[int, str]]:
+    """
+    Extract the text of every page in one pass over the document.
+
+    Pages with a usable text layer are read directly; only the pages without
+    one (scans, signature pages) are rendered and OCRed, at a resolution
+    chosen per page by OcrPlanner. Those are grouped into batches of
+    `batch_pages`, and each batch is recognized on a helper thread while the
+    next one is rendered, so at most two batches of pixmaps are held at once.
+    Pages recognized with low confidence are retried once at a higher
+    resolution. The OCR reader is taken from `reader`, or created through
+    `reader_factory` (default: get_ocr_reader) the first time a page needs it.
+
+    Pages skipped by the OCR time/memory limits (`ocr_limits`, default on)
+    are appended to `deferred` when given.
+    Returns [(page_num, text)] for pages that produced any text.
+    """
+    planner = OcrPlanner(_ocr_limits if ocr_limits is None else ocr_limits)
+    texts = {}
+    ocr_unavailable = False
+    batch = []  # [(page_num, dpi, pixmap, array view)]
+    inflight = None  # (batch, future) being recognized
+    retries = []  # [(page_num, dpi, confidence)]
+
+    def submit(pages):
+        return pages, ocr_thread.submit(_timed_ocr, reader, [image for _, _, _, image in pages])
+
+    def collect(pending):
+        pending_batch, future = pending
+        results, elapsed = future.result()
+        planner.observe(elapsed, sum(image.size for _, _, _, image in pending_batch) / 1e6)
+        for (page_num, dpi, _, _), (text, confidence) in zip(pending_batch, results):
+            texts[page_num] = text
+            retry = planner.retry_dpi(doc[page_num - 1], dpi, confidence)
+            if retry:
+                retries.append((page_num, retry, confidence))
+
+    with fitz.open(file_path) as doc, ThreadPoolExecutor(max_workers=1) as ocr_thread:
+        for page_num, page in enumerate(doc, 1):
+            text = page.get_text()
+
+            if not has_usable_text(text) and not ocr_unavailable and reader is None:
+                try:
+                    reader = (reader_factory or get_ocr_reader)()
+                except Exception as e:
+                    print(f"Warning: OCR unavailable, keeping text layer only for {os.path.basename(file_path)}: {e}")
+                    ocr_unavailable = True
+
+            if has_usable_text(text) or reader is None:
+                texts[page_num] = text
+                continue
+
+            dpi, skip_reason = planner.plan(page)
+            if dpi is None:
+                texts[page_num] = text
+                if skip_reason == "over_budget" and deferred is not None:
+                    deferred.append(page_num)
+                continue
+
+            pix = render_page(page, dpi)
+            batch.append((page_num, dpi, pix, pixmap_to_array(pix)))
+            if len(batch) >= batch_pages:
+                if inflight is not None:
+                    collect(inflight)
+                inflight = submit(batch)
+                batch = []
+
+        if inflight is not None:
+            collect(inflight)
+        if batch:
+            collect(submit(batch))
+
+        # Low-confidence pages: one more pass at a higher resolution, keep the better result
+        for page_num, dpi, confidence in retries:
+            pix = render_page(doc[page_num - 1], dpi)
+            image = pixmap_to_array(pix)
+            [(text, retry_confidence)], elapsed = _timed_ocr(reader, [image])
+            planner.observe(elapsed, image.size / 1e6)
+            if retry_confidence > confidence:
+                texts[page_num] = text
+
+    return [(page_num, texts[page_num]) for page_num in sorted(texts) if texts[page_num].strip()]
+
+
 def extract_pdf(file_path: str, output_dir: str, reader=None) -> str:
     """
-    Extract text from PDF (digital or scanned).
-    Returns path to saved text file.
+    Extract text from PDF (digital, scanned or mixed).
+    Returns path to saved text file. Pages deferred by the OCR limits are
+    listed in a "<txt>.deferred.json" marker for a later --deferred run.
     """
     os.makedirs(output_dir, exist_ok=True)
     base = os.path.splitext(os.path.basename(file_path))[0]
     txt_path = os.path.join(output_dir, f"{base}.txt")
+    marker_path = txt_path + DEFERRED_SUFFIX
 
     try:
-        # Check if digital PDF
-        if is_digital(file_path):
-            # Extract text directly
-            with fitz.open(file_path) as doc:
-                text_parts = []
-                for page_num, page in enumerate(doc, 1):
-                    text = page.get_text()
-                    if text.strip():
-                        text_parts.append(f"Page {page_num}:\n{text}")
-                        text_parts.append("-" * 80)
-
-                full_text = "\n".join(text_parts)
-
-            # Clean the extracted text
-            full_text = clean_text(full_text)
-
-            with open(txt_path, "w", encoding="utf-8") as f:
-                f.write(full_text)
-
-            return txt_path
-        else:
-            # Scanned PDF - use OCR
-            if reader is None:
-                import easyocr
+        deferred = []
+        pages = extract_pdf_pages(file_path, reader, deferred=deferred)
+        segments = (part for page_num, text in pages for part in (f"Page {page_num}:\n{text}", "-" * 80))
+
+        # Clean and save the extracted text
+        write_lines(txt_path, iter_clean_lines(segments))
 
-                reader = easyocr.Reader(["hi", "en"])
+        if deferred:
+            print(f"OCR deferred for {len(deferred)} page(s) of {os.path.basename(file_path)}: {deferred}")
+            with open(marker_path, "w", encoding="utf-8") as f:
+                json.dump({"source": file_path, "pages": deferred}, f)
+        elif os.path.exists(marker_path):
+            os.remove(marker_path)
 
-            with fitz.open(file_path) as doc:
-                text_parts = []
-                for page_num in range(doc.page_count):
-                    page = doc.load_page(page_num)
-                    pix = page.get_pixmap(dpi=200)
-                    ocr_result = reader.readtext(pix.tobytes(), detail=0, paragraph=True)
-                    text_parts.append(f"Page {page_num + 1}:\n")
-                    text_parts.append(" ".join(ocr_result))
-                    text_parts.append("-" * 80)
+        return txt_path
 
-                full_text = "\n".join(text_parts)
+    except Exception as e:
+        raise Exception(f"Failed to extract PDF: {e}")
 
-            # Clean the extracted text
-            full_text = clean_text(full_text)
 
-            with open(txt_path, "w", encoding="utf-8") as f:
-                f.write(full_text)
+def iter_clean_lines(segments: Iterable[str]) -> Iterator[str]:
+    """
+    Streaming clean_text: yield the cleaned lines of the text formed by joining
+    `segments` with newlines, without ever holding that text in memory.
+    """
+    is_header_block = False
 
-            return txt_path
+    for segment in segments:
+        for line in segment.split("\n"):
+            stripped_line = line.strip()
 
-    except Exception as e:
-        raise Exception(f"Failed to extract PDF: {e}")
+            # Detect page separators or page headers
+            if "---" in stripped_line or stripped_line.startswith("Page "):
+                if not is_header_block:
+                    yield "#"
+                    is_header_block = True
+
+            # Keep non-empty content lines
+            elif stripped_line:
+                yield line
+                is_header_block = False
 
 
 def clean_text(text: str) -> str:
@@ -217,25 +506,38 @@ def clean_text(text: str) -> str:
     Replaces page markers (--- or 'Page N:') with # symbols.
     Removes excessive empty lines while preserving structure.
     """
-    lines = text.split("\n")
-    cleaned_lines = []
-    is_header_block = False
+    return "\n".join(iter_clean_lines([text]))
 
-    for line in lines:
-        stripped_line = line.strip()
 
-        # Detect page separators or page headers
-        if "---" in stripped_line or stripped_line.startswith("Page "):
-            if not is_header_block:
-                cleaned_lines.append("#")
-                is_header_block = True
-
-        # Keep non-empty content lines
-        elif stripped_line:
-            cleaned_lines.append(line)
-            is_header_block = False
-
-    return "\n".join(cleaned_lines)
+def write_lines(output_path: str, lines: Iterable[str]) -> None:
+    """Write newline-joined lines as they are produced; the file only appears once complete."""
+    tmp_path = output_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            first = True
+            for line in lines:
+                if not first:
+                    f.write("\n")
+                f.write(line)
+                first = False
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# Streaming extractors by extension; segments flow straight into cleaning and the output file
+SEGMENT_EXTRACTORS = {
+    ".txt": iter_txt,
+    ".doc": iter_docx,
+    ".docx": iter_docx,
+    ".xls": iter_xlsx,
+    ".xlsx": iter_xlsx,
+    ".ppt": iter_pptx,
+    ".pptx": iter_pptx,
+    ".html": lambda file_path: [extract_html(file_path)],
+    ".htm": lambda file_path: [extract_html(file_path)],
+}
 
 
 def process_file(file_path: str, output_dir: str, reader=None) -> Optional[str]:
@@ -254,31 +556,19 @@ def process_file(file_path: str, output_dir: str, reader=None) -> Optional[str]:
         if file_ext == ".pdf":
             return extract_pdf(file_path, output_dir, reader)
 
-        elif file_ext == ".txt":
-            text = extract_txt(file_path)
-
-        elif file_ext in [".doc", ".docx"]:
-            text = extract_docx(file_path)
-
-        elif file_ext in [".xls", ".xlsx"]:
-            text = extract_xlsx(file_path)
-
-        elif file_ext in [".ppt", ".pptx"]:
-            text = extract_pptx(file_path)
-
-        elif file_ext in [".html", ".htm"]:
-            text = extract_html(file_path)
-
-        else:
+        extractor = SEGMENT_EXTRACTORS.get(file_ext)
+        if extractor is None:
             print(f"Unsupported file type: {file_ext}")
             return None
 
-        # Clean the extracted text
-        text = clean_text(text)
-
-        # Save extracted text
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(text)
+        # Clean and save the extracted text as it streams in
+        try:
+            write_lines(output_path, iter_clean_lines(extractor(file_path)))
+        except UnicodeDecodeError:
+            if file_ext != ".txt":
+                raise
+            # Fallback to latin-1 encoding
+            write_lines(output_path, iter_clean_lines(iter_txt(file_path, encoding="latin-1")))
 
         return output_path
 
@@ -293,12 +583,9 @@ def process_pdf(pdf_path: str, repaired_dir: str, ocr_dir: str, error_dir: Optio
             ghostscript_repair(pdf_path, repaired_dir)
             print(f"Digital (repaired): {os.path.basename(pdf_path)}")
         else:
-            # Lazy import to avoid requiring EasyOCR if only repairing
-            global easyocr
+            # Lazy init to avoid requiring EasyOCR if only repairing
             if reader is None:
-                import easyocr  # type: ignore
-
-                reader = easyocr.Reader(["hi", "en"])  # initialize once if needed
+                reader = get_ocr_reader()
             ocr_extract(pdf_path, ocr_dir, reader)
             print(f"Scanned (OCRed): {os.path.basename(pdf_path)}")
     except Exception as e:
@@ -311,22 +598,122 @@ def process_pdf(pdf_path: str, repaired_dir: str, ocr_dir: str, error_dir: Optio
                 pass
 
 
-def main(
-    input_base_dir: str = "./data",
-    output_base_dir: str = "./processed_data",
-    limit_per_type: Optional[int] = 50,
-):
+# ==================== PARALLEL EXTRACTION ====================
+
+
+def _extraction_worker(conn, ocr_gpu: bool, ocr_limits: bool, ocr_service: bool) -> None:
+    """Worker process loop: extract the files sent over `conn` until a None sentinel arrives."""
+    global _ocr_gpu, _ocr_limits, _ocr_service
+    _ocr_gpu = ocr_gpu
+    _ocr_limits = ocr_limits
+    _ocr_service = ocr_service
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        file_path, output_dir = task
+        conn.send(process_file(file_path, output_dir))
+
+
+class ExtractionPool:
     """
-    Process files from data/{pdf,docs,html}/ and extract text to processed_data/{pdf,docs,html}/.
+    Fixed set of extraction worker processes with per-file timeouts.
+
+    Each worker talks to the parent over its own pipe, so the parent always
+    knows which file a worker is on and killing one worker cannot corrupt a
+    queue shared with the others. A worker that runs past `file_timeout` or
+    dies (e.g. a MuPDF crash) is killed and replaced, the file is reported as
+    failed and the rest of the batch carries on. Workers are spawned rather
+    than forked, so torch/CUDA state is never inherited from the parent.
     """
-    categories = ["pdf", "docs", "html"]
 
-    # Initialize EasyOCR reader once for scanned PDFs
-    reader = None
+    def __init__(
+        self,
+        workers: int,
+        file_timeout: Optional[float] = None,
+        ocr_gpu: bool = True,
+        ocr_limits: bool = True,
+        ocr_service: bool = True,
+    ):
+        self.ctx = multiprocessing.get_context("spawn")
+        self.file_timeout = file_timeout
+        self.ocr_gpu = ocr_gpu
+        self.ocr_limits = ocr_limits
+        self.ocr_service = ocr_service
+        self.workers: List[Dict] = [self._start_worker() for _ in range(workers)]
+
+    def _start_worker(self) -> Dict:
+        conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(
+            target=_extraction_worker, args=(child_conn, self.ocr_gpu, self.ocr_limits, self.ocr_service), daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return {"process": process, "conn": conn, "index": None, "started": None}
+
+    def _replace_worker(self, worker: Dict) -> None:
+        if worker["process"].is_alive():
+            worker["process"].kill()
+        worker["process"].join()
+        worker["conn"].close()
+        self.workers[self.workers.index(worker)] = self._start_worker()
+
+    def imap(self, tasks: List[Tuple[str, str]]):
+        """
+        Run (file_path, output_dir) tasks and yield (index, result_path, error) as each
+        file finishes, in completion order. error is set only for timeouts and crashes;
+        ordinary extraction failures come back as result_path None, like process_file.
+        """
+        pending = list(enumerate(tasks))
+        pending.reverse()
+
+        while pending or any(w["index"] is not None for w in self.workers):
+            for worker in self.workers:
+                if worker["index"] is None and pending:
+                    index, task = pending.pop()
+                    worker["index"] = index
+                    worker["started"] = time.monotonic()
+                    worker["conn"].send(task)
+
+            busy = [w for w in self.workers if w["index"] is not None]
+            ready = multiprocessing.connection.wait([w["conn"] for w in busy], timeout=0.5)
+            now = time.monotonic()
+
+            for worker in busy:
+                index = worker["index"]
+                if worker["conn"] in ready:
+                    try:
+                        result = worker["conn"].recv()
+                    except (EOFError, OSError):
+                        worker["process"].join(timeout=5)
+                        error = f"worker died with exit code {worker['process'].exitcode}"
+                    else:
+                        worker["index"] = None
+                        yield index, result, None
+                        continue
+                elif self.file_timeout and now - worker["started"] > self.file_timeout:
+                    error = f"timed out after {self.file_timeout:.0f}s"
+                else:
+                    continue
+                self._replace_worker(worker)
+                yield index, None, error
+
+    def close(self) -> None:
+        for worker in self.workers:
+            try:
+                worker["conn"].send(None)
+            except OSError:
+                pass
+        for worker in self.workers:
+            worker["process"].join(timeout=10)
+            if worker["process"].is_alive():
+                worker["process"].kill()
+            worker["conn"].close()
 
-    total_processed = 0
-    total_failed = 0
 
+def _collect_tasks(input_base_dir: str, output_base_dir: str, categories: List[str], limit_per_type: Optional[int]):
+    """List (category, file_path, output_dir) for every file to extract."""
+    tasks = []
     for category in categories:
         input_dir = os.path.join(input_base_dir, category)
         output_dir = os.path.join(output_base_dir, category)
@@ -337,18 +724,12 @@ def main(
 
         os.makedirs(output_dir, exist_ok=True)
 
-        print(f"\n{'='*60}")
-        print(f"Processing {category.upper()} files from: {input_dir}")
-        print(f"{'='*60}")
-
-        files = sorted(os.listdir(input_dir))
         count = 0
-
-        for filename in files:
+        for filename in sorted(os.listdir(input_dir)):
             file_path = os.path.join(input_dir, filename)
 
-            # Skip directories
-            if not os.path.isfile(file_path):
+            # Skip directories and the scraper's cleaned-text sidecars
+            if not os.path.isfile(file_path) or filename.endswith(CLEAN_TEXT_SUFFIX):
                 continue
 
             # Check limit
@@ -356,36 +737,285 @@ def main(
                 print(f"Reached limit of {limit_per_type} files for {category}")
                 break
 
-            # Initialize EasyOCR only when needed (lazy loading)
-            if category == "pdf" and reader is None:
-                try:
-                    import easyocr
+            tasks.append((category, file_path, output_dir))
+            count += 1
+    return tasks
 
-                    print("Initializing EasyOCR (this may take a moment)...")
-                    reader = easyocr.Reader(["hi", "en"], gpu=True)
-                except Exception as e:
-                    print(f"Warning: EasyOCR initialization failed: {e}")
-                    reader = None
 
-            # Process file
-            result = process_file(file_path, output_dir, reader)
+def _output_path(file_path: str, output_dir: str) -> str:
+    return os.path.join(output_dir, f"{os.path.splitext(os.path.basename(file_path))[0]}.txt")
 
-            if result:
-                print(f"✅ {filename} → {os.path.basename(result)}")
+
+def extraction_options() -> Dict:
+    """Every setting that changes the extracted text; part of the extraction cache key."""
+    return {
+        "ocr_dpi": OCR_DPI,
+        "ocr_min_dpi": OCR_MIN_DPI,
+        "ocr_retry_dpi": OCR_RETRY_DPI,
+        "ocr_retry_confidence": OCR_RETRY_CONFIDENCE,
+        "ocr_max_pixels": OCR_MAX_PIXELS,
+        "ocr_ink_ratios": [OCR_BLANK_INK_RATIO, OCR_SPARSE_INK_RATIO, OCR_SPARSE_DPI_SCALE],
+        "ocr_languages": OCR_LANGUAGES,
+        "min_page_text_chars": MIN_PAGE_TEXT_CHARS,
+        "html_clean_version": CLEAN_TEXT_VERSION,
+    }
+
+
+def main(
+    input_base_dir: str = "./data",
+    output_base_dir: str = "./processed_data",
+    limit_per_type: Optional[int] = 50,
+    workers: int = 1,
+    file_timeout: Optional[float] = 600,
+    ocr_gpu: bool = True,
+    force: bool = False,
+    deferred_only: bool = False,
+    boilerplate_fraction: Optional[float] = DEFAULT_DOC_FRACTION,
+    duplicate_threshold: Optional[float] = DEFAULT_THRESHOLD,
+    ocr_service: bool = True,
+    keep_txt: bool = False,
+):
+    """
+    Process files from data/{pdf,docs,html}/ and pack their text into processed_data/corpus/.
+
+    New and changed outputs are written to processed_data/{pdf,docs,html}/*.txt
+    and merged into the corpus, which then deletes them. Files whose content
+    and extraction settings match the manifest entry in
+    processed_data/extraction_manifest.json are not extracted again.
+
+    Args:
+        workers: extraction processes; 1 extracts in this process, 0 uses one per CPU core
+        file_timeout: seconds a single file may take in parallel mode before it is abandoned
+        ocr_gpu: run EasyOCR on the GPU (every worker loads its own reader)
+        force: re-extract every file even if the manifest says it is up to date
+        deferred_only: re-extract just the PDFs with pages deferred by the OCR
+            time/memory limits, with those limits switched off
+        boilerplate_fraction: strip HTML lines found on more than this fraction of
+            pages (see boilerplate.py); None keeps them
+        duplicate_threshold: similarity above which outputs are recorded as near
+            duplicates in duplicates.json (see near_duplicates.py); None skips detection
+        ocr_service: send OCR to a running ocr_service.py (shared by all workers)
+            instead of loading a reader per process
+        keep_txt: keep the per-file .txt outputs after packing them into the corpus
+    """
+    global _ocr_gpu, _ocr_limits, _ocr_service
+    _ocr_gpu = ocr_gpu
+    _ocr_limits = not deferred_only
+    _ocr_service = ocr_service
+
+    categories = ["pdf", "docs", "html"]
+    if deferred_only:
+        tasks = _collect_tasks(input_base_dir, output_base_dir, ["pdf"], None)
+        tasks = [task for task in tasks if os.path.exists(_output_path(*task[1:]) + DEFERRED_SUFFIX)]
+        print(f"{len(tasks)} PDFs have pages deferred by the OCR limits")
+        force = True
+    else:
+        tasks = _collect_tasks(input_base_dir, output_base_dir, categories, limit_per_type)
+
+    corpus_dir = os.path.join(output_base_dir, CORPUS_DIRNAME)
+    corpus = CorpusReader(corpus_dir) if CorpusReader.exists(corpus_dir) else None
+    cache = ExtractionCache(
+        os.path.join(output_base_dir, MANIFEST_NAME), EXTRACTOR_VERSION, extraction_options(), corpus=corpus
+    )
+    pruned = cache.prune()
+    if pruned:
+        print(f"Removed {pruned} manifest entries whose source files are gone")
+
+    # Results for unchanged files are known up front; only the rest is extracted
+    finished = {}
+    to_extract = []
+    backfill_raw = boilerplate_fraction is not None and not deferred_only
+    backfilled = 0
+    for index, (category, file_path, output_dir) in enumerate(tasks):
+        cached = None
+        if not force:
+            try:
+                cached = cache.lookup(file_path, _output_path(file_path, output_dir))
+            except OSError as e:
+                print(f"Warning: could not check {os.path.basename(file_path)} against the manifest: {e}")
+        if cached and backfill_raw and category == "html" and cache.raw_missing(cached):
+            # Without its unstripped text the page would skew line frequencies and never be stripped
+            cached = None
+            backfilled += 1
+        if cached:
+            finished[index] = (cached, None, True)
+        else:
+            to_extract.append(index)
+
+    print(f"{len(tasks) - len(to_extract)} of {len(tasks)} files unchanged since the last extraction")
+    if backfilled:
+        print(f"Re-extracting {backfilled} HTML pages whose unstripped text was not kept")
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(to_extract)))
+
+    if workers > 1:
+        print(f"Extracting {len(to_extract)} files with {workers} worker processes")
+        pool = ExtractionPool(workers, file_timeout, ocr_gpu, _ocr_limits, ocr_service)
+        outcomes = (
+            (to_extract[i], result, error)
+            for i, result, error in pool.imap([tasks[index][1:] for index in to_extract])
+        )
+    else:
+        pool = None
+        outcomes = ((index, process_file(*tasks[index][1:]), None) for index in to_extract)
+
+    total_processed = 0
+    total_unchanged = 0
+    total_failed = 0
+    next_index = 0
+    current_category = None
+
+    def report():
+        """Print finished results in input order, however they completed."""
+        nonlocal next_index, current_category, total_processed, total_unchanged, total_failed
+        while next_index in finished:
+            result, error, unchanged = finished.pop(next_index)
+            category, file_path, _ = tasks[next_index]
+            filename = os.path.basename(file_path)
+            next_index += 1
+
+            if category != current_category:
+                current_category = category
+                print(f"\n{'='*60}")
+                print(f"Processing {category.upper()} files from: {os.path.dirname(file_path)}")
+                print(f"{'='*60}")
+
+            if unchanged:
+                print(f"♻️  [{next_index}/{len(tasks)}] {filename} → {os.path.basename(result)} (unchanged)")
+                total_unchanged += 1
+            elif result:
+                print(f"✅ [{next_index}/{len(tasks)}] {filename} → {os.path.basename(result)}")
                 total_processed += 1
             else:
-                print(f"❌ {filename} - Failed")
+                reason = f" ({error})" if error else ""
+                print(f"❌ [{next_index}/{len(tasks)}] {filename} - Failed{reason}")
                 total_failed += 1
 
-            count += 1
+    # Twin copies are unstripped text too
+    fresh_html = [path for path in cache.copied if output_id(output_base_dir, path).startswith("html/")]
+    try:
+        report()
+        for index, result, error in outcomes:
+            if result:
+                cache.record(tasks[index][1], result)
+                if tasks[index][0] == "html":
+                    fresh_html.append(result)
+            finished[index] = (result, error, False)
+            report()
+    finally:
+        if pool is not None:
+            pool.close()
+        cache.save()
+
+    html_output_dir = os.path.join(output_base_dir, "html")
+    if boilerplate_fraction is not None and not deferred_only and os.path.isdir(html_output_dir):
+        live_html = {
+            os.path.basename(entry["output"])
+            for entry in cache.sources.values()
+            if output_id(output_base_dir, entry["output"]).startswith("html/")
+        }
+
+        def packed_text(name: str) -> Optional[str]:
+            doc_id = f"html/{name}"
+            return corpus.get(doc_id)["text"] if corpus is not None and doc_id in corpus else None
+
+        def packed_raw(name: str) -> Optional[str]:
+            doc_id = f"html/{name}"
+            return corpus.raw_text(doc_id) if corpus is not None and doc_id in corpus else None
+
+        stats = strip_corpus_boilerplate(
+            html_output_dir,
+            fresh_html,
+            boilerplate_fraction,
+            live_names=live_html,
+            packed_raw=packed_raw,
+            packed_text=packed_text,
+        )
+        print(
+            f"\nBoilerplate: {stats['boilerplate_lines']} lines found on >{boilerplate_fraction:.0%} "
+            f"of {stats['documents']} HTML pages; {stats['rewritten']} outputs updated"
+        )
+
+    # build_corpus replaces shards of the corpus
+    if corpus is not None:
+        corpus.close()
+    packed = build_corpus(output_base_dir, categories, cache.sources, input_base_dir, keep_outputs=keep_txt)
+    if packed["changed"]:
+        print(
+            f"Corpus: {packed['documents']} documents in {corpus_dir} ({packed['added']} added, "
+            f"{packed['updated']} updated, {packed['removed']} removed; "
+            f"{packed['shards_rewritten']} shards rewritten)"
+        )
+    else:
+        print(f"Corpus: {packed['documents']} documents unchanged in {corpus_dir}")
+
+    if duplicate_threshold is not None:
+        manifest = find_near_duplicates(output_base_dir, categories, duplicate_threshold)
+        print(
+            f"Near duplicates: {len(manifest['duplicates'])} of {manifest['documents']} documents fold into "
+            f"{len(manifest['clusters'])} representatives (see {os.path.join(output_base_dir, DUPLICATES_NAME)})"
+        )
+        duplicates = manifest["duplicates"]
+    else:
+        duplicates = load_duplicates(output_base_dir)
+    if CorpusReader.exists(corpus_dir):
+        corpus = CorpusReader(corpus_dir)
+        corpus.set_duplicates(duplicates)
+        corpus.close()
 
     print(f"\n{'='*60}")
     print(f"Processing completed!")
     print(f"Total files processed: {total_processed}")
+    print(f"Total files unchanged: {total_unchanged}")
     print(f"Total files failed: {total_failed}")
     print(f"Output directory: {output_base_dir}")
     print(f"{'='*60}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Extract text from data/{pdf,docs,html}")
+    parser.add_argument("--input", default="./data", help="Input base directory")
+    parser.add_argument("--output", default="./processed_data", help="Output base directory")
+    parser.add_argument("--limit", type=int, default=50, help="Max files per category (0 = no limit)")
+    parser.add_argument("--workers", type=int, default=1, help="Extraction processes (0 = one per CPU core)")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-file timeout in seconds (parallel mode)")
+    parser.add_argument("--cpu-ocr", action="store_true", help="Run EasyOCR on the CPU")
+    parser.add_argument(
+        "--no-ocr-service", action="store_true", help="Load EasyOCR in-process even if ocr_service.py is running"
+    )
+    parser.add_argument("--force", action="store_true", help="Re-extract files even if they are unchanged")
+    parser.add_argument(
+        "--boilerplate-fraction",
+        type=float,
+        default=DEFAULT_DOC_FRACTION,
+        help="Strip HTML lines found on more than this fraction of pages (0 = keep all)",
+    )
+    parser.add_argument(
+        "--duplicate-threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Similarity above which documents are near duplicates (0 = skip detection)",
+    )
+    parser.add_argument(
+        "--deferred", action="store_true", help="Re-extract PDFs with OCR-deferred pages, without OCR limits"
+    )
+    parser.add_argument(
+        "--keep-txt", action="store_true", help="Keep the per-file .txt outputs after packing them into the corpus"
+    )
+    args = parser.parse_args()
+
+    main(
+        input_base_dir=args.input,
+        output_base_dir=args.output,
+        limit_per_type=args.limit or None,
+        workers=args.workers,
+        file_timeout=args.timeout or None,
+        ocr_gpu=not args.cpu_ocr,
+        force=args.force,
+        deferred_only=args.deferred,
+        boilerplate_fraction=args.boilerplate_fraction or None,
+        duplicate_threshold=args.duplicate_threshold or None,
+        ocr_service=not args.no_ocr_service,
+        keep_txt=args.keep_txt,
+    )
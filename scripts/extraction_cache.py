@@ -0,0 +1,230 @@
+"""
+extraction_cache.py - Incremental text extraction for extract_02
+
+Every extracted .txt is recorded in a JSON manifest next to the output
+(processed_data/extraction_manifest.json) together with the source it was
+produced from and a cache key: the SHA-256 of the source file plus the
+extractor version and options (OCR DPI, languages, ...). On the next run a
+source whose key is unchanged and whose output still exists (as a loose
+.txt or packed in the corpus, see corpus.py) is skipped,
+and a new file with the same content as one already extracted gets a copy
+of that output instead of a second extraction. Source hashes are reused
+while a file's size and mtime are unchanged, so an unchanged corpus is not
+even re-read.
+
+Manifest layout:
+    {"version": 1, "sources": {source_path: {"sha256", "size", "mtime", "key", "output", "extracted_at"}}}
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from boilerplate import RAW_DIRNAME
+from corpus import CorpusReader, output_id
+
+MANIFEST_NAME = "extraction_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_extraction_key(source_sha256: str, extractor_version: str, options: Dict) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{extractor_version}\x00".encode("utf-8"))
+    digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+    digest.update(source_sha256.encode("ascii"))
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    JSON manifest of source file -> extracted output, keyed by content hash and extractor settings.
+
+    Args:
+        manifest_path: manifest file (created on first save)
+        extractor_version: bump in the extractor when its output format changes
+        options: every setting that changes the extracted text
+        save_every: records between manifest saves, so a crash loses little work
+        corpus: the packed corpus, whose documents count as existing outputs
+    """
+
+    def __init__(
+        self,
+        manifest_path: str,
+        extractor_version: str,
+        options: Dict,
+        save_every: int = 50,
+        corpus: Optional[CorpusReader] = None,
+    ):
+        self.manifest_path = manifest_path
+        self.processed_dir = os.path.dirname(manifest_path)
+        self.corpus = corpus
+        self.extractor_version = extractor_version
+        self.options = options
+        self.save_every = save_every
+        self.sources: Dict[str, Dict] = {}
+        self.hits = 0
+        self.copies = 0
+        self.copied = []  # outputs written from a twin this run; they hold unstripped text like fresh ones
+        self._copied_without_raw = set()  # ...except these, copied from a page whose raw text was not kept
+        self._unsaved = 0
+        self._pending: Dict[str, Dict] = {}  # source -> stat/hash/key computed by lookup()
+        self._load()
+        self._by_key = {entry["key"]: path for path, entry in self.sources.items()}
+
+    def _load(self) -> None:
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                self.sources = manifest.get("sources", {})
+        except Exception as e:
+            print(f"⚠️  Could not read extraction manifest {self.manifest_path}: {e}")
+
+    def _source_info(self, source_path: str) -> Dict:
+        """Stat the source and hash it, reusing the recorded hash while size and mtime match."""
+        st = os.stat(source_path)
+        previous = self.sources.get(source_path)
+        if previous and previous.get("size") == st.st_size and previous.get("mtime") == st.st_mtime:
+            sha256 = previous["sha256"]
+        else:
+            sha256 = hash_file(source_path)
+        return {
+            "sha256": sha256,
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "key": make_extraction_key(sha256, self.extractor_version, self.options),
+        }
+
+    def _packed_id(self, output_path: str) -> Optional[str]:
+        if self.corpus is None:
+            return None
+        doc_id = output_id(self.processed_dir, output_path)
+        return doc_id if doc_id in self.corpus else None
+
+    def has_output(self, output_path: str) -> bool:
+        return os.path.exists(output_path) or self._packed_id(output_path) is not None
+
+    def _raw_path(self, output_path: str) -> str:
+        return os.path.join(os.path.dirname(output_path), RAW_DIRNAME, os.path.basename(output_path))
+
+    def raw_missing(self, output_path: str) -> bool:
+        """
+        True when the unstripped text of an HTML output is gone: it was packed
+        without raw text (before the corpus kept it, or while stripping was off),
+        or copied from such a page. Re-extracting it restores the raw text.
+        """
+        if os.path.exists(self._raw_path(output_path)):
+            return False
+        if output_path in self._copied_without_raw:
+            return True
+        if output_path in self.copied:
+            return False
+        doc_id = self._packed_id(output_path)
+        return doc_id is not None and self.corpus.raw_text(doc_id) is None
+
+    def _copy_output(self, src: str, dst: str) -> None:
+        """
+        Write the extracted text of output src to the loose file dst. HTML pages
+        need their unstripped text (boilerplate.py strips the twin itself): the
+        copy staged in .raw/ or the raw text packed in the corpus. Otherwise the
+        loose or packed output.
+        """
+        raw = self._raw_path(src)
+        if os.path.exists(raw):
+            shutil.copyfile(raw, dst)
+            return
+        doc_id = self._packed_id(src)
+        text = self.corpus.raw_text(doc_id) if doc_id is not None else None
+        if text is None:
+            self._copied_without_raw.add(dst)
+        if text is None and os.path.exists(src):
+            shutil.copyfile(src, dst)
+            return
+        if text is None:
+            text = self.corpus.get(doc_id)["text"]
+        with open(dst, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def lookup(self, source_path: str, output_path: str) -> Optional[str]:
+        """
+        Return output_path if the source was already extracted with the current
+        settings (copying the text over from an identical source if needed),
+        otherwise None. A miss must be followed by record() once extracted.
+        """
+        info = self._source_info(source_path)
+        key = info["key"]
+
+        previous = self.sources.get(source_path)
+        if previous and previous["key"] == key and self.has_output(previous["output"]):
+            if previous["mtime"] != info["mtime"]:
+                previous["mtime"] = info["mtime"]
+                self._unsaved += 1
+            self.hits += 1
+            return previous["output"]
+
+        twin = self.sources.get(self._by_key.get(key, ""))
+        if twin and twin["key"] == key and self.has_output(twin["output"]):
+            if os.path.abspath(twin["output"]) != os.path.abspath(output_path):
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                self._copy_output(twin["output"], output_path)
+                self.copied.append(output_path)
+            self._pending[source_path] = info
+            self.record(source_path, output_path)
+            self.copies += 1
+            return output_path
+
+        self._pending[source_path] = info
+        return None
+
+    def record(self, source_path: str, output_path: str) -> None:
+        """Record that output_path was extracted from source_path with the current settings."""
+        info = self._pending.pop(source_path, None) or self._source_info(source_path)
+        self.sources[source_path] = {
+            **info,
+            "output": output_path,
+            "extracted_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self._by_key[info["key"]] = source_path
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self.save()
+
+    def prune(self) -> int:
+        """
+        Forget sources that no longer exist and delete loose outputs no remaining source
+        produced (build_corpus drops packed ones). Returns the number of forgotten sources.
+        """
+        removed = [path for path in self.sources if not os.path.exists(path)]
+        for path in removed:
+            output = self.sources.pop(path)["output"]
+            still_used = any(entry["output"] == output for entry in self.sources.values())
+            if not still_used and os.path.exists(output):
+                os.remove(output)
+        if removed:
+            self._unsaved += len(removed)
+        return len(removed)
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        if not self._unsaved:
+            return
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "sources": self.sources}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+        self._unsaved = 0
@@ -0,0 +1,103 @@
+"""
+html_text.py - Boilerplate-stripped page text from a single lxml pass
+
+SitemapSpider already has every HTML page parsed into an lxml tree (the one
+Scrapy selectors run on). extract_page() walks that tree once, skipping
+scripts, styles and navigation chrome, and returns the cleaned text plus a
+few metadata fields. The spider uses the text for summarization and writes
+it next to the stored HTML file as a "<file>.clean.json" sidecar, which
+extract_02.extract_html reads instead of parsing the page again.
+"""
+
+import os
+import json
+from typing import Dict, Iterator, Optional
+
+# Same elements extract_html has always dropped, plus a few that never carry content
+BOILERPLATE_TAGS = {"script", "style", "nav", "footer", "header", "noscript", "template", "svg"}
+
+CLEAN_TEXT_SUFFIX = ".clean.json"
+CLEAN_TEXT_VERSION = 1  # Bump when the cleaning rules change
+
+
+def _iter_text(element) -> Iterator[str]:
+    """
+    Yield the text of element and its descendants in document order, skipping boilerplate subtrees.
+    Walks with an explicit stack: legacy CMS pages nest deeply enough to exhaust Python's recursion limit.
+    """
+    # Entries are elements to visit or tail strings to emit
+    stack = [element]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+            continue
+        tag = item.tag
+        # Comments and processing instructions have a non-string tag; only their tail is content
+        if not isinstance(tag, str) or tag.lower() in BOILERPLATE_TAGS:
+            continue
+        if item.text:
+            yield item.text
+        for child in reversed(item):
+            if child.tail:
+                stack.append(child.tail)
+            stack.append(child)
+
+
+def collapse_text(strings) -> str:
+    """
+    Join text nodes the way extract_html always has: one node per line,
+    stripped, split on double spaces, empty chunks dropped.
+    """
+    chunks = (phrase.strip() for s in strings for line in s.splitlines() for phrase in line.split("  "))
+    return "\n".join(chunk for chunk in chunks if chunk)
+
+
+def _first(root, xpath: str) -> str:
+    values = root.xpath(xpath)
+    return values[0].strip() if values else ""
+
+
+def extract_page(root) -> Dict[str, str]:
+    """
+    Extract title, metadata and boilerplate-stripped body text from an lxml HTML root.
+    Returns {"title", "description", "language", "canonical", "text"}.
+    """
+    body = root.find("body")
+    text = collapse_text(_iter_text(body if body is not None else root))
+    return {
+        "title": " ".join(_first(root, "//title/text()").split()),
+        "description": _first(root, "//meta[@name='description']/@content"),
+        "language": _first(root, "/html/@lang"),
+        "canonical": _first(root, "//link[@rel='canonical']/@href"),
+        "text": text,
+    }
+
+
+def sidecar_path(html_path: str) -> str:
+    return html_path + CLEAN_TEXT_SUFFIX
+
+
+def write_sidecar(html_path: str, page: Dict) -> str:
+    """Atomically write the cleaned page next to the stored HTML file."""
+    path = sidecar_path(html_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": CLEAN_TEXT_VERSION, **page}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_sidecar(html_path: str) -> Optional[Dict]:
+    """Return the cleaned page stored next to html_path, or None if missing, stale or unreadable."""
+    path = sidecar_path(html_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            page = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if page.get("version") != CLEAN_TEXT_VERSION or "text" not in page:
+        return None
+    return page
@@ -0,0 +1,137 @@
+"""
+linear_head.py - Calibrated logistic regression for the lightweight classifiers
+
+The embedding classifier (bge-m3 vectors) and the cascade's first stage
+(keyword and date features) are both a class-balanced logistic regression
+whose probability is temperature-scaled on held-out documents, so their
+confidence can be compared against the same thresholds as the NLI model's.
+Pure NumPy; weights are stored as JSON.
+"""
+
+import os
+import json
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+POSITIVE_LABEL = "dynamic"
+NEGATIVE_LABEL = "static"
+
+
+def sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -50, 50)))
+
+
+def expected_calibration_error(probs: np.ndarray, y: np.ndarray, bins: int = 10) -> float:
+    """ECE of the predicted label's confidence."""
+    confidence = np.maximum(probs, 1 - probs)
+    correct = (probs >= 0.5) == (y == 1)
+    edges = np.linspace(0.5, 1.0, bins + 1)
+    ece = 0.0
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        mask = (confidence >= lo) & ((confidence < hi) if hi < 1.0 else (confidence <= hi))
+        if mask.any():
+            ece += mask.mean() * abs(correct[mask].mean() - confidence[mask].mean())
+    return float(ece)
+
+
+class LogisticHead:
+    """
+    Logistic regression with temperature-scaled output.
+
+    predict() returns the same (label, confidence, scores) shape as
+    classifier_03.classify_text.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: float, temperature: float = 1.0, metrics: Optional[Dict] = None):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.temperature = float(temperature)
+        self.metrics = metrics or {}
+
+    def logits(self, X: np.ndarray) -> np.ndarray:
+        return X @ self.weights + self.bias
+
+    def probabilities(self, X: np.ndarray) -> np.ndarray:
+        """Calibrated P(dynamic) per row."""
+        return sigmoid(self.logits(X) / self.temperature)
+
+    def predict(self, vector: np.ndarray) -> Tuple[str, float, Dict[str, float]]:
+        p_dynamic = float(self.probabilities(vector[None, :])[0])
+        scores = {POSITIVE_LABEL: p_dynamic, NEGATIVE_LABEL: 1.0 - p_dynamic}
+        label = max(scores, key=scores.get)
+        return label, scores[label], scores
+
+    @classmethod
+    def fit(cls, X: np.ndarray, y: np.ndarray, l2: float = 1e-3, epochs: int = 500, lr: float = 0.5):
+        """Full-batch gradient descent on the L2-regularized, class-balanced logistic loss."""
+        weights = np.zeros(X.shape[1], dtype=np.float64)
+        bias = 0.0
+        positive = max(y.mean(), 1e-6)
+        sample_weight = np.where(y == 1, 0.5 / positive, 0.5 / max(1 - positive, 1e-6))
+        for _ in range(epochs):
+            error = (sigmoid(X @ weights + bias) - y) * sample_weight
+            weights -= lr * (X.T @ error / len(y) + l2 * weights)
+            bias -= lr * error.mean()
+        return cls(weights, bias)
+
+    def calibrate(self, X: np.ndarray, y: np.ndarray) -> None:
+        """Pick the temperature minimizing held-out negative log-likelihood."""
+        z = self.logits(X)
+        best = (np.inf, 1.0)
+        for temperature in np.exp(np.linspace(np.log(0.05), np.log(20.0), 200)):
+            p = np.clip(sigmoid(z / temperature), 1e-7, 1 - 1e-7)
+            nll = -np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))
+            best = min(best, (nll, float(temperature)))
+        self.temperature = best[1]
+
+    @classmethod
+    def fit_calibrated(cls, X: np.ndarray, y: np.ndarray, holdout: float = 0.2, seed: int = 0, **fit_args):
+        """
+        Fit on all but a random `holdout` share of the rows, calibrate on that
+        share, and record holdout metrics. Returns (head, holdout probabilities, holdout labels).
+        """
+        order = np.random.RandomState(seed).permutation(len(y))
+        split = max(1, int(len(y) * holdout))
+        held, fit = order[:split], order[split:]
+
+        head = cls.fit(X[fit], y[fit], **fit_args)
+        ece_before = expected_calibration_error(head.probabilities(X[held]), y[held])
+        head.calibrate(X[held], y[held])
+
+        probs = head.probabilities(X[held])
+        head.metrics = {
+            "trained_at": datetime.now(timezone.utc).isoformat(),
+            "documents": len(y),
+            "dynamic_share": round(float(y.mean()), 3),
+            "holdout_accuracy": round(float(((probs >= 0.5) == (y[held] == 1)).mean()), 4),
+            "holdout_ece_uncalibrated": round(ece_before, 4),
+            "holdout_ece": round(expected_calibration_error(probs, y[held]), 4),
+            "temperature": round(head.temperature, 4),
+        }
+        return head, probs, y[held]
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "weights": self.weights.tolist(),
+                    "bias": self.bias,
+                    "temperature": self.temperature,
+                    "metrics": self.metrics,
+                },
+                f,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Load a trained head, or None if there is none yet."""
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(np.asarray(data["weights"]), data["bias"], data["temperature"], data.get("metrics"))
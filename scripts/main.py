@@ -69,6 +69,8 @@ class PipelineConfig:
 
     # Processing limits
     EXTRACT_LIMIT = None  # None = process all files
+    EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "1"))  # 0 = one process per CPU core
+    EXTRACT_FILE_TIMEOUT = 600  # seconds before a single file is abandoned (parallel mode)
 
     # Colors for terminal output
     RESET = "\033[0m"
@@ -241,12 +243,13 @@ def stage_2_extraction(batch_mode: bool = False) -> bool:
         print_info("Skipping text extraction (no documents to process)")
         return True
 
-    # Check if already processed
+    # Existing output is reused file by file via the extraction manifest
+    force = False
     if check_directory(PipelineConfig.PROCESSED_DIR):
         print_info(f"Found existing processed data: {PipelineConfig.PROCESSED_DIR}")
-        if not get_user_confirmation("Re-extract text from documents?", batch_mode):
-            print_success("Using existing extracted data")
-            return True
+        print_info("Only new or changed documents will be extracted")
+        if not batch_mode:
+            force = get_user_confirmation("Force full re-extraction of every document?")
 
     try:
         print_info("Starting text extraction...")
@@ -257,6 +260,9 @@ def stage_2_extraction(batch_mode: bool = False) -> bool:
             input_base_dir=PipelineConfig.DATA_DIR,
             output_base_dir=PipelineConfig.PROCESSED_DIR,
             limit_per_type=PipelineConfig.EXTRACT_LIMIT,
+            workers=PipelineConfig.EXTRACT_WORKERS,
+            file_timeout=PipelineConfig.EXTRACT_FILE_TIMEOUT,
+            force=force,
         )
 
         # Verify output
@@ -285,8 +291,8 @@ def stage_3_classification(batch_mode: bool = False) -> bool:
         return False
 
     # Check if already classified
-    if check_directory(PipelineConfig.CLASSIFIED_DIR):
-        print_info(f"Found existing classified data: {PipelineConfig.CLASSIFIED_DIR}")
+    if os.path.exists(PipelineConfig.CLASSIFIED_JSON):
+        print_info(f"Found existing classified data: {PipelineConfig.CLASSIFIED_JSON}")
         if not get_user_confirmation("Re-classify documents?", batch_mode):
             print_success("Using existing classification")
             return True
@@ -299,10 +305,13 @@ def stage_3_classification(batch_mode: bool = False) -> bool:
         results = classifier_main()
 
         # Verify output
-        if check_directory(PipelineConfig.CLASSIFIED_DIR) and os.path.exists(PipelineConfig.CLASSIFIED_JSON):
+        if os.path.exists(PipelineConfig.CLASSIFIED_JSON):
             print_success(f"Classification completed successfully")
             print_info(f"  → Results: {PipelineConfig.CLASSIFIED_JSON}")
-            print_info(f"  → Organized: {PipelineConfig.CLASSIFIED_DIR}")
+            if check_directory(PipelineConfig.CLASSIFIED_DIR):
+                print_info(f"  → Organized: {PipelineConfig.CLASSIFIED_DIR}")
+            else:
+                print_info(f"  → Labels: {PipelineConfig.PROCESSED_DIR}/corpus/index.json")
 
             # Print summary
             static_count = sum(1 for r in results if r.get("category") == "static")
@@ -328,8 +337,8 @@ def stage_4_curation(batch_mode: bool = False) -> bool:
     print_step(4, 5, "DATABASE CURATION")
 
     # Check if classified data exists
-    if not check_directory(PipelineConfig.CLASSIFIED_DIR):
-        print_error(f"Classified data not found: {PipelineConfig.CLASSIFIED_DIR}")
+    if not os.path.exists(PipelineConfig.CLASSIFIED_JSON):
+        print_error(f"Classified data not found: {PipelineConfig.CLASSIFIED_JSON}")
         return False
 
     # Check if collections exist
@@ -33,7 +33,9 @@ from watch_06 import (
     WATCH_FOLDERS,
     SUPPORTED_EXTENSIONS,
     extract_text_from_file,
+    WATCH_CLASSIFIER,
     classify_for_miscellaneous,
+    embed_document,
     process_and_insert,
     move_to_processed,
     init_classifier,
@@ -88,6 +90,9 @@ def process_file(file_path: str, folder_type: str) -> Dict:
         "error": None,
     }
     
+    text = None
+    embedded = None
+
     try:
         # Determine target collection(s)
         if folder_type == "static":
@@ -101,7 +106,8 @@ def process_file(file_path: str, folder_type: str) -> Dict:
                 result["status"] = "failed"
                 result["error"] = "Text extraction failed"
                 return result
-            target_collections = classify_for_miscellaneous(text)
+            embedded = embed_document(file_path, text) if WATCH_CLASSIFIER == "embedding" else None
+            target_collections = classify_for_miscellaneous(text, embedded, os.path.basename(file_path))
         else:
             result["status"] = "failed"
             result["error"] = "Unknown folder type"
@@ -110,7 +116,7 @@ def process_file(file_path: str, folder_type: str) -> Dict:
         result["collections"] = target_collections
         
         # Process and insert
-        success = process_and_insert(file_path, target_collections)
+        success = process_and_insert(file_path, target_collections, text=text, embedded=embedded)
         
         if success:
             move_to_processed(file_path)
@@ -0,0 +1,230 @@
+"""
+near_duplicates.py - Near-duplicate detection over extracted documents
+
+The crawl stores the same document under several names (e.g.
+"Final_Policy Plagiarism.pdf" and "Final_Policy Plagiarism_0.pdf", or a PDF
+and the DOCX it was exported from). After extraction every document in the
+corpus (or every processed .txt, without one) gets a MinHash signature over
+its word 5-shingles; LSH banding finds
+candidate pairs, which are kept when their estimated Jaccard similarity
+reaches the threshold. Each cluster keeps one representative (the longest
+text) and the rest are listed in processed_data/duplicates.json, which the
+classifier reads to send only representatives downstream.
+
+Manifest layout:
+    {"threshold", "documents", "clusters": [{"representative", "members": [{"path", "similarity"}]}],
+     "duplicates": {path: representative}}
+Paths are relative to the processed_data directory, e.g. "pdf/notice.txt".
+"""
+
+import os
+import re
+import json
+import zlib
+import pickle
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from corpus import CORPUS_DIRNAME, CorpusReader
+
+DUPLICATES_NAME = "duplicates.json"
+SIGNATURE_CACHE_NAME = ".minhash_cache.pkl"
+
+DEFAULT_THRESHOLD = 0.85
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows: pairs above ~0.7 similarity almost always share a bucket
+SHINGLE_WORDS = 5
+MIN_SHINGLES = 10  # shorter texts are too small to compare meaningfully
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def load_duplicates(processed_dir: str) -> Dict[str, str]:
+    """Return {duplicate path: representative path} (relative to processed_dir), empty if none recorded."""
+    path = os.path.join(processed_dir, DUPLICATES_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("duplicates", {})
+    except Exception as e:
+        print(f"⚠️  Could not read duplicates manifest {path}: {e}")
+        return {}
+
+
+class MinHasher:
+    """MinHash signatures from universal hashes (a*x + b) mod p over CRC32 shingle hashes."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str, chunk_size: int = 8192) -> Optional[np.ndarray]:
+        """MinHash signature of the text's word shingles, or None if the text is too short."""
+        words = _WORD_RE.findall(text.lower())
+        shingles = (" ".join(words[i : i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1)))
+        hashes = np.unique(np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64))
+        if len(hashes) < MIN_SHINGLES:
+            return None
+
+        # a < 2^31 and hashes < 2^32, so the products fit in uint64; chunking bounds memory on huge texts
+        signature = np.full(self.num_perm, _MERSENNE_PRIME, dtype=np.uint64)
+        for start in range(0, len(hashes), chunk_size):
+            chunk = hashes[start : start + chunk_size]
+            permuted = (np.outer(self.a, chunk) + self.b[:, None]) % _MERSENNE_PRIME
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+
+def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+
+class NearDuplicateIndex:
+    """LSH index over MinHash signatures, clustering documents above `threshold`."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, bands: int = BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.buckets: Dict[tuple, List[str]] = {}
+        self.parent: Dict[str, str] = {}
+
+    def _find(self, doc_id: str) -> str:
+        while self.parent[doc_id] != doc_id:
+            self.parent[doc_id] = self.parent[self.parent[doc_id]]
+            doc_id = self.parent[doc_id]
+        return doc_id
+
+    def add(self, doc_id: str, signature: np.ndarray) -> None:
+        self.signatures[doc_id] = signature
+        self.parent[doc_id] = doc_id
+        rows = len(signature) // self.bands
+        checked = set()
+        for band in range(self.bands):
+            key = (band, signature[band * rows : (band + 1) * rows].tobytes())
+            bucket = self.buckets.setdefault(key, [])
+            for other in bucket:
+                if other in checked:
+                    continue
+                checked.add(other)
+                if similarity(signature, self.signatures[other]) >= self.threshold:
+                    self.parent[self._find(doc_id)] = self._find(other)
+            bucket.append(doc_id)
+
+    def clusters(self) -> List[List[str]]:
+        """Groups of two or more near-duplicate documents."""
+        groups: Dict[str, List[str]] = {}
+        for doc_id in self.signatures:
+            groups.setdefault(self._find(doc_id), []).append(doc_id)
+        return [sorted(members) for members in groups.values() if len(members) > 1]
+
+
+def _load_signature_cache(path: str) -> Dict:
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"⚠️  Could not load MinHash cache {path}: {e}")
+    return {}
+
+
+def _iter_documents(processed_dir: str, categories: Iterable[str]) -> Iterator[Tuple[str, int, str, object]]:
+    """
+    (path, size, version, read_text) per document: from the corpus, versioned
+    by text hash, or from the per-file outputs, versioned by size and mtime.
+    """
+    categories = set(categories)
+    corpus_dir = os.path.join(processed_dir, CORPUS_DIRNAME)
+    if CorpusReader.exists(corpus_dir):
+        corpus = CorpusReader(corpus_dir)
+        try:
+            for entry in sorted(corpus.iter_entries(), key=lambda e: e["id"]):
+                if entry["category"] in categories:
+                    doc_id = entry["id"]
+                    read_text = lambda doc_id=doc_id: corpus.get(doc_id)["text"]  # noqa: E731
+                    yield doc_id, entry["output_size"], entry["text_hash"], read_text
+        finally:
+            corpus.close()
+        return
+
+    for category in sorted(categories):
+        category_dir = os.path.join(processed_dir, category)
+        if not os.path.isdir(category_dir):
+            continue
+        for name in sorted(os.listdir(category_dir)):
+            if not name.endswith(".txt"):
+                continue
+            path = os.path.join(category_dir, name)
+            st = os.stat(path)
+
+            def read_text(path=path):
+                with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                    return f.read()
+
+            yield f"{category}/{name}", st.st_size, f"{st.st_size}:{st.st_mtime}", read_text
+
+
+def find_near_duplicates(
+    processed_dir: str, categories: Iterable[str], threshold: float = DEFAULT_THRESHOLD
+) -> Dict:
+    """
+    Cluster near-duplicate documents of the given categories in the corpus under
+    processed_dir (or the .txt outputs under processed_dir/{category}/ when there
+    is no corpus) and write processed_dir/duplicates.json. Signatures are cached
+    by text hash (or file size and mtime), so only new or changed texts are re-read.
+    """
+    hasher = MinHasher()
+    index = NearDuplicateIndex(threshold)
+    cache_path = os.path.join(processed_dir, SIGNATURE_CACHE_NAME)
+    cache = _load_signature_cache(cache_path)
+    new_cache = {}
+    sizes = {}
+
+    for rel_path, size, version, read_text in _iter_documents(processed_dir, categories):
+        cached = cache.get(rel_path)
+        if cached and cached[0] == version:
+            signature = cached[1]
+        else:
+            signature = hasher.signature(read_text())
+        new_cache[rel_path] = (version, signature)
+        sizes[rel_path] = size
+        if signature is not None:
+            index.add(rel_path, signature)
+
+    clusters = []
+    duplicates = {}
+    for members in index.clusters():
+        # Keep the most complete text; ties go to the shortest (least suffixed) name
+        representative = max(members, key=lambda p: (sizes[p], -len(p)))
+        rep_signature = index.signatures[representative]
+        others = [
+            {"path": p, "similarity": round(similarity(rep_signature, index.signatures[p]), 3)}
+            for p in members
+            if p != representative
+        ]
+        clusters.append({"representative": representative, "members": others})
+        for other in others:
+            duplicates[other["path"]] = representative
+
+    manifest = {
+        "threshold": threshold,
+        "documents": len(new_cache),
+        "clusters": clusters,
+        "duplicates": duplicates,
+    }
+    tmp_path = os.path.join(processed_dir, DUPLICATES_NAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(processed_dir, DUPLICATES_NAME))
+
+    with open(cache_path + ".tmp", "wb") as f:
+        pickle.dump(new_cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(cache_path + ".tmp", cache_path)
+    return manifest
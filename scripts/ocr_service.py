@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+ocr_service.py - Shared EasyOCR worker process
+
+Loading EasyOCR's detection and recognition models takes several seconds,
+which dominated the latency of every scanned file the watch service picked
+up. This service loads one reader, keeps it warm, and serves OCR requests
+from other processes on the same host over multiprocessing.connection
+(127.0.0.1). Requests from all clients go through one queue and run one at
+a time on the warm reader.
+
+Connections exchange pickles, so the shared secret matters: it comes from
+OCR_SERVICE_AUTHKEY if set, otherwise from OCR_SERVICE_KEY_FILE, a random
+key the service writes on first start with 0600 permissions and clients
+read. Without either, clients do not connect.
+
+Clients get a RemoteOcrReader, which has the readtext / readtext_batched
+methods of easyocr.Reader, so extract_02.extract_pdf_pages uses it as is.
+extract_02, watch_06 and manual_add_07 connect when the service is running
+and load an in-process reader otherwise.
+
+Usage:
+    python scripts/ocr_service.py          # GPU if available
+    python scripts/ocr_service.py --cpu
+"""
+
+import os
+import stat
+import time
+import secrets
+import queue
+import argparse
+import threading
+from multiprocessing.connection import AuthenticationError, Client, Listener
+from typing import List, Optional
+
+OCR_SERVICE_HOST = "127.0.0.1"
+OCR_SERVICE_PORT = int(os.getenv("OCR_SERVICE_PORT", "6010"))
+OCR_SERVICE_KEY_FILE = os.getenv("OCR_SERVICE_KEY_FILE", os.path.expanduser("~/.config/curaj/ocr_service.key"))
+
+READER_METHODS = {"readtext", "readtext_batched"}
+
+
+def load_authkey(create: bool = False) -> Optional[bytes]:
+    """
+    The shared secret: OCR_SERVICE_AUTHKEY, else the key file. With create,
+    a missing key file is generated (owner read/write only); otherwise a
+    missing file returns None. A key file readable by others is refused.
+    """
+    env_key = os.getenv("OCR_SERVICE_AUTHKEY")
+    if env_key:
+        return env_key.encode("utf-8")
+
+    if create and not os.path.exists(OCR_SERVICE_KEY_FILE):
+        os.makedirs(os.path.dirname(OCR_SERVICE_KEY_FILE) or ".", mode=0o700, exist_ok=True)
+        try:
+            fd = os.open(OCR_SERVICE_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass  # another process created it first
+        else:
+            with os.fdopen(fd, "wb") as f:
+                f.write(secrets.token_bytes(32))
+            print(f"Generated OCR service key: {OCR_SERVICE_KEY_FILE}")
+
+    try:
+        mode = os.stat(OCR_SERVICE_KEY_FILE).st_mode
+    except FileNotFoundError:
+        return None
+    if mode & (stat.S_IRWXG | stat.S_IRWXO):
+        raise PermissionError(f"{OCR_SERVICE_KEY_FILE} is accessible by other users; chmod 600 it")
+    with open(OCR_SERVICE_KEY_FILE, "rb") as f:
+        return f.read()
+
+
+class RemoteOcrReader:
+    """Client side of the service; a drop-in for easyocr.Reader's readtext methods."""
+
+    def __init__(self, conn, address, authkey: bytes):
+        self.conn = conn
+        self.address = address
+        self.authkey = authkey
+        self._lock = threading.Lock()  # one request in flight per connection
+
+    def _send(self, request):
+        self.conn.send(request)
+        return self.conn.recv()
+
+    def _call(self, method: str, *args, **kwargs):
+        with self._lock:
+            try:
+                status, value = self._send((method, args, kwargs))
+            except (EOFError, OSError):
+                # The service may have been restarted; reconnect once before giving up
+                try:
+                    self.conn = Client(self.address, authkey=self.authkey)
+                    status, value = self._send((method, args, kwargs))
+                except (EOFError, OSError) as e:
+                    raise RuntimeError(f"Lost connection to the OCR service at {self.address}: {e}")
+        if status == "error":
+            raise RuntimeError(f"OCR service error: {value}")
+        return value
+
+    def readtext(self, image, **kwargs):
+        return self._call("readtext", image, **kwargs)
+
+    def readtext_batched(self, images, **kwargs):
+        return self._call("readtext_batched", images, **kwargs)
+
+    def stats(self) -> dict:
+        return self._call("stats")
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def connect_ocr_service(
+    host: str = OCR_SERVICE_HOST, port: int = OCR_SERVICE_PORT, authkey: Optional[bytes] = None
+) -> Optional[RemoteOcrReader]:
+    """Connect to a running OCR service, or return None if there is none (or no shared key)."""
+    address = (host, port)
+    try:
+        authkey = authkey or load_authkey()
+    except OSError as e:
+        print(f"⚠️  OCR service key unusable: {e}")
+        return None
+    if authkey is None:
+        return None
+    try:
+        return RemoteOcrReader(Client(address, authkey=authkey), address, authkey)
+    except (ConnectionRefusedError, FileNotFoundError):
+        return None
+    except (AuthenticationError, OSError, EOFError) as e:
+        print(f"⚠️  OCR service at {host}:{port} unusable: {e}")
+        return None
+
+
+class OcrService:
+    """
+    Serves a single warm EasyOCR reader to any number of local clients.
+
+    Args:
+        languages: EasyOCR language codes
+        gpu: run the reader on the GPU
+        host, port: listening address
+        authkey: shared secret; load_authkey(create=True) when not given
+    """
+
+    def __init__(
+        self,
+        languages: List[str],
+        gpu: bool = True,
+        host: str = OCR_SERVICE_HOST,
+        port: int = OCR_SERVICE_PORT,
+        authkey: Optional[bytes] = None,
+    ):
+        self.languages = languages
+        self.gpu = gpu
+        self.address = (host, port)
+        self.authkey = authkey or load_authkey(create=True)
+        self.reader = None
+        self.jobs = queue.Queue()
+        self.requests = 0
+        self.images = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.time()
+
+    def _stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "images": self.images,
+            "busy_seconds": round(self.busy_seconds, 1),
+            "queued": self.jobs.qsize(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "gpu": self.gpu,
+        }
+
+    def _serve_client(self, conn) -> None:
+        """Forward one client's requests to the job queue and send back the results."""
+        try:
+            while True:
+                method, args, kwargs = conn.recv()
+                if method == "stats":
+                    conn.send(("ok", self._stats()))
+                    continue
+                if method not in READER_METHODS:
+                    conn.send(("error", f"unknown method {method!r}"))
+                    continue
+                job = {"method": method, "args": args, "kwargs": kwargs, "done": threading.Event()}
+                self.jobs.put(job)
+                job["done"].wait()
+                conn.send(job["reply"])
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _accept_loop(self, listener) -> None:
+        while True:
+            try:
+                conn = listener.accept()
+            except AuthenticationError:
+                print("⚠️  Rejected OCR client with the wrong auth key")
+                continue
+            except OSError:
+                return
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def serve_forever(self) -> None:
+        import easyocr
+
+        # Load the models before listening, so clients only ever see a warm service
+        print(f"Loading EasyOCR ({', '.join(self.languages)}, gpu={self.gpu})...")
+        self.reader = easyocr.Reader(self.languages, gpu=self.gpu)
+
+        listener = Listener(self.address, authkey=self.authkey)
+        threading.Thread(target=self._accept_loop, args=(listener,), daemon=True).start()
+        print(f"✅ OCR service listening on {self.address[0]}:{self.address[1]}")
+
+        try:
+            while True:
+                try:
+                    job = self.jobs.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                start = time.perf_counter()
+                try:
+                    result = getattr(self.reader, job["method"])(*job["args"], **job["kwargs"])
+                    job["reply"] = ("ok", result)
+                except Exception as e:
+                    job["reply"] = ("error", f"{type(e).__name__}: {e}")
+                self.busy_seconds += time.perf_counter() - start
+                self.requests += 1
+                self.images += len(job["args"][0]) if job["method"] == "readtext_batched" else 1
+                job["done"].set()
+        except KeyboardInterrupt:
+            print(f"\nOCR service stopped: {self._stats()}")
+        finally:
+            listener.close()
+
+
+if __name__ == "__main__":
+    from extract_02 import OCR_LANGUAGES
+
+    parser = argparse.ArgumentParser(description="Run a shared EasyOCR worker for extraction and the watch service")
+    parser.add_argument("--cpu", action="store_true", help="Run EasyOCR on the CPU")
+    parser.add_argument("--port", type=int, default=OCR_SERVICE_PORT, help="Port on 127.0.0.1 to listen on")
+    args = parser.parse_args()
+
+    OcrService(OCR_LANGUAGES, gpu=not args.cpu, port=args.port).serve_forever()
@@ -1,18 +1,44 @@
 # test.py (minimal, corrected)
 import os
 import json
+import logging
+import glob
+import gzip
+import time
+import shutil
+import random
+import threading
 import html as html_lib
 from urllib.parse import urlparse, urldefrag, parse_qsl, urlencode, urlunparse
 from datetime import datetime, timezone
 
 import scrapy
+from scrapy import signals
+from scrapy.exceptions import StopDownload
+from scrapy.dupefilters import BaseDupeFilter
 from scrapy.crawler import CrawlerProcess
+from twisted.internet import task
 import requests
 from dotenv import load_dotenv
 
+from crawl_stats import CrawlMetrics, file_saved, sarvam_call
+from crawl_policy import CrawlPolicy, DEFAULT_PATH_BUDGET, MAX_QUERY_VARIANTS, PATH_BUDGETS
+from crawl_state import CrawlStateStore, PageState, ScalableBloomFilter, hash_body
+from summary_cache import SummaryCache, make_cache_key
+from document_store import DocumentDownload, DocumentStore, DocumentTooLarge
+from html_text import extract_page, write_sidecar
+
 # Load environment variables
 load_dotenv()
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
+SARVAM_API_URL = "https://api.sarvam.ai/v1/chat/completions"
+SARVAM_MODEL = "sarvam-2b"  # Adjust model name as per Sarvam AI docs
+SARVAM_PROMPT_VERSION = "1"  # Bump when the summary prompt changes to invalidate cached summaries
+
+# HTTP statuses worth retrying (rate limiting and transient server errors)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# URL -> offset index of the pages file, kept next to it (see PageRecordPipeline)
+PAGES_INDEX_SUFFIX = ".idx"
 
 
 def normalize_url(url: str) -> str:
@@ -61,59 +87,233 @@ def make_cdata(s: str) -> str:
     return "".join(f"<![CDATA[{p}]]>" + ("<!--split-->" if i != len(parts) - 1 else "") for i, p in enumerate(parts))
 
 
-def summarize_with_sarvam(text: str, logger=None) -> str:
+class SitemapWriter:
+    """
+    Stream <url> entries into sitemap shards, rotating at max_urls entries or
+    max_bytes of uncompressed XML (the sitemaps.org limits are 50,000 / 50 MB).
+
+    A single uncompressed shard is renamed to `path`; otherwise shards are kept as
+    <name>-N.xml[.gz] next to it and `path` becomes a sitemap index. Shards are
+    written to .part files and renamed once complete, so a crash never leaves a
+    truncated sitemap behind.
+    """
+
+    HEADER = b'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    FOOTER = b"</urlset>\n"
+
+    def __init__(
+        self,
+        path: str,
+        max_urls: int = 50000,
+        max_bytes: int = 50 * 1024 * 1024,
+        use_gzip: bool = False,
+        base_url: str = "",
+    ):
+        self.path = path
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        self.use_gzip = use_gzip
+        self.base_url = base_url.rstrip("/")
+        root, ext = os.path.splitext(path)
+        self._shard_root = root
+        self._shard_ext = (ext or ".xml") + (".gz" if use_gzip else "")
+        self.shards = []
+        self.total_urls = 0
+        self._fh = None
+        self._part_path = None
+        self._urls = 0
+        self._bytes = 0
+
+    def _shard_path(self, index: int) -> str:
+        return f"{self._shard_root}-{index}{self._shard_ext}"
+
+    def _open_shard(self) -> None:
+        self._part_path = self._shard_path(len(self.shards) + 1) + ".part"
+        if self.use_gzip:
+            self._fh = gzip.open(self._part_path, "wb")
+        else:
+            self._fh = open(self._part_path, "wb", buffering=1024 * 1024)
+        self._fh.write(self.HEADER)
+        self._urls = 0
+        self._bytes = len(self.HEADER)
+
+    def _close_shard(self) -> None:
+        self._fh.write(self.FOOTER)
+        self._fh.close()
+        shard_path = self._part_path[: -len(".part")]
+        os.replace(self._part_path, shard_path)
+        self.shards.append(shard_path)
+        self._fh = None
+        self._part_path = None
+
+    def add(self, loc: str, lastmod: str, summary: str) -> None:
+        entry = (
+            "  <url>\n"
+            f"    <loc>{html_lib.escape(loc)}</loc>\n"
+            f"    <lastmod>{lastmod}</lastmod>\n"
+            f"    <content>{make_cdata(html_lib.escape(summary))}</content>\n"
+            "  </url>\n"
+        ).encode("utf-8")
+
+        if self._fh is not None and (
+            self._urls >= self.max_urls or self._bytes + len(entry) + len(self.FOOTER) > self.max_bytes
+        ):
+            self._close_shard()
+        if self._fh is None:
+            self._open_shard()
+
+        self._fh.write(entry)
+        self._urls += 1
+        self._bytes += len(entry)
+        self.total_urls += 1
+
+    def close(self) -> None:
+        if self._fh is None and not self.shards:
+            # No pages at all: still emit a valid, empty urlset
+            self._open_shard()
+        if self._fh is not None:
+            self._close_shard()
+
+        if len(self.shards) == 1 and not self.use_gzip:
+            os.replace(self.shards[0], self.path)
+            self.shards = [self.path]
+        else:
+            self._write_index()
+
+        # Drop shards left over from an earlier, larger crawl
+        for stale in glob.glob(f"{glob.escape(self._shard_root)}-*{self._shard_ext}"):
+            if stale not in self.shards:
+                os.remove(stale)
+
+    def _write_index(self) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        tmp_path = self.path + ".part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            f.write('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+            for shard in self.shards:
+                name = os.path.basename(shard)
+                loc = f"{self.base_url}/{name}" if self.base_url else name
+                f.write("  <sitemap>\n")
+                f.write(f"    <loc>{html_lib.escape(loc)}</loc>\n")
+                f.write(f"    <lastmod>{now}</lastmod>\n")
+                f.write("  </sitemap>\n")
+            f.write("</sitemapindex>\n")
+        os.replace(tmp_path, self.path)
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing calls at least 1/rate seconds apart.
+    A rate of 0 (or less) disables limiting.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _fallback_summary(text: str) -> str:
+    return text[:2000] + "..." if len(text) > 2000 else text
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUS
+    return False
+
+
+def request_sarvam_summary(
+    text: str,
+    logger=None,
+    max_retries: int = 0,
+    backoff: float = 1.0,
+    rate_limiter: RateLimiter | None = None,
+) -> str | None:
     """
     Summarize text using Sarvam AI API.
-    Falls back to truncated text if API call fails.
+    Retries timeouts, connection errors, 429 and 5xx with exponential backoff.
+    Returns None if the API key is missing or the call ultimately fails.
     """
     if not SARVAM_API_KEY:
         if logger:
             logger.warning("SARVAM_API_KEY not found in .env, using truncated text")
-        return text[:2000] + "..." if len(text) > 2000 else text
+        return None
 
     # Truncate input to avoid token limits (adjust as needed)
     input_text = text[:8000] if len(text) > 8000 else text
 
-    try:
-        # Sarvam AI API endpoint (adjust if different)
-        url = "https://api.sarvam.ai/v1/chat/completions"
-
-        headers = {"Authorization": f"Bearer {SARVAM_API_KEY}", "Content-Type": "application/json"}
-
-        payload = {
-            "model": "sarvam-2b",  # Adjust model name as per Sarvam AI docs
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant that creates concise, informative summaries of webpage content.",
-                },
-                {
-                    "role": "user",
-                    "content": f"Summarize the following webpage content in 2-3 concise paragraphs, highlighting the main topics and key information:\n\n{input_text}",
-                },
-            ],
-            "temperature": 0.3,
-            "max_tokens": 500,
-        }
+    headers = {"Authorization": f"Bearer {SARVAM_API_KEY}", "Content-Type": "application/json"}
+
+    payload = {
+        "model": SARVAM_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": "You are a helpful assistant that creates concise, informative summaries of webpage content.",
+            },
+            {
+                "role": "user",
+                "content": f"Summarize the following webpage content in 2-3 concise paragraphs, highlighting the main topics and key information:\n\n{input_text}",
+            },
+        ],
+        "temperature": 0.3,
+        "max_tokens": 500,
+    }
+
+    for attempt in range(max_retries + 1):
+        try:
+            if rate_limiter:
+                rate_limiter.wait()
+
+            response = requests.post(SARVAM_API_URL, json=payload, headers=headers, timeout=30)
+            response.raise_for_status()
 
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        response.raise_for_status()
+            result = response.json()
+            summary = result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
 
-        result = response.json()
-        summary = result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+            if summary:
+                if logger:
+                    logger.debug(f"Successfully summarized text ({len(text)} -> {len(summary)} chars)")
+                return summary
+            else:
+                raise ValueError("Empty summary returned from API")
 
-        if summary:
+        except Exception as e:
+            if attempt < max_retries and _is_retryable(e):
+                delay = backoff * (2**attempt) + random.uniform(0, backoff)
+                if logger:
+                    logger.warning(f"Sarvam API error: {e}. Retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+                time.sleep(delay)
+                continue
             if logger:
-                logger.debug(f"Successfully summarized text ({len(text)} -> {len(summary)} chars)")
-            return summary
-        else:
-            raise ValueError("Empty summary returned from API")
+                logger.error(f"Sarvam API error: {e}. Using fallback truncation.")
+            break
 
-    except Exception as e:
-        if logger:
-            logger.error(f"Sarvam API error: {e}. Using fallback truncation.")
-        # Fallback to truncated text
-        return text[:2000] + "..." if len(text) > 2000 else text
+    return None
+
+
+def summarize_with_sarvam(text: str, logger=None, **kwargs) -> str:
+    """
+    Summarize text using Sarvam AI API.
+    Falls back to truncated text if API call fails.
+    """
+    summary = request_sarvam_summary(text, logger=logger, **kwargs)
+    # Fallback to truncated text
+    return summary if summary is not None else _fallback_summary(text)
 
 
 def get_file_category(url: str) -> str | None:
@@ -163,161 +363,858 @@ def get_file_category(url: str) -> str | None:
     return None
 
 
-def download_and_save_file(response: scrapy.http.Response, category: str, base_dir: str = "data") -> str | None:
+def make_document_filename(url: str, category: str) -> str:
+    """Build a readable, filesystem-safe file name (with extension) for a document URL."""
+    # Generate safe filename
+    parsed = urlparse(url)
+    net = parsed.netloc.replace(":", "_").replace(".", "_")
+    path = parsed.path.strip("/").replace("/", "_") or "root"
+
+    # Get original extension
+    original_ext = os.path.splitext(parsed.path)[1] or ""
+    if not original_ext and category == "html":
+        original_ext = ".html"
+
+    base_name = f"{net}__{path}"
+    if not base_name.endswith(original_ext):
+        base_name = base_name.rsplit(".", 1)[0] if "." in base_name else base_name
+        base_name += original_ext
+
+    # Truncate if too long
+    if len(base_name) > 200:
+        name_part = base_name[:190]
+        base_name = name_part + original_ext
+
+    return base_name
+
+
+def download_and_save_file(
+    response: scrapy.http.Response,
+    category: str,
+    store: DocumentStore,
+    download: DocumentDownload | None = None,
+    logger=None,
+) -> str | None:
     """
-    Download and save file to categorized folder.
-    Returns the saved file path or None on failure.
+    Save a downloaded file into the content-addressed document store.
+    Uses the already-streamed `download` when given, otherwise the response body.
+    Returns the stored file path or None on failure.
     """
     try:
-        url = response.url
-
-        # Create category directory
-        category_dir = os.path.join(base_dir, category)
-        os.makedirs(category_dir, exist_ok=True)
-
-        # Generate safe filename
-        parsed = urlparse(url)
-        net = parsed.netloc.replace(":", "_").replace(".", "_")
-        path = parsed.path.strip("/").replace("/", "_") or "root"
-
-        # Get original extension
-        original_ext = os.path.splitext(parsed.path)[1] or ""
-        if not original_ext and category == "html":
-            original_ext = ".html"
-
-        # Create unique filename
-        base_name = f"{net}__{path}"
-        if not base_name.endswith(original_ext):
-            base_name = base_name.rsplit(".", 1)[0] if "." in base_name else base_name
-            base_name += original_ext
-
-        # Truncate if too long
-        if len(base_name) > 200:
-            name_part = base_name[:190]
-            base_name = name_part + original_ext
-
-        file_path = os.path.join(category_dir, base_name)
-
-        # Handle duplicates by adding counter
-        counter = 1
-        original_file_path = file_path
-        while os.path.exists(file_path):
-            name_without_ext = os.path.splitext(original_file_path)[0]
-            file_path = f"{name_without_ext}_{counter}{original_ext}"
-            counter += 1
-
-        # Write file
-        with open(file_path, "wb") as f:
-            f.write(response.body)
+        url = normalize_url(response.url)
+        file_name = make_document_filename(response.url, category)
 
+        if download is not None:
+            file_path, is_new = store.commit(download, url, category, file_name)
+        else:
+            file_path, is_new = store.store_bytes(response.body, url, category, file_name)
+
+        if not is_new and logger:
+            logger.debug(f"Already stored (same content): {url} → {file_path}")
         return file_path
 
     except Exception as e:
-        if hasattr(response, "logger"):
-            response.logger.error(f"Failed to save file {response.url}: {e}")
+        if download is not None:
+            download.discard()
+        if logger:
+            logger.error(f"Failed to save file {response.url}: {e}")
         return None
 
 
+class SarvamSummaryPipeline:
+    """
+    Summarize page items on a dedicated worker pool so fetching and summarizing overlap.
+
+    Items carrying "content_text" are handed to SARVAM_WORKERS threads; the text is
+    replaced by a "summary" field once the call returns. When more than
+    SARVAM_QUEUE_SIZE items are waiting, the engine is paused until the backlog
+    drains to half, so memory stays bounded on slow API days.
+
+    Summaries are looked up in a persistent SummaryCache first, and identical
+    texts already in flight share one API call. Counters are reported in the
+    crawl stats under summary_cache/*.
+
+    Settings:
+        SARVAM_WORKERS: concurrent API calls (default 4)
+        SARVAM_QUEUE_SIZE: pending items before downloads are paused (default 64)
+        SARVAM_RATE_LIMIT: max API calls per second, 0 = unlimited (default 2)
+        SARVAM_MAX_RETRIES: retries for 429/5xx/timeouts (default 3)
+        SARVAM_RETRY_BACKOFF: base backoff in seconds (default 1.0)
+        SUMMARY_CACHE_PATH: SQLite cache file, empty to disable (default summary_cache.db)
+        SUMMARY_CACHE_MAX_MB: cache size before LRU eviction (default 64)
+    """
+
+    def __init__(
+        self,
+        crawler,
+        workers: int,
+        queue_size: int,
+        rate_limit: float,
+        max_retries: int,
+        backoff: float,
+        cache_path: str = "",
+        cache_max_mb: float = 64,
+    ):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.cache_path = cache_path
+        self.cache_max_bytes = int(cache_max_mb * 1024 * 1024)
+        self.cache = None
+        self.threadpool = None
+        self.pending = 0
+        self.paused = False
+        self.inflight = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            crawler,
+            workers=settings.getint("SARVAM_WORKERS", 4),
+            queue_size=settings.getint("SARVAM_QUEUE_SIZE", 64),
+            rate_limit=settings.getfloat("SARVAM_RATE_LIMIT", 2.0),
+            max_retries=settings.getint("SARVAM_MAX_RETRIES", 3),
+            backoff=settings.getfloat("SARVAM_RETRY_BACKOFF", 1.0),
+            cache_path=settings.get("SUMMARY_CACHE_PATH", "summary_cache.db"),
+            cache_max_mb=settings.getfloat("SUMMARY_CACHE_MAX_MB", 64),
+        )
+
+    def open_spider(self, spider):
+        from twisted.python.threadpool import ThreadPool
+
+        if self.cache_path:
+            self.cache = SummaryCache(self.cache_path, max_bytes=self.cache_max_bytes)
+        self.threadpool = ThreadPool(minthreads=1, maxthreads=self.workers, name="sarvam")
+        self.threadpool.start()
+
+    def close_spider(self, spider):
+        if self.threadpool is not None:
+            self.threadpool.stop()
+            self.threadpool = None
+        if self.cache is not None:
+            self.stats.set_value("summary_cache/evictions", self.cache.evictions)
+            self.stats.set_value("summary_cache/size_bytes", self.cache.total_bytes)
+            self.cache.close()
+            self.cache = None
+
+    def process_item(self, item, spider):
+        if "content_text" not in item:
+            return item
+
+        from twisted.internet import defer, reactor
+        from twisted.internet.threads import deferToThreadPool
+
+        content_text = item.pop("content_text")
+        key = make_cache_key(content_text[:8000], SARVAM_MODEL, SARVAM_PROMPT_VERSION)
+
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats.inc_value("summary_cache/hit")
+                item["summary"] = cached
+                return item
+            self.stats.inc_value("summary_cache/miss")
+
+        # Same text already being summarized: wait for that call instead of making another
+        if key in self.inflight:
+            self.stats.inc_value("summary_cache/coalesced")
+            d = defer.Deferred()
+            self.inflight[key].append(d)
+            d.addCallback(self._attach_summary, item)
+            return d
+
+        self.inflight[key] = []
+        self._acquire(spider)
+
+        d = deferToThreadPool(reactor, self.threadpool, self._timed_summary, content_text, spider.logger)
+        d.addBoth(self._finish_summary, key, content_text, spider)
+        d.addCallback(self._attach_summary, item)
+        d.addBoth(self._release, spider)
+        return d
+
+    def _timed_summary(self, content_text: str, logger) -> tuple:
+        """Runs on a worker thread: call Sarvam and measure how long it took."""
+        start = time.perf_counter()
+        summary = request_sarvam_summary(content_text, logger, self.max_retries, self.backoff, self.rate_limiter)
+        return summary, time.perf_counter() - start
+
+    def _finish_summary(self, result, key: str, content_text: str, spider) -> str:
+        if isinstance(result, tuple):
+            summary, latency = result
+            self.crawler.signals.send_catch_log(signal=sarvam_call, latency=latency, ok=summary is not None)
+        else:
+            summary = None
+            spider.logger.error(f"Summary worker failed: {result}")
+        if summary is not None and self.cache is not None:
+            self.cache.put(key, summary)
+        if summary is None:
+            summary = _fallback_summary(content_text)
+
+        for waiter in self.inflight.pop(key, []):
+            waiter.callback(summary)
+        return summary
+
+    def _attach_summary(self, summary, item):
+        item["summary"] = summary
+        return item
+
+    def _acquire(self, spider):
+        self.pending += 1
+        if self.pending >= self.queue_size and not self.paused:
+            spider.logger.info(f"Summary queue full ({self.pending} pending), pausing downloads")
+            self.crawler.engine.pause()
+            self.paused = True
+
+    def _release(self, result, spider):
+        self.pending -= 1
+        if self.paused and self.pending <= self.queue_size // 2:
+            spider.logger.info(f"Summary queue drained ({self.pending} pending), resuming downloads")
+            self.crawler.engine.unpause()
+            self.paused = False
+        return result
+
+
+def trim_partial_line(path: str) -> None:
+    """Drop a torn trailing line (left by a crash mid-write) from a JSON-lines file."""
+    if not os.path.exists(path):
+        return
+
+    with open(path, "rb+") as fh:
+        size = fh.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - 64 * 1024)
+            fh.seek(start)
+            chunk = fh.read(end - start)
+            pos = chunk.rfind(b"\n")
+            if pos != -1:
+                end = start + pos + 1
+                break
+            end = start
+        if end != size:
+            fh.truncate(end)
+
+
+class PageRecordPipeline:
+    """
+    Write page records through one buffered handle and stream them into the sitemap.
+
+    Buffered records are written as whole lines and fsynced once PAGES_FLUSH_BYTES
+    are pending, and by a reactor timer every PAGES_FLUSH_SECONDS, so records do
+    not wait for the next item during long gaps; a torn last line from a crash is
+    trimmed on the next open. Records from earlier runs that were not re-crawled are
+    carried into the sitemap at close (a fresh crawl reads nothing back), and the
+    pages file is compacted to one record per URL once stale duplicates exceed
+    PAGES_COMPACT_RATIO of its lines. Both read the URL -> offset index kept in
+    pages.jl.idx, so closing seeks to live records instead of re-reading the file.
+
+    Items of changed pages carry their new crawl state under "_crawl_state"; it is
+    handed to spider.commit_crawl_states() only after the record is fsynced, so a
+    crash never leaves a page marked unchanged without its record.
+
+    Settings:
+        PAGES_FLUSH_BYTES, PAGES_FLUSH_SECONDS, PAGES_COMPACT_RATIO,
+        SITEMAP_MAX_URLS, SITEMAP_MAX_BYTES, SITEMAP_GZIP, SITEMAP_BASE_URL
+    """
+
+    def __init__(
+        self,
+        flush_bytes: int = 256 * 1024,
+        flush_seconds: float = 5.0,
+        compact_ratio: float = 0.25,
+        sitemap_max_urls: int = 50000,
+        sitemap_max_bytes: int = 50 * 1024 * 1024,
+        sitemap_gzip: bool = False,
+        sitemap_base_url: str = "",
+    ):
+        self.flush_bytes = flush_bytes
+        self.flush_seconds = flush_seconds
+        self.compact_ratio = compact_ratio
+        self.sitemap_max_urls = sitemap_max_urls
+        self.sitemap_max_bytes = sitemap_max_bytes
+        self.sitemap_gzip = sitemap_gzip
+        self.sitemap_base_url = sitemap_base_url
+        self.fh = None
+        self.sitemap = None
+        self._flush_loop = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            flush_bytes=settings.getint("PAGES_FLUSH_BYTES", 256 * 1024),
+            flush_seconds=settings.getfloat("PAGES_FLUSH_SECONDS", 5.0),
+            compact_ratio=settings.getfloat("PAGES_COMPACT_RATIO", 0.25),
+            sitemap_max_urls=settings.getint("SITEMAP_MAX_URLS", 50000),
+            sitemap_max_bytes=settings.getint("SITEMAP_MAX_BYTES", 50 * 1024 * 1024),
+            sitemap_gzip=settings.getbool("SITEMAP_GZIP", False),
+            sitemap_base_url=settings.get("SITEMAP_BASE_URL", ""),
+        )
+
+    def open_spider(self, spider):
+        self.pages_file = spider.pages_file
+        self.index_path = self.pages_file + PAGES_INDEX_SUFFIX
+        trim_partial_line(self.pages_file)
+        self.run_start = os.path.getsize(self.pages_file) if os.path.exists(self.pages_file) else 0
+        self.end = self.run_start
+        self.offsets, self.lines = self._load_index()
+        self.fh = open(self.pages_file, "ab")
+        self.spider = spider
+        self.buffer = []
+        self.buffer_states = []
+        self.buffered_bytes = 0
+        self.written_urls = set()
+        self.sitemap = SitemapWriter(
+            spider.sitemap_file,
+            max_urls=self.sitemap_max_urls,
+            max_bytes=self.sitemap_max_bytes,
+            use_gzip=self.sitemap_gzip,
+            base_url=self.sitemap_base_url,
+        )
+        self._flush_loop = task.LoopingCall(self._timed_flush, spider)
+        self._flush_loop.start(self.flush_seconds, now=False)
+
+    def _timed_flush(self, spider) -> None:
+        # An exception would stop the LoopingCall, so log it and keep the timer running
+        try:
+            self.flush()
+        except Exception as e:
+            spider.logger.error(f"Periodic flush of {self.pages_file} failed: {e}")
+
+    def process_item(self, item, spider):
+        state = item.pop("_crawl_state", None)
+        if state is not None:
+            self.buffer_states.append(state)
+        url = item.get("url")
+        line = (json.dumps(dict(item), ensure_ascii=False) + "\n").encode("utf-8")
+        self.buffer.append((url, line))
+        self.buffered_bytes += len(line)
+
+        if url not in self.written_urls:
+            self.written_urls.add(url)
+            self.sitemap.add(url, item.get("fetched_at", ""), item.get("summary", ""))
+
+        if self.buffered_bytes >= self.flush_bytes:
+            self.flush()
+
+        spider.logger.info(f"Saved page: {url}")
+        return item
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.fh.write(b"".join(line for _, line in self.buffer))
+            self.fh.flush()
+            os.fsync(self.fh.fileno())
+            for url, line in self.buffer:
+                self.offsets[url] = self.end
+                self.end += len(line)
+            self.lines += len(self.buffer)
+        self.buffer = []
+        self.buffered_bytes = 0
+        states, self.buffer_states = self.buffer_states, []
+        commit = getattr(self.spider, "commit_crawl_states", None)
+        if commit is not None:
+            commit(states)
+
+    def close_spider(self, spider):
+        if self._flush_loop is not None and self._flush_loop.running:
+            self._flush_loop.stop()
+        self._flush_loop = None
+        self.flush()
+        self.fh.close()
+        self.fh = None
+
+        carried = self._carry_over_previous()
+        self.sitemap.close()
+
+        stale = self.lines - len(self.offsets)
+        if stale and stale >= self.compact_ratio * self.lines:
+            kept = self._compact()
+            spider.logger.info(f"Compacted {self.pages_file}: dropped {stale} stale records, {kept} kept")
+        self._save_index()
+
+        spider.logger.info(
+            f"[✅] Sitemap saved as {spider.sitemap_file} "
+            f"({self.sitemap.total_urls} urls, {len(self.sitemap.shards)} file(s); {carried} carried over)"
+        )
+
+    def _load_index(self) -> tuple:
+        """
+        Load URL -> offset of its latest record and the record count from the index
+        saved at the last close, then index whatever was appended after it (a crashed
+        run skips the save). A missing or mismatched index is rebuilt with one scan.
+        """
+        offsets, lines, indexed = {}, 0, 0
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved["size"] <= self.run_start and self._record_matches(saved["offsets"]):
+                offsets, lines, indexed = saved["offsets"], saved["lines"], saved["size"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return offsets, lines + self._index_records(offsets, indexed, self.run_start)
+
+    def _record_matches(self, offsets: dict) -> bool:
+        """Spot-check the newest indexed record, so an index of a replaced pages file is not trusted."""
+        if not offsets:
+            return True
+        url, offset = max(offsets.items(), key=lambda kv: kv[1])
+        try:
+            with open(self.pages_file, "rb") as fh:
+                fh.seek(offset)
+                return json.loads(fh.readline()).get("url") == url
+        except (OSError, ValueError, AttributeError):
+            return False
+
+    def _index_records(self, offsets: dict, start: int, end: int) -> int:
+        """Add the records between byte offsets start and end to offsets; returns how many were read."""
+        if start >= end:
+            return 0
+        lines = 0
+        with open(self.pages_file, "rb") as fh:
+            fh.seek(start)
+            offset = start
+            while offset < end:
+                line = fh.readline()
+                if not line:
+                    break
+                try:
+                    url = json.loads(line).get("url")
+                except Exception:
+                    url = None
+                if url:
+                    offsets[url] = offset
+                    lines += 1
+                offset += len(line)
+        return lines
+
+    def _save_index(self) -> None:
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"size": self.end, "lines": self.lines, "offsets": self.offsets}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def _carry_over_previous(self) -> int:
+        """Add pages from earlier runs that were not re-written now; returns how many."""
+        # URLs written this run point past run_start, so only untouched pages remain below it
+        keep = sorted(off for off in self.offsets.values() if off < self.run_start)
+        if not keep:
+            return 0
+
+        with open(self.pages_file, "rb") as fh:
+            for off in keep:
+                fh.seek(off)
+                rec = json.loads(fh.readline())
+                self.sitemap.add(rec.get("url"), rec.get("fetched_at", ""), rec.get("summary", ""))
+        return len(keep)
+
+    def _compact(self) -> int:
+        """Rewrite the pages file with only the latest record per URL (atomic replace)."""
+        tmp_path = self.pages_file + ".tmp"
+        offsets = {}
+        with open(self.pages_file, "rb") as src, open(tmp_path, "wb") as dst:
+            for url, off in sorted(self.offsets.items(), key=lambda kv: kv[1]):
+                src.seek(off)
+                offsets[url] = dst.tell()
+                dst.write(src.readline())
+            dst.flush()
+            os.fsync(dst.fileno())
+            end = dst.tell()
+        os.replace(tmp_path, self.pages_file)
+        self.offsets, self.lines, self.end = offsets, len(offsets), end
+        return len(offsets)
+
+
+def load_bloom(path: str, capacity: int, error_rate: float, log) -> ScalableBloomFilter:
+    """Load a saved Bloom filter; an unreadable one is logged and replaced by an empty filter."""
+    try:
+        return ScalableBloomFilter.load(path, capacity, error_rate)
+    except ValueError as e:
+        log.warning(f"{e}; starting with an empty filter")
+        return ScalableBloomFilter(capacity, error_rate)
+
+
+class BloomDupeFilter(BaseDupeFilter):
+    """
+    Request dupe filter over normalized URLs, backed by a persistent scalable Bloom filter.
+
+    The filter is saved to JOBDIR when the crawl stops early (timeout, Ctrl+C) so the
+    next run resumes with it, and discarded when the crawl finishes so the next
+    scheduled crawl starts fresh.
+
+    Settings: JOBDIR, VISITED_CAPACITY, VISITED_ERROR_RATE
+    """
+
+    def __init__(self, path: str | None = None, capacity: int = 100000, error_rate: float = 0.001):
+        self.path = path
+        self.logger = logging.getLogger(__name__)  # as scrapy's RFPDupeFilter does
+        if path:
+            self.seen = load_bloom(path, capacity, error_rate, self.logger)
+        else:
+            self.seen = ScalableBloomFilter(capacity, error_rate)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        jobdir = settings.get("JOBDIR")
+        return cls(
+            path=os.path.join(jobdir, "requests.bloom") if jobdir else None,
+            capacity=settings.getint("VISITED_CAPACITY", 100000),
+            error_rate=settings.getfloat("VISITED_ERROR_RATE", 0.001),
+        )
+
+    def request_seen(self, request) -> bool:
+        return not self.seen.add(f"{request.method} {normalize_url(request.url)}")
+
+    def close(self, reason):
+        if not self.path:
+            return
+        if reason == "finished":
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        else:
+            self.seen.save(self.path)
+
+
 class SitemapSpider(scrapy.Spider):
     name = "sitemap_spider"
     start_urls = ["https://www.curaj.ac.in/"]
     allowed_domains = [urlparse(start_urls[0]).netloc]
 
-    visited_urls = set()
     pages_file = "pages.jl"
     sitemap_file = "generated_sitemap.xml"
 
     # File download configuration
     data_dir = "data"
     enable_file_download = True
+    max_document_mb = 50  # PDFs/Office files larger than this are cancelled mid-download
+
+    # Incremental re-crawl: conditional requests + body hashes per normalized URL
+    incremental = True
+    state_db = "crawl_state.db"
 
     custom_settings = {
         "CLOSESPIDER_TIMEOUT": 120,
         "DEPTH_LIMIT": 5,
-        "DOWNLOAD_DELAY": 0.5,  # Increased to be gentle on API rate limits
+        "DOWNLOAD_DELAY": 0.5,  # Politeness delay; Sarvam calls are throttled separately
         "LOG_ENABLED": True,
         "ROBOTSTXT_OBEY": True,
         "DOWNLOAD_FAIL_ON_DATALOSS": False,
+        # Resumable frontier: disk-backed request queue + Bloom-filter dupe filter
+        "JOBDIR": "crawls/sitemap_spider",
+        "DUPEFILTER_CLASS": BloomDupeFilter,
+        "VISITED_CAPACITY": 100000,
+        "VISITED_ERROR_RATE": 0.001,
+        # Link prioritisation, per-path budgets and trap detection (see crawl_policy.py)
+        "CRAWL_PATH_BUDGETS": PATH_BUDGETS,
+        "CRAWL_DEFAULT_PATH_BUDGET": DEFAULT_PATH_BUDGET,
+        "CRAWL_MAX_QUERY_VARIANTS": MAX_QUERY_VARIANTS,
+        "ITEM_PIPELINES": {
+            SarvamSummaryPipeline: 300,
+            PageRecordPipeline: 800,
+        },
+        # Summarization worker pool (see SarvamSummaryPipeline)
+        "SARVAM_WORKERS": 4,
+        "SARVAM_QUEUE_SIZE": 64,
+        "SARVAM_RATE_LIMIT": 2.0,
+        "SARVAM_MAX_RETRIES": 3,
+        "SARVAM_RETRY_BACKOFF": 1.0,
+        # Persistent summary cache (see summary_cache.py)
+        "SUMMARY_CACHE_PATH": "summary_cache.db",
+        "SUMMARY_CACHE_MAX_MB": 64,
+        # Latency/size histograms, JSON run report and Prometheus metrics (see crawl_stats.py)
+        "EXTENSIONS": {CrawlMetrics: 500},
+        "CRAWL_REPORT_FILE": "crawl_report.json",
+        "CRAWL_METRICS_FILE": "crawl_metrics.prom",
+        "CRAWL_METRICS_INTERVAL": 10.0,
+        "CRAWL_METRICS_PORT": 0,
+        # Buffered pages.jl writer and sharded sitemap (see PageRecordPipeline)
+        "PAGES_FLUSH_BYTES": 256 * 1024,
+        "PAGES_FLUSH_SECONDS": 5.0,
+        "SITEMAP_MAX_URLS": 50000,
+        "SITEMAP_MAX_BYTES": 50 * 1024 * 1024,
+        "SITEMAP_GZIP": False,
     }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.crawl_state = CrawlStateStore(self.state_db) if self.incremental else None
+        max_bytes = int(self.max_document_mb * 1024 * 1024)
+        self.document_store = DocumentStore(self.data_dir, max_bytes=max_bytes)
+        # In-flight document downloads being streamed to disk, keyed by request
+        self.downloads = {}
+        # Crawl states of saved documents, recorded at the next commit_crawl_states()
+        self.pending_states = []
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(spider.on_bytes_received, signal=signals.bytes_received)
+
+        # Visited URLs (after redirects) survive an interrupted crawl alongside the request queue
+        settings = crawler.settings
+        jobdir = settings.get("JOBDIR")
+        spider.visited_path = os.path.join(jobdir, "visited.bloom") if jobdir else None
+        capacity = settings.getint("VISITED_CAPACITY", 100000)
+        error_rate = settings.getfloat("VISITED_ERROR_RATE", 0.001)
+        if spider.visited_path:
+            spider.visited_urls = load_bloom(spider.visited_path, capacity, error_rate, spider.logger)
+            if len(spider.visited_urls):
+                spider.logger.info(f"Resuming crawl: {len(spider.visited_urls)} urls already visited")
+        else:
+            spider.visited_urls = ScalableBloomFilter(capacity, error_rate)
+
+        spider.policy = CrawlPolicy(
+            path_budgets=settings.getdict("CRAWL_PATH_BUDGETS", PATH_BUDGETS),
+            default_budget=settings.getint("CRAWL_DEFAULT_PATH_BUDGET", DEFAULT_PATH_BUDGET),
+            max_query_variants=settings.getint("CRAWL_MAX_QUERY_VARIANTS", MAX_QUERY_VARIANTS),
+        )
+        spider.jobdir = jobdir
+        if jobdir:
+            try:
+                if spider.policy.restore(jobdir):
+                    scheduled = sum(spider.policy.prefix_counts.values())
+                    spider.logger.info(f"Resuming crawl policy: {scheduled} urls already scheduled")
+            except (OSError, ValueError) as e:
+                spider.logger.warning(f"Could not restore crawl policy from {jobdir}: {e}")
+        return spider
+
+    def make_request(self, url: str, depth: int = 0, **kwargs) -> scrapy.Request:
+        """
+        Build a request, adding conditional headers when the URL was seen before
+        and a priority from the crawl policy.
+        """
+        meta = kwargs.setdefault("meta", {})
+        state = self.crawl_state.get(normalize_url(url)) if self.crawl_state is not None else None
+        if state is not None:
+            headers = state.conditional_headers()
+            if headers:
+                kwargs.setdefault("headers", {}).update(headers)
+                meta["handle_httpstatus_list"] = [304]
+
+        category = get_file_category(url)
+        meta["file_category"] = category
+        kwargs.setdefault("priority", self.policy.priority(url, category, depth, state.fetched_at if state else None))
+
+        # PDFs and Office files are streamed to disk as they arrive (see on_bytes_received)
+        if self.enable_file_download and category in ("pdf", "docs"):
+            meta["stream_to_disk"] = True
+            meta["download_maxsize"] = self.document_store.max_bytes
+        return scrapy.Request(url, callback=self.parse, errback=self.on_request_failed, **kwargs)
+
+    def on_bytes_received(self, data, request, spider):
+        """Append each received chunk of a document to its temp file, hashing as it goes."""
+        if not request.meta.get("stream_to_disk"):
+            return
+
+        download = self.downloads.get(request)
+        if download is None:
+            # A redirect copies meta onto the new request: the previous hop's body is not the document
+            self.pop_download(request)
+            download = self.downloads[request] = self.document_store.open_download()
+            request.meta["download_request"] = request
+        try:
+            download.write(data)
+        except DocumentTooLarge as e:
+            self.downloads.pop(request, None)
+            self.logger.warning(f"Skipping {request.url}: {e}")
+            raise StopDownload(fail=True)
+
+    def pop_download(self, request) -> DocumentDownload | None:
+        """
+        Take the streamed download of request, discarding one left by an earlier
+        hop of the same request (a redirect) so its temp file does not linger.
+        """
+        download = self.downloads.pop(request, None)
+        previous = request.meta.get("download_request")
+        if previous is not None and previous is not request:
+            stale = self.downloads.pop(previous, None)
+            if stale is not None:
+                stale.discard()
+        return download
+
+    def on_request_failed(self, failure):
+        request = failure.request
+        download = self.pop_download(request)
+        if download is not None:
+            download.discard()
+        self.logger.warning(f"Request failed: {request.url} ({failure.value!r})")
+
     async def start(self):
         for u in self.start_urls:
-            yield scrapy.Request(u, callback=self.parse, dont_filter=True)
+            yield self.make_request(u, dont_filter=True, priority=100)
 
     def parse(self, response):
         url = normalize_url(response.url)
+        download = self.pop_download(response.request)
         if url in self.visited_urls:
+            if download is not None:
+                download.discard()
             return
         self.visited_urls.add(url)
 
+        previous = self.crawl_state.get(url) if self.crawl_state is not None else None
+
+        if response.status == 304:
+            if download is not None:
+                download.discard()
+            # Not modified: nothing to save or summarize, follow the links we stored last time
+            self.crawler.stats.inc_value("crawl_state/not_modified")
+            self.logger.debug(f"Not modified: {url}")
+            yield from self.follow_links(response, previous.links if previous else [])
+            return
+
+        if download is not None:
+            download.finish()
+            body_hash = download.hexdigest()
+        else:
+            body_hash = hash_body(response.body)
+        changed = previous is None or previous.body_hash != body_hash
+        if not changed:
+            self.crawler.stats.inc_value("crawl_state/unchanged")
+            if download is not None:
+                download.discard()
+
+        links = self.extract_links(response) if is_html_response(response) else []
+        state = None
+        if self.crawl_state is not None:
+            state = PageState(
+                url=url,
+                etag=response.headers.get("ETag", b"").decode("latin-1") or None,
+                last_modified=response.headers.get("Last-Modified", b"").decode("latin-1") or None,
+                body_hash=body_hash,
+                links=links,
+            )
+
+        if changed:
+            # The new state is recorded once the page's outputs are durable (see commit_crawl_states)
+            yield from self.process_changed(response, url, download, state)
+        elif state is not None:
+            self.crawl_state.update(state)
+
+        yield from self.follow_links(response, links)
+
+    def process_changed(
+        self, response, url: str, download: DocumentDownload | None = None, state: PageState | None = None
+    ):
+        """
+        Save and summarize a page whose body is new or changed since the last crawl.
+        `state` is recorded only if the save succeeded: with the page record for
+        HTML pages, at the next checkpoint for documents.
+        """
         # Check if this is a downloadable file (PDF, docs, HTML file)
         file_category = get_file_category(response.url)
 
-        # Download and save files to categorized folders
+        # One pass over the lxml tree the selectors already built: cleaned text + metadata
+        page = None
+        if is_html_response(response) and isinstance(response, scrapy.http.TextResponse):
+            page = extract_page(response.selector.root)
+
+        # Save files to categorized folders (content-addressed, see document_store.py)
         if file_category and self.enable_file_download:
-            file_path = download_and_save_file(response, file_category, self.data_dir)
+            start = time.perf_counter()
+            size = download.size if download is not None else len(response.body)
+            file_path = download_and_save_file(response, file_category, self.document_store, download, self.logger)
+            self.crawler.signals.send_catch_log(
+                signal=file_saved, category=file_category, latency=time.perf_counter() - start, size=size
+            )
             if file_path:
                 self.logger.info(f"📁 Saved {file_category}: {url} → {file_path}")
+                if page is not None and file_category == "html":
+                    # extract_02.extract_html reads this instead of re-parsing the HTML
+                    write_sidecar(file_path, {"url": url, **page})
+            else:
+                # Not stored: leave the old state so the next crawl fetches it again
+                state = None
+        elif download is not None:
+            download.discard()
 
         # Continue with HTML page processing (summarization)
-        if not is_html_response(response):
+        if page is None:
             self.logger.debug(f"Skipping non-HTML: {response.url}")
+            if state is not None:
+                self.pending_states.append(state)
             return
 
-        raw_html = response.text or ""
-        title = response.xpath("//title/text()").get() or ""
-        text_nodes = response.xpath("//body//text()[normalize-space()]").getall()
-        content_text = " ".join(t.strip() for t in text_nodes)
-        content_text = html_lib.unescape(content_text)
-
         fetched_at = datetime.now(timezone.utc).isoformat()
 
-        # Generate summary using Sarvam AI
-        summary = summarize_with_sarvam(content_text, logger=self.logger)
-
-        rec = {
+        # Summary is filled in asynchronously by SarvamSummaryPipeline
+        yield {
             "url": url,
-            "title": title.strip(),
-            "summary": summary,
+            "title": page["title"],
+            "description": page["description"],
+            "language": page["language"],
+            "content_text": page["text"],
             "fetched_at": fetched_at,
+            "_crawl_state": state,
         }
 
-        with open(self.pages_file, "a", encoding="utf-8") as fh:
-            fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
-
-        self.logger.info(f"Saved page: {url}")
+    def commit_crawl_states(self, states: list) -> None:
+        """
+        Record crawl states whose outputs are durable: the page records were
+        fsynced by PageRecordPipeline, and the document manifest is saved here first.
+        """
+        if self.crawl_state is None:
+            return
+        states = self.pending_states + list(states)
+        self.pending_states = []
+        if not states:
+            return
+        self.document_store.save()
+        for state in states:
+            self.crawl_state.update(state)
+        self.crawl_state.commit()
 
+    def extract_links(self, response) -> list:
+        """Return normalized same-domain links found on an HTML page."""
         domain_root = urlparse(response.url).scheme + "://" + urlparse(response.url).netloc
+        links = []
+        seen = set()
         for link in response.css("a::attr(href)").getall():
-            absolute = response.urljoin(link)
-            absolute = normalize_url(absolute)
-            if absolute.startswith(domain_root) and absolute not in self.visited_urls:
-                yield scrapy.Request(absolute, callback=self.parse)
+            absolute = normalize_url(response.urljoin(link))
+            if absolute.startswith(domain_root) and absolute not in seen:
+                seen.add(absolute)
+                links.append(absolute)
+        return links
+
+    def follow_links(self, response, links: list):
+        depth = response.meta.get("depth", 0) + 1
+        for absolute in links:
+            if absolute in self.visited_urls:
+                continue
+            reason = self.policy.admit(absolute)
+            if reason:
+                if reason != "duplicate":
+                    self.crawler.stats.inc_value(f"crawl_policy/dropped/{reason}")
+                    self.logger.debug(f"Dropped {absolute}: {reason}")
+                continue
+            yield self.make_request(absolute, depth=depth)
 
     def closed(self, reason):
-        now = datetime.now(timezone.utc).isoformat()
-        with open(self.sitemap_file, "w", encoding="utf-8") as f:
-            f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-            f.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
-            if os.path.exists(self.pages_file):
-                with open(self.pages_file, "r", encoding="utf-8") as fh:
-                    for line in fh:
-                        try:
-                            rec = json.loads(line)
-                        except Exception:
-                            continue
-                        loc = rec.get("url")
-                        lastmod = rec.get("fetched_at", now)
-                        summary = rec.get("summary", "")
-                        summary_escaped = html_lib.escape(summary)
-                        f.write("  <url>\n")
-                        f.write(f"    <loc>{loc}</loc>\n")
-                        f.write(f"    <lastmod>{lastmod}</lastmod>\n")
-                        f.write(f"    <content>{make_cdata(summary_escaped)}</content>\n")
-                        f.write("  </url>\n")
-            f.write("</urlset>\n")
-        self.logger.info(f"[✅] Sitemap saved as {self.sitemap_file} ({len(self.visited_urls)} urls)")
-        self.logger.info(f"[✅] Page records saved as {self.pages_file}")
+        if self.crawl_state is not None:
+            self.commit_crawl_states([])
+            self.crawl_state.close()
+        for download in self.downloads.values():
+            download.discard()
+        self.document_store.close()
+
+        if self.visited_path:
+            if reason == "finished":
+                # Crawl complete: the next run is a fresh (incremental) crawl, not a resume
+                if os.path.exists(self.visited_path):
+                    os.remove(self.visited_path)
+                self.policy.discard(self.jobdir)
+            else:
+                self.visited_urls.save(self.visited_path)
+                self.policy.save(self.jobdir)
+                self.logger.info(f"Crawl stopped ({reason}); run again to resume from {self.visited_path}")
+
+        self.logger.info(f"[✅] Page records saved as {self.pages_file} ({len(self.visited_urls)} urls visited)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+"""
+summary_cache.py - On-disk cache for Sarvam page summaries
+
+Summaries are keyed by a hash of the whitespace-normalized page text plus
+the model name and prompt version, so duplicate pages (printer views,
+query-string variants, re-crawls of unchanged content) never pay for a
+second API call. The cache is a single SQLite file with LRU eviction once
+the stored summaries exceed a byte budget.
+"""
+
+import re
+import time
+import sqlite3
+import hashlib
+import unicodedata
+from typing import Optional
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode and collapse whitespace so trivial layout differences hash the same."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def make_cache_key(text: str, model: str, prompt_version: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{model}\x00{prompt_version}\x00".encode("utf-8"))
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """
+    SQLite-backed LRU cache of summaries.
+
+    Args:
+        db_path: SQLite file to use (created if missing)
+        max_bytes: total summary size kept before least-recently-used entries are evicted
+    """
+
+    def __init__(self, db_path: str = "summary_cache.db", max_bytes: int = 64 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_last_used ON summaries (last_used)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        return row[0]
+
+    def put(self, key: str, summary: str) -> None:
+        size = len(summary.encode("utf-8"))
+        old = self.conn.execute("SELECT size FROM summaries WHERE key = ?", (key,)).fetchone()
+        if old is not None:
+            self.total_bytes -= old[0]
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO summaries (key, summary, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, summary, size, time.time()),
+        )
+        self.total_bytes += size
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes:
+            rows = self.conn.execute("SELECT key, size FROM summaries ORDER BY last_used ASC LIMIT 100").fetchall()
+            if not rows:
+                self.total_bytes = 0
+                return
+            for key, size in rows:
+                if self.total_bytes <= self.max_bytes:
+                    return
+                self.conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                self.total_bytes -= size
+                self.evictions += 1
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
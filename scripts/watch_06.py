@@ -26,6 +26,8 @@ import os
 import sys
 import shutil
 import signal
+import time
+import random
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Tuple, List
@@ -46,11 +48,14 @@ from extract_02 import (
     extract_pptx,
     extract_html,
     extract_txt,
+    extract_pdf_pages,
     clean_text,
-    is_digital,
 )
 from classifier_03 import load_model, classify_text
-from curation_04 import embed_and_insert, create_collection
+from ocr_service import connect_ocr_service
+from curation_04 import embed_chunks, insert_embedded, create_collection
+from embedding_classifier import EmbeddingClassifier, document_vector
+from cascade_classifier import CASCADE_AUDIT_RATE, CASCADE_CONFIDENCE, CascadeClassifier, CascadeMetrics
 
 # Load environment
 load_dotenv()
@@ -68,6 +73,17 @@ PROCESSED_DIR = os.path.join(WATCH_BASE_DIR, "processed")
 # Hybrid classification threshold
 CONFIDENCE_THRESHOLD = 0.60
 
+# "nli" (mDeBERTa zero-shot) or "embedding" (head on the bge-m3 vectors, see embedding_classifier.py)
+WATCH_CLASSIFIER = os.getenv("WATCH_CLASSIFIER", "nli")
+
+# Keyword/date first stage in front of WATCH_CLASSIFIER (see cascade_classifier.py); set to 0 to disable
+WATCH_CASCADE = os.getenv("WATCH_CASCADE", "1") != "0"
+CASCADE_METRICS_PATH = os.path.join(WATCH_BASE_DIR, "cascade_metrics.json")
+
+# The OCR time/memory budget of extract_02 drops pages for a later --deferred run, which
+# never happens for a single watched file; it is off unless WATCH_OCR_LIMITS=1
+WATCH_OCR_LIMITS = os.getenv("WATCH_OCR_LIMITS", "0") == "1"
+
 # Supported file extensions
 SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".xlsx", ".pptx", ".html", ".htm", ".txt"}
 
@@ -80,6 +96,10 @@ classifier_model = None
 classifier_tokenizer = None
 classifier_device = None
 weaviate_client = None
+ocr_reader = None
+embedding_classifier = None
+cascade_classifier = None
+cascade_metrics = None
 running = True
 
 
@@ -96,6 +116,50 @@ def init_classifier():
         print("✅ Classification model ready")
 
 
+def init_embedding_classifier() -> Optional[EmbeddingClassifier]:
+    """Load the trained embedding classifier head (lazy loading); None if it was never trained"""
+    global embedding_classifier
+
+    if embedding_classifier is None:
+        embedding_classifier = EmbeddingClassifier.load()
+        if embedding_classifier is None:
+            print("⚠️  No trained embedding classifier (run embedding_classifier.py); using the NLI model")
+        else:
+            print("✅ Embedding classifier ready")
+    return embedding_classifier
+
+
+def init_cascade() -> Optional[CascadeClassifier]:
+    """Load the cascade's first stage and its metrics (lazy loading); None if disabled or never trained"""
+    global cascade_classifier, cascade_metrics
+
+    if WATCH_CASCADE and cascade_classifier is None:
+        cascade_classifier = CascadeClassifier.load()
+        if cascade_classifier is None:
+            print("⚠️  No trained cascade classifier (run cascade_classifier.py); every file goes to the full classifier")
+        else:
+            cascade_metrics = CascadeMetrics(CASCADE_METRICS_PATH)
+            print("✅ Cascade classifier ready")
+    return cascade_classifier
+
+
+def get_ocr_reader():
+    """EasyOCR reader for scanned PDF pages: the shared OCR service if running, else a local CPU reader"""
+    global ocr_reader
+
+    if ocr_reader is None:
+        ocr_reader = connect_ocr_service()
+        if ocr_reader is not None:
+            print("✅ Using the shared OCR service")
+            return ocr_reader
+
+        import easyocr
+
+        print("🔧 Initializing EasyOCR...")
+        ocr_reader = easyocr.Reader(["hi", "en"], gpu=False)
+    return ocr_reader
+
+
 def init_weaviate():
     """Initialize Weaviate client"""
     global weaviate_client
@@ -129,36 +193,14 @@ def extract_text_from_file(file_path: str) -> Optional[str]:
 
     try:
         if ext == ".pdf":
-            # PDF needs special handling - extract_pdf returns text directly
-            import fitz
-
-            if is_digital(file_path):
-                # Digital PDF
-                with fitz.open(file_path) as doc:
-                    text_parts = []
-                    for page_num, page in enumerate(doc, 1):
-                        text = page.get_text()
-                        if text.strip():
-                            text_parts.append(text)
-                    text = "\n".join(text_parts)
-            else:
-                # Scanned PDF - use OCR
-                try:
-                    import easyocr
-
-                    reader = easyocr.Reader(["hi", "en"], gpu=False)
-
-                    with fitz.open(file_path) as doc:
-                        text_parts = []
-                        for page_num in range(doc.page_count):
-                            page = doc.load_page(page_num)
-                            pix = page.get_pixmap(dpi=200)
-                            ocr_result = reader.readtext(pix.tobytes(), detail=0, paragraph=True)
-                            text_parts.append(" ".join(ocr_result))
-                    text = "\n".join(text_parts)
-                except ImportError:
-                    print("⚠️  EasyOCR not available, skipping scanned PDF")
-                    return None
+            # One pass over the PDF; only pages without a text layer are OCRed
+            skipped = []
+            pages = extract_pdf_pages(
+                file_path, reader_factory=get_ocr_reader, ocr_limits=WATCH_OCR_LIMITS, deferred=skipped
+            )
+            if skipped:
+                print(f"⚠️  OCR budget skipped {len(skipped)} page(s) of {Path(file_path).name}: {skipped}")
+            text = "\n".join(page_text for _, page_text in pages)
 
         elif ext == ".docx":
             text = extract_docx(file_path)
@@ -181,18 +223,78 @@ def extract_text_from_file(file_path: str) -> Optional[str]:
         return None
 
 
-def classify_for_miscellaneous(text: str) -> List[str]:
+def make_document(file_path: str, text: str):
+    """Wrap extracted text in a Document with the watch folder metadata"""
+    from llama_index.core import Document
+
+    metadata = {
+        "file_name": Path(file_path).name,
+        "source": "watch_folder",
+        "processed_date": datetime.now().isoformat(),
+    }
+    return Document(text=text, metadata=metadata)
+
+
+def embed_document(file_path: str, text: str) -> List[Tuple]:
+    """Chunk and embed a document once, for classification and insertion alike"""
+    return list(embed_chunks([make_document(file_path, text)]))
+
+
+def classify_full(text: str, embedded: Optional[List[Tuple]] = None) -> Tuple[str, float, dict]:
+    """
+    Second stage: the embedding head with WATCH_CLASSIFIER=embedding and the
+    document's embedded chunks, otherwise the NLI model.
+    """
+    head = init_embedding_classifier() if WATCH_CLASSIFIER == "embedding" and embedded else None
+    vector = document_vector(embedding for _, embedding in embedded) if head is not None else None
+
+    if vector is not None:
+        label, confidence, scores = head.predict(vector)
+        print(f"   📊 Classification (embedding): {label} (confidence: {confidence:.2%})")
+    else:
+        init_classifier()
+        label, confidence, scores = classify_text(text, classifier_model, classifier_tokenizer, classifier_device)
+        print(f"   📊 Classification: {label} (confidence: {confidence:.2%})")
+    return label, confidence, scores
+
+
+def classify_for_miscellaneous(text: str, embedded: Optional[List[Tuple]] = None, file_name: str = "") -> List[str]:
     """
     Classify text for miscellaneous folder using hybrid approach.
+    The keyword/date cascade stage answers when it is at least
+    CASCADE_CONFIDENCE sure; other files escalate to classify_full.
 
     Returns:
         List of collection names: ["static"], ["dynamic"], or ["static", "dynamic"]
     """
-    init_classifier()
+    cascade = init_cascade()
+    stage1_label = None
+    stage1_ms = stage2_ms = 0.0
+    escalate = audit = False
+
+    if cascade is not None:
+        start = time.perf_counter()
+        label, confidence, scores = cascade.classify(text, file_name)
+        stage1_ms = (time.perf_counter() - start) * 1000
+        stage1_label = label
+        escalate = confidence < CASCADE_CONFIDENCE
+        audit = not escalate and random.random() < CASCADE_AUDIT_RATE
+        if not escalate:
+            print(f"   📊 Classification (keywords, {stage1_ms:.1f} ms): {label} (confidence: {confidence:.2%})")
+
+    if cascade is None or escalate or audit:
+        start = time.perf_counter()
+        full = classify_full(text, embedded)
+        stage2_ms = (time.perf_counter() - start) * 1000
+        if cascade is None or escalate:
+            label, confidence, scores = full
+        elif full[0] != label:
+            # Audited answers are kept; the disagreement only shows up in the metrics
+            print(f"   🔍 Audit: full classifier says {full[0]}, keeping {label}")
+
+    if cascade is not None:
+        cascade_metrics.record(stage1_label, full[0] if audit else label, escalate, audit, stage1_ms, stage2_ms)
 
-    label, confidence, scores = classify_text(text, classifier_model, classifier_tokenizer, classifier_device)
-
-    print(f"   📊 Classification: {label} (confidence: {confidence:.2%})")
     print(f"      Scores: static={scores['static']:.2%}, dynamic={scores['dynamic']:.2%}")
 
     # Hybrid logic: if confidence >= 60%, use that label; else add to both
@@ -203,13 +305,20 @@ def classify_for_miscellaneous(text: str) -> List[str]:
         return ["static", "dynamic"]
 
 
-def process_and_insert(file_path: str, target_collections: List[str]) -> bool:
+def process_and_insert(
+    file_path: str,
+    target_collections: List[str],
+    text: Optional[str] = None,
+    embedded: Optional[List[Tuple]] = None,
+) -> bool:
     """
     Process file and insert into specified Weaviate collection(s).
 
     Args:
         file_path: Path to the file to process
         target_collections: List of collection names to insert into
+        text: Already extracted text, if any
+        embedded: Already embedded chunks (from embed_document), if any
 
     Returns:
         True if successful, False otherwise
@@ -217,33 +326,21 @@ def process_and_insert(file_path: str, target_collections: List[str]) -> bool:
     init_weaviate()
 
     # Extract text
-    text = extract_text_from_file(file_path)
+    if text is None:
+        text = extract_text_from_file(file_path)
     if not text:
         return False
 
-    # Prepare metadata
-    filename = Path(file_path).name
-    metadata = {
-        "file_name": filename,
-        "source": "watch_folder",
-        "processed_date": datetime.now().isoformat(),
-    }
+    # Embed once, however many collections receive the chunks
+    if embedded is None:
+        embedded = embed_document(file_path, text)
 
     # Insert into each target collection
     for collection_name in target_collections:
         try:
             print(f"   💾 Inserting into '{collection_name}' collection...")
 
-            # Use embed_and_insert from curation_04.py
-            from llama_index.core import Document
-
-            doc = Document(text=text, metadata=metadata)
-
-            embed_and_insert(
-                documents=[doc],
-                client=weaviate_client,
-                collection_name=collection_name,
-            )
+            insert_embedded(weaviate_client, collection_name, embedded)
 
             print(f"   ✅ Successfully added to '{collection_name}'")
 
@@ -324,6 +421,8 @@ def handle_file_added(file_path: str, folder_type: str) -> None:
     print(f"\n➕ NEW FILE: {filename} [{folder_type}]")
 
     # Determine target collection(s)
+    text = None
+    embedded = None
     if folder_type == "static":
         target_collections = ["static"]
     elif folder_type == "dynamic":
@@ -333,12 +432,13 @@ def handle_file_added(file_path: str, folder_type: str) -> None:
         text = extract_text_from_file(file_path)
         if not text:
             return
-        target_collections = classify_for_miscellaneous(text)
+        embedded = embed_document(file_path, text) if WATCH_CLASSIFIER == "embedding" else None
+        target_collections = classify_for_miscellaneous(text, embedded, filename)
     else:
         return
 
     # Process and insert
-    success = process_and_insert(file_path, target_collections)
+    success = process_and_insert(file_path, target_collections, text=text, embedded=embedded)
 
     if success:
         move_to_processed(file_path)